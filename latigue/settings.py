@@ -461,3 +461,114 @@ OPENCLAW_TELEGRAM_BOT = os.environ.get('OPENCLAW_TELEGRAM_BOT', 'Bolibanabot')
 # SaaS Trial Mode (desactiver quand PayDunya est active)
 SAAS_TRIAL_ENABLED = os.environ.get('SAAS_TRIAL_ENABLED', 'true').lower() == 'true'
 SAAS_TRIAL_DAYS = int(os.environ.get('SAAS_TRIAL_DAYS', '7'))
+
+# ======================================================================
+# MARKETING IA (pipeline vidéo)
+# ======================================================================
+# Cache média adressé par contenu (segments téléchargés/normalisés)
+MARKETING_MEDIA_CACHE_DIR = os.environ.get(
+    'MARKETING_MEDIA_CACHE_DIR', os.path.join(MEDIA_ROOT, 'marketing', 'cache')
+)
+MARKETING_MEDIA_CACHE_MAX_BYTES = int(os.environ.get('MARKETING_MEDIA_CACHE_MAX_BYTES', str(5 * 1024 ** 3)))
+
+# Téléchargements parallèles (vidéos providers, images) : 0 = pas de plafond de débit
+MARKETING_DOWNLOAD_MAX_CONCURRENCY = int(os.environ.get('MARKETING_DOWNLOAD_MAX_CONCURRENCY', '6'))
+MARKETING_DOWNLOAD_MAX_BYTES_PER_SECOND = int(os.environ.get('MARKETING_DOWNLOAD_MAX_BYTES_PER_SECOND', '0'))
+
+# Backend de montage diaporama : 'moviepy' (défaut) ou 'ffmpeg' (filtres natifs,
+# opt-in après comparaison avec `manage.py benchmark_video_editor`)
+MARKETING_VIDEO_EDITOR_BACKEND = os.environ.get('MARKETING_VIDEO_EDITOR_BACKEND', 'moviepy')
+
+# Exécuteur DAG du pipeline d'agents (run_pipeline)
+MARKETING_PIPELINE_WORKERS = int(os.environ.get('MARKETING_PIPELINE_WORKERS', '4'))
+MARKETING_PIPELINE_MAX_ATTEMPTS = int(os.environ.get('MARKETING_PIPELINE_MAX_ATTEMPTS', '3'))
+MARKETING_PIPELINE_STALE_SECONDS = int(os.environ.get('MARKETING_PIPELINE_STALE_SECONDS', '1800'))
+# Concurrence max par API externe (défaut: MARKETING_PIPELINE_DEFAULT_API_LIMIT)
+MARKETING_PIPELINE_API_LIMITS = {
+    'anthropic': 4,
+    'elevenlabs': 2,
+    'heygen': 1,
+    'minimax': 2,
+    'luma': 2,
+}
+MARKETING_PIPELINE_DEFAULT_API_LIMIT = 2
+
+# File de tâches persistée (run_workers)
+MARKETING_TASK_VISIBILITY_TIMEOUT = int(os.environ.get('MARKETING_TASK_VISIBILITY_TIMEOUT', '900'))
+MARKETING_TASK_BACKOFF_BASE = int(os.environ.get('MARKETING_TASK_BACKOFF_BASE', '30'))
+MARKETING_TASK_BACKOFF_MAX = int(os.environ.get('MARKETING_TASK_BACKOFF_MAX', '3600'))
+MARKETING_TASK_POLL_INTERVAL = float(os.environ.get('MARKETING_TASK_POLL_INTERVAL', '2'))
+
+# Routage multi-provider (job.config['provider'] = 'auto' pour classer tous les providers)
+MARKETING_ROUTER_JOB_BUDGET = None  # USD par job (surchargeable via job.config['budget_usd'])
+MARKETING_ROUTER_WEIGHTS = {'cost': 1.0, 'latency': 1.0}
+MARKETING_ROUTER_DEFAULT_LATENCY = 120.0  # secondes, avant tout historique
+
+# Limites par provider : débit (requêtes/min) et appels API simultanés (rate_governor),
+# capacity = générations simultanées avant que le router considère le provider chargé
+MARKETING_VIDEO_PROVIDER_DEFAULT_LIMITS = {'requests_per_minute': 30, 'max_in_flight': 4}
+MARKETING_VIDEO_PROVIDER_LIMITS = {
+    'minimax': {'requests_per_minute': 20, 'max_in_flight': 5, 'capacity': 5},
+    'luma': {'requests_per_minute': 30, 'max_in_flight': 4, 'capacity': 4},
+    'runway': {'requests_per_minute': 30, 'max_in_flight': 4, 'capacity': 4},
+    'pika': {'requests_per_minute': 20, 'max_in_flight': 3, 'capacity': 3},
+    'stability': {'requests_per_minute': 60, 'max_in_flight': 4, 'capacity': 4},
+    'heygen': {'requests_per_minute': 10, 'max_in_flight': 2},
+    'dalle': {'requests_per_minute': 15, 'max_in_flight': 4},
+    'elevenlabs': {'requests_per_minute': 0, 'max_in_flight': 3},
+    'mock': {'requests_per_minute': 0, 'max_in_flight': 0, 'capacity': 1000},
+}
+
+# Cache des clips générés (opt-in, surchargeable via job.config['generation_cache'])
+MARKETING_GENERATION_CACHE_ENABLED = os.environ.get('MARKETING_GENERATION_CACHE_ENABLED', 'false').lower() == 'true'
+MARKETING_GENERATION_CACHE_TTL = int(os.environ.get('MARKETING_GENERATION_CACHE_TTL', str(30 * 24 * 3600)))  # 0 = sans expiration
+
+# Provider simulé 'mock' (benchmark_pipeline, démos hors ligne) : latences en secondes
+MARKETING_MOCK_PROVIDER = {
+    'launch_latency': {'dist': 'fixed', 'value': 0.05},
+    'generation_latency': {'dist': 'lognormal', 'median': 5.0, 'sigma': 0.5},
+    'status_latency': {'dist': 'fixed', 'value': 0.02},
+    'launch_failure_rate': 0.0,
+    'failure_rate': 0.0,
+    'rate_limit_rate': 0.0,
+    'cost_per_second': 0.0,
+    'clips': True,  # Clips synthétiques FFmpeg (testsrc2)
+}
+
+# Transferts MinIO/S3 (marketing/storage.py) : multipart parallèle au-delà du seuil
+MARKETING_STORAGE_MULTIPART_THRESHOLD = int(os.environ.get('MARKETING_STORAGE_MULTIPART_THRESHOLD', str(16 * 1024 * 1024)))
+MARKETING_STORAGE_MULTIPART_CHUNKSIZE = int(os.environ.get('MARKETING_STORAGE_MULTIPART_CHUNKSIZE', str(16 * 1024 * 1024)))
+MARKETING_STORAGE_MAX_CONCURRENCY = int(os.environ.get('MARKETING_STORAGE_MAX_CONCURRENCY', '8'))
+
+# Uploads directs navigateur → bucket (marketing/direct_upload.py)
+# Le bucket doit autoriser le PUT en CORS et exposer l'en-tête ETag ;
+# MINIO_PUBLIC_ENDPOINT = URL du bucket vue du navigateur (défaut: MINIO_ENDPOINT)
+MARKETING_DIRECT_UPLOAD_MAX_BYTES = int(os.environ.get('MARKETING_DIRECT_UPLOAD_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+MARKETING_DIRECT_UPLOAD_PART_SIZE = int(os.environ.get('MARKETING_DIRECT_UPLOAD_PART_SIZE', str(16 * 1024 * 1024)))
+MARKETING_DIRECT_UPLOAD_URL_EXPIRY = int(os.environ.get('MARKETING_DIRECT_UPLOAD_URL_EXPIRY', '3600'))
+
+# Images DALL-E générées en parallèle par script (plafonnées par le gouverneur 'dalle')
+MARKETING_IMAGE_CONCURRENCY = int(os.environ.get('MARKETING_IMAGE_CONCURRENCY', '4'))
+
+# Voix-off ElevenLabs par morceaux (marketing/ai/tts_chunked.py), cache dans le MediaCache
+MARKETING_TTS_CHUNK_CHARS = int(os.environ.get('MARKETING_TTS_CHUNK_CHARS', '250'))
+MARKETING_TTS_CONCURRENCY = int(os.environ.get('MARKETING_TTS_CONCURRENCY', '3'))
+MARKETING_TTS_TIMEOUT = int(os.environ.get('MARKETING_TTS_TIMEOUT', '60'))
+
+# Suivi HeyGen non bloquant (marketing/ai/heygen_tracker.py) : polls espacés ×1.5
+MARKETING_HEYGEN_POLL_INITIAL = int(os.environ.get('MARKETING_HEYGEN_POLL_INITIAL', '30'))
+MARKETING_HEYGEN_POLL_MAX = int(os.environ.get('MARKETING_HEYGEN_POLL_MAX', '300'))
+MARKETING_HEYGEN_MAX_WAIT = int(os.environ.get('MARKETING_HEYGEN_MAX_WAIT', '3600'))
+# Webhook /marketing/webhooks/heygen/ (désactivé si vide)
+HEYGEN_WEBHOOK_SECRET = os.environ.get('HEYGEN_WEBHOOK_SECRET', '')
+
+# api_job_status : long-poll (?wait=) et flux SSE (?stream=1)
+# Chaque requête en attente occupe un thread gunicorn : servir avec
+# --worker-class gthread (cf. Dockerfile) et garder ces durées bien sous
+# --timeout (120s). Le client SSE se reconnecte seul avec Last-Event-ID.
+MARKETING_STATUS_POLL_INTERVAL = float(os.environ.get('MARKETING_STATUS_POLL_INTERVAL', '1.0'))
+MARKETING_STATUS_LONGPOLL_MAX = int(os.environ.get('MARKETING_STATUS_LONGPOLL_MAX', '5'))
+MARKETING_STATUS_STREAM_MAX = int(os.environ.get('MARKETING_STATUS_STREAM_MAX', '55'))
+
+# Stats du dashboard marketing : agrégat en cache, invalidé par signal
+MARKETING_DASHBOARD_STATS_TTL = int(os.environ.get('MARKETING_DASHBOARD_STATS_TTL', '30'))
@@ -3,16 +3,28 @@ Django Admin customisé pour la production vidéo.
 Interface admin complète avec actions en masse.
 """
 
+import json
+
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from .models_extended import (
     VideoProjectTemplate,
     VideoProductionJob,
     SegmentAsset,
-    VideoSegmentGeneration
+    VideoSegmentGeneration,
+    PipelineStageRun,
+    BackgroundTask,
+    GeneratedClip,
+    DirectUpload,
+    CostEntry,
+    CostDailyRollup,
+    ProviderPayload,
+    MediaProbe
 )
+from .payloads import load_payload
 
 
 # =============================================================================
@@ -73,6 +85,14 @@ class SegmentAssetInline(admin.TabularInline):
     readonly_fields = ['created_at']
 
 
+class PipelineStageRunInline(admin.TabularInline):
+    model = PipelineStageRun
+    extra = 0
+    fields = ['stage', 'status', 'attempts', 'message', 'cost', 'started_at', 'finished_at']
+    readonly_fields = fields
+    can_delete = True
+
+
 class VideoSegmentGenerationInline(admin.TabularInline):
     model = VideoSegmentGeneration
     extra = 0
@@ -139,10 +159,11 @@ class VideoProductionJobAdmin(admin.ModelAdmin):
         'completed_at',
         'estimated_cost',
         'actual_cost',
+        'cache_savings',
         'progress_percent',
     ]
     
-    inlines = [SegmentAssetInline, VideoSegmentGenerationInline]
+    inlines = [SegmentAssetInline, VideoSegmentGenerationInline, PipelineStageRunInline]
     
     fieldsets = (
         ('Informations', {
@@ -165,7 +186,7 @@ class VideoProductionJobAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Coûts', {
-            'fields': ('estimated_cost', 'actual_cost')
+            'fields': ('estimated_cost', 'actual_cost', 'cache_savings')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'started_at', 'completed_at'),
@@ -390,3 +411,144 @@ class VideoSegmentGenerationAdmin(admin.ModelAdmin):
             )
         return '-'
     video_preview.short_description = 'Vidéo'
+
+
+
+# =============================================================================
+# TÂCHES DE FOND
+# =============================================================================
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = [
+        'name',
+        'status',
+        'priority',
+        'attempts_info',
+        'run_at',
+        'locked_by',
+        'created_at',
+    ]
+    list_filter = ['status', 'name', 'created_at']
+    search_fields = ['name', 'unique_key', 'last_error']
+    readonly_fields = ['created_at', 'updated_at', 'finished_at', 'locked_until', 'locked_by']
+    
+    actions = ['requeue']
+    
+    def attempts_info(self, obj):
+        return f"{obj.attempts}/{obj.max_attempts}"
+    attempts_info.short_description = 'Essais'
+    
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status=BackgroundTask.Status.RUNNING).update(
+            status=BackgroundTask.Status.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            last_error='',
+        )
+        self.message_user(request, f"{count} tâche(s) remise(s) en file")
+    requeue.short_description = "Remettre en file"
+
+
+# =============================================================================
+# CACHE DE GÉNÉRATION
+# =============================================================================
+
+@admin.register(GeneratedClip)
+class GeneratedClipAdmin(admin.ModelAdmin):
+    list_display = [
+        'cache_key_short',
+        'provider',
+        'model',
+        'duration',
+        'hits',
+        'saved_cost',
+        'invalidated',
+        'expires_at',
+        'created_at',
+    ]
+    list_filter = ['provider', 'invalidated', 'created_at']
+    search_fields = ['cache_key', 'prompt']
+    readonly_fields = ['cache_key', 'hits', 'saved_cost', 'created_at', 'last_used_at', 'source_generation']
+    
+    actions = ['invalidate', 'invalidate_and_purge']
+    
+    def cache_key_short(self, obj):
+        return obj.cache_key[:12]
+    cache_key_short.short_description = 'Clé'
+    
+    def invalidate(self, request, queryset):
+        from .ai.generation_cache import get_generation_cache
+        count = get_generation_cache().invalidate(queryset)
+        self.message_user(request, f"{count} clip(s) invalidé(s)")
+    invalidate.short_description = "Invalider"
+    
+    def invalidate_and_purge(self, request, queryset):
+        from .ai.generation_cache import get_generation_cache
+        count = get_generation_cache().invalidate(queryset, purge=True)
+        self.message_user(request, f"{count} clip(s) supprimé(s) (base + MinIO)")
+    invalidate_and_purge.short_description = "Supprimer (base + MinIO)"
+
+
+@admin.register(DirectUpload)
+class DirectUploadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'kind', 'user', 'job', 'size_mb', 'part_count', 'status', 'created_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['filename', 'object_name']
+    readonly_fields = ['upload_id', 'object_name', 'bucket', 'url', 'created_at', 'completed_at']
+    
+    actions = ['abort']
+    
+    def size_mb(self, obj):
+        return f"{obj.size / (1024 * 1024):.1f} MB"
+    size_mb.short_description = 'Taille'
+    
+    def abort(self, request, queryset):
+        from .direct_upload import abort_upload
+        for upload in queryset.filter(status=DirectUpload.Status.INITIATED):
+            abort_upload(upload)
+        self.message_user(request, "Uploads en cours abandonnés")
+    abort.short_description = "Abandonner les uploads en cours"
+
+
+@admin.register(CostEntry)
+class CostEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job', 'segment', 'provider', 'kind', 'amount', 'created_at']
+    list_filter = ['provider', 'kind', 'created_at']
+    search_fields = ['job__title']
+    raw_id_fields = ['job', 'segment']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(CostDailyRollup)
+class CostDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'provider', 'kind', 'amount', 'entries']
+    list_filter = ['provider', 'kind']
+    date_hierarchy = 'day'
+
+
+@admin.register(ProviderPayload)
+class ProviderPayloadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job', 'generation', 'provider', 'kind', 'size', 'created_at']
+    list_filter = ['provider', 'kind', 'created_at']
+    raw_id_fields = ['job', 'generation', 'video_segment']
+    readonly_fields = ['payload_display']
+    exclude = ['data']
+    date_hierarchy = 'created_at'
+
+    def get_queryset(self, request):
+        # Le JSON compressé n'est chargé que sur la page de détail
+        qs = super().get_queryset(request)
+        return qs if request.resolver_match.url_name.endswith('_change') else qs.defer('data')
+
+    def payload_display(self, obj):
+        return format_html('<pre>{}</pre>', json.dumps(load_payload(obj), indent=2, ensure_ascii=False))
+    payload_display.short_description = 'Réponse'
+
+
+@admin.register(MediaProbe)
+class MediaProbeAdmin(admin.ModelAdmin):
+    list_display = ['digest', 'width', 'height', 'fps', 'duration', 'video_codec', 'audio_codec', 'has_audio', 'created_at']
+    list_filter = ['video_codec', 'profile', 'audio_codec', 'has_audio', 'variable_frame_rate']
+    search_fields = ['digest']
+    readonly_fields = ['created_at']
@@ -24,6 +24,7 @@ from .script_writer import ScriptWriterAgent
 from .voice_agent import VoiceAgent
 from .video_agent import VideoAgent
 from .qa_agent import QAAgent
+from .executor import PipelineExecutor
 
 __all__ = [
     'BaseAgent',
@@ -33,4 +34,5 @@ __all__ = [
     'VoiceAgent',
     'VideoAgent',
     'QAAgent',
+    'PipelineExecutor',
 ]
@@ -35,10 +35,17 @@ class BaseAgent:
     - Effectue sa tâche
     - Met à jour le job
     - Retourne un AgentResult
+
+    Pour l'exécuteur DAG, chaque agent déclare les artefacts qu'il
+    consomme (inputs) et produit (outputs), ainsi que l'API externe
+    qu'il sollicite (resource) pour limiter la concurrence par API.
     """
-    
+
     name: str = "BaseAgent"
-    
+    inputs: tuple = ()
+    outputs: tuple = ()
+    resource: Optional[str] = None
+
     def __init__(self, **config):
         self.config = config
         self.logger = logging.getLogger(f'marketing.agents.{self.name}')
@@ -91,3 +98,11 @@ class BaseAgent:
         Vérifie les pré-conditions (statut, dépendances).
         """
         return True
+
+    def get_inputs(self, job) -> tuple:
+        """Artefacts requis pour ce job (peut dépendre de sa config)."""
+        return self.inputs
+
+    def get_resource(self, job) -> Optional[str]:
+        """API externe sollicitée pour ce job (None = pas de limite)."""
+        return self.resource
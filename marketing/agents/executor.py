@@ -0,0 +1,283 @@
+"""
+Exécuteur DAG du pipeline d'agents.
+
+Au lieu d'exécuter les agents strictement dans l'ordre, job par job,
+l'exécuteur construit un graphe à partir des artefacts déclarés par
+chaque agent (inputs / outputs) :
+
+    idea_intake ─► script_writer ─┬─► voice ──────┐
+                                  └─► video ◄─────┘ (mode avatar seulement)
+                                        ·
+                           (poll_video_generations)
+                                        ·
+                                        ▼
+                                        qa
+
+Les étapes prêtes de tous les jobs sont soumises à un pool de workers,
+avec une limite de concurrence par API externe (ElevenLabs, HeyGen, ...).
+La progression est persistée (PipelineStageRun) : après un crash, un
+nouveau run reprend sans refaire les étapes terminées.
+"""
+
+import logging
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger('marketing.agents.executor')
+
+
+# Artefacts déduits du statut du job : jobs créés avant l'exécuteur DAG,
+# et artefacts produits hors pipeline (vidéo prête après polling)
+STATUS_ARTIFACTS = {
+    'draft': (),
+    'script_pending': ('theme',),
+    'script_ready': ('theme', 'script'),
+    'assets_pending': ('theme', 'script'),
+    'assets_ready': ('theme', 'script', 'audio'),
+    'video_pending': ('theme', 'script', 'video_job'),
+    'video_ready': ('theme', 'script', 'video_job', 'video'),
+    'assembly_pending': ('theme', 'script', 'video_job', 'video'),
+    'completed': ('theme', 'script', 'video_job', 'video', 'qa'),
+}
+
+# Jobs ignorés par l'exécuteur
+INACTIVE_STATUSES = ('completed', 'failed', 'paused')
+
+
+def job_artifacts(job) -> set:
+    """Artefacts disponibles d'après l'état du job lui-même"""
+    available = set(STATUS_ARTIFACTS.get(job.status, ()))
+    if job.get_config('audio_path'):
+        available.add('audio')
+    return available
+
+
+class PipelineExecutor:
+    """
+    Exécute le pipeline d'agents sous forme de DAG, en parallèle entre jobs.
+
+    Usage:
+        executor = PipelineExecutor([('voice', VoiceAgent), ('video', VideoAgent)])
+        stats = executor.run(job_ids=[1, 2, 3])
+    """
+
+    def __init__(
+        self,
+        stages: List[Tuple[str, type]],
+        max_workers: int = None,
+        api_limits: Dict[str, int] = None,
+        max_attempts: int = None,
+        stale_after: int = None,
+    ):
+        """
+        Args:
+            stages: Liste ordonnée (nom, classe d'agent)
+            max_workers: Taille du pool de workers
+            api_limits: Concurrence max par API ({'elevenlabs': 2, ...})
+            max_attempts: Tentatives max par étape (tous runs confondus)
+            stale_after: Secondes après lesquelles une étape 'running' est
+                considérée orpheline (process crashé) et relancée
+        """
+        self.stages = stages
+        self.agents = {name: agent_class() for name, agent_class in stages}
+        self.max_workers = max_workers or getattr(settings, 'MARKETING_PIPELINE_WORKERS', 4)
+        self.api_limits = api_limits if api_limits is not None else getattr(
+            settings, 'MARKETING_PIPELINE_API_LIMITS', {}
+        )
+        self.default_api_limit = getattr(settings, 'MARKETING_PIPELINE_DEFAULT_API_LIMIT', 2)
+        self.max_attempts = max_attempts or getattr(settings, 'MARKETING_PIPELINE_MAX_ATTEMPTS', 3)
+        self.stale_after = stale_after or getattr(settings, 'MARKETING_PIPELINE_STALE_SECONDS', 1800)
+
+    # ------------------------------------------------------------------
+    # Planification
+    # ------------------------------------------------------------------
+
+    def api_limit(self, resource: Optional[str]) -> int:
+        if resource is None:
+            return self.max_workers
+        return self.api_limits.get(resource, self.default_api_limit)
+
+    def ready_stages(self, job_ids: Iterable[int], exclude: set = frozenset()) -> List[tuple]:
+        """
+        Étapes exécutables : inputs disponibles, outputs pas encore produits,
+        ni en cours ni épuisées.
+
+        Returns:
+            Liste de (job, nom d'étape, resource)
+        """
+        from marketing.models_extended import VideoProductionJob, PipelineStageRun
+
+        jobs = (
+            VideoProductionJob.objects
+            .filter(id__in=list(job_ids))
+            .exclude(status__in=INACTIVE_STATUSES)
+            .select_related('template')
+            .prefetch_related('stage_runs')
+        )
+
+        ready = []
+        for job in jobs:
+            runs = {run.stage: run for run in job.stage_runs.all()}
+
+            available = job_artifacts(job)
+            for name, run in runs.items():
+                if run.status == PipelineStageRun.Status.COMPLETED and name in self.agents:
+                    available.update(self.agents[name].outputs)
+
+            for name, _agent_class in self.stages:
+                if (job.id, name) in exclude:
+                    continue
+
+                agent = self.agents[name]
+                run = runs.get(name)
+
+                if set(agent.outputs) <= available:
+                    continue
+                if run and run.status == PipelineStageRun.Status.RUNNING:
+                    continue
+                if run and run.attempts >= self.max_attempts:
+                    continue
+                if not set(agent.get_inputs(job)) <= available:
+                    continue
+
+                ready.append((job, name, agent.get_resource(job)))
+
+        return ready
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def recover_stale(self) -> int:
+        """Remet en attente les étapes restées 'running' après un crash"""
+        from marketing.models_extended import PipelineStageRun
+
+        cutoff = timezone.now() - timedelta(seconds=self.stale_after)
+        count = PipelineStageRun.objects.filter(
+            status=PipelineStageRun.Status.RUNNING,
+            updated_at__lt=cutoff,
+        ).update(status=PipelineStageRun.Status.PENDING, updated_at=timezone.now())
+
+        if count:
+            logger.warning(f"{count} étape(s) orpheline(s) remise(s) en attente")
+        return count
+
+    def run(self, job_ids: Iterable[int], on_result=None) -> dict:
+        """
+        Exécute toutes les étapes prêtes des jobs donnés jusqu'à épuisement.
+        Une étape échouée n'est pas retentée dans le même run (elle le sera
+        au prochain run tant que max_attempts n'est pas atteint).
+
+        Args:
+            job_ids: IDs des jobs à faire avancer
+            on_result: Callback(job_id, stage, AgentResult) appelé à chaque étape
+
+        Returns:
+            Stats {'completed', 'failed', 'skipped', 'cost_usd'}
+        """
+        job_ids = list(job_ids)
+        stats = {'completed': 0, 'failed': 0, 'skipped': 0, 'cost_usd': 0.0}
+
+        self.recover_stale()
+
+        attempted = set()
+        in_flight = Counter()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                for job, name, resource in self.ready_stages(job_ids, exclude=attempted):
+                    if len(running) >= self.max_workers:
+                        break
+                    if in_flight[resource] >= self.api_limit(resource):
+                        continue
+
+                    attempted.add((job.id, name))
+                    in_flight[resource] += 1
+                    future = pool.submit(self._run_stage, job.id, name)
+                    running[future] = (job.id, name, resource)
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id, name, resource = running.pop(future)
+                    in_flight[resource] -= 1
+
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Job #{job_id} {name}: {e}", exc_info=True)
+                        stats['failed'] += 1
+                        continue
+
+                    if result is None:
+                        stats['skipped'] += 1
+                    elif result.success:
+                        stats['completed'] += 1
+                        stats['cost_usd'] += result.cost_usd
+                    else:
+                        stats['failed'] += 1
+
+                    if on_result and result is not None:
+                        on_result(job_id, name, result)
+
+        return stats
+
+    def _run_stage(self, job_id: int, name: str):
+        """
+        Exécute une étape dans un worker. L'étape est d'abord réclamée par
+        un UPDATE conditionnel : deux exécuteurs ne peuvent pas la lancer
+        en même temps.
+
+        Returns:
+            AgentResult, ou None si l'étape a été réclamée ailleurs
+        """
+        from marketing.models_extended import VideoProductionJob, PipelineStageRun
+
+        try:
+            job = VideoProductionJob.objects.select_related('template').get(pk=job_id)
+            run, _ = PipelineStageRun.objects.get_or_create(job=job, stage=name)
+
+            claimed = PipelineStageRun.objects.filter(
+                pk=run.pk, attempts__lt=self.max_attempts
+            ).filter(
+                ~Q(status__in=[PipelineStageRun.Status.RUNNING, PipelineStageRun.Status.COMPLETED])
+            ).update(
+                status=PipelineStageRun.Status.RUNNING,
+                attempts=F('attempts') + 1,
+                started_at=timezone.now(),
+                finished_at=None,
+                updated_at=timezone.now(),
+            )
+            if not claimed:
+                return None
+
+            agent_class = type(self.agents[name])
+            result = agent_class().run(job)
+
+            PipelineStageRun.objects.filter(pk=run.pk).update(
+                status=(
+                    PipelineStageRun.Status.COMPLETED if result.success
+                    else PipelineStageRun.Status.FAILED
+                ),
+                message=result.message,
+                data=result.data,
+                cost=Decimal(str(round(result.cost_usd, 4))),
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            return result
+
+        finally:
+            # Chaque thread a sa propre connexion DB
+            connection.close()
@@ -8,10 +8,14 @@ Sources supportées:
 
 Règles:
 - 3-10 idées/jour
-- Déduplication (pas de thème répété en 30 jours)
+- Déduplication (pas de thème répété en 30 jours, via theme_hash indexé)
 - Priorisation par pilier de contenu
+- Sélection des scripts les moins utilisés verrouillée (FOR UPDATE SKIP
+  LOCKED) : deux intakes en parallèle ne prennent pas les mêmes scripts
 """
 
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from datetime import timedelta
 from .base import BaseAgent, AgentResult
@@ -19,6 +23,8 @@ from .base import BaseAgent, AgentResult
 
 class IdeaIntakeAgent(BaseAgent):
     name = "IdeaIntakeAgent"
+    inputs = ()
+    outputs = ('theme',)
     
     def execute(self, job) -> AgentResult:
         """
@@ -26,15 +32,13 @@ class IdeaIntakeAgent(BaseAgent):
         Pour batch: crée des jobs à partir de scripts en bibliothèque.
         """
         # Vérifier déduplication
-        from marketing.models_extended import VideoProductionJob
+        from marketing.models_extended import VideoProductionJob, theme_hash
         
-        recent_themes = VideoProductionJob.objects.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).exclude(id=job.id).values_list('theme', flat=True)
-        
-        # Simple check: thème pas déjà utilisé
-        theme_lower = job.theme.lower().strip()
-        duplicates = [t for t in recent_themes if t.lower().strip() == theme_lower]
+        # Thème normalisé déjà utilisé (index theme_hash, -created_at)
+        duplicates = VideoProductionJob.objects.filter(
+            theme_hash=theme_hash(job.theme),
+            created_at__gte=timezone.now() - timedelta(days=30),
+        ).exclude(id=job.id).exists()
         
         if duplicates:
             return AgentResult(
@@ -62,29 +66,38 @@ class IdeaIntakeAgent(BaseAgent):
         """
         from marketing.models_extended import VideoScript, VideoProductionJob
         
-        scripts = VideoScript.objects.all().order_by('usage_count')
+        scripts = VideoScript.objects.order_by('usage_count', 'code')
         
         if pillar:
             scripts = scripts.filter(theme=pillar)
         
-        scripts = scripts[:count]
         created = []
         
-        for script in scripts:
-            job = VideoProductionJob.objects.create(
-                title=script.title,
-                theme=f"{script.code} - {script.title}",
-                status='draft',
-                script_text=self._format_script(script),
-                config={
-                    'script_code': script.code,
-                    'duration_min': script.duration_min,
-                    'duration_max': script.duration_max,
-                    'platform': script.platform,
-                }
+        with transaction.atomic():
+            # Lignes verrouillées jusqu'au commit ; celles déjà prises par un
+            # autre intake sont sautées (no-op sous SQLite)
+            scripts = list(scripts.select_for_update(skip_locked=True)[:count])
+            
+            for script in scripts:
+                job = VideoProductionJob.objects.create(
+                    title=script.title,
+                    theme=f"{script.code} - {script.title}",
+                    status='draft',
+                    script_text=self._format_script(script),
+                    config={
+                        'script_code': script.code,
+                        'duration_min': script.duration_min,
+                        'duration_max': script.duration_max,
+                        'platform': script.platform,
+                    }
+                )
+                created.append(job.id)
+            
+            # Compteurs d'utilisation : une seule requête
+            VideoScript.objects.filter(pk__in=[script.pk for script in scripts]).update(
+                usage_count=F('usage_count') + 1,
+                updated_at=timezone.now(),
             )
-            script.increment_usage()
-            created.append(job.id)
         
         return created
     
@@ -16,6 +16,8 @@ from .base import BaseAgent, AgentResult
 
 class QAAgent(BaseAgent):
     name = "QAAgent"
+    inputs = ('video',)
+    outputs = ('qa',)
     
     # Termes interdits dans les scripts
     BANNED_TERMS = [
@@ -98,6 +100,12 @@ class QAAgent(BaseAgent):
     
     def _check_segments(self, job) -> dict:
         """Vérifie que tous les segments sont générés."""
+        if job.get_config('heygen_video_id'):
+            # Vidéo avatar HeyGen : une seule vidéo, téléchargée par HeyGenTracker
+            if job.final_video_path:
+                return {'name': 'segments', 'pass': True, 'message': 'Vidéo avatar OK'}
+            return {'name': 'segments', 'pass': False, 'errors': ["Vidéo avatar non téléchargée"]}
+        
         segments = job.generations.all()
         
         if not segments.exists():
@@ -130,9 +138,18 @@ class QAAgent(BaseAgent):
         return {'name': 'segments', 'pass': True, 'message': f'{total} segments OK'}
     
     def _check_duration(self, job) -> dict:
-        """Vérifie la durée totale."""
-        segments = job.generations.filter(status='completed')
-        total_duration = sum(s.duration for s in segments)
+        """
+        Vérifie la durée totale : durée réelle de la vidéo finale (ffprobe,
+        analyse en base), sinon durée annoncée des segments.
+        """
+        probe = self._probe_final_video(job)
+        if probe is not None:
+            total_duration = round(probe.duration, 1)
+        elif job.get_config('heygen_video_id'):
+            total_duration = (job.get_config('heygen') or {}).get('duration') or 0
+        else:
+            segments = job.generations.filter(status='completed')
+            total_duration = sum(s.duration for s in segments)
         
         min_dur = job.get_config('duration_min', 15)
         max_dur = job.get_config('duration_max', 60)
@@ -152,3 +169,13 @@ class QAAgent(BaseAgent):
             }
         
         return {'name': 'duration', 'pass': True, 'message': f'{total_duration}s OK'}
+    
+    def _probe_final_video(self, job):
+        """Analyse ffprobe de la vidéo finale (None si absente ou illisible)"""
+        import os
+        from marketing.ai.media_probe import probe_file
+        
+        if not job.final_video_path or not os.path.exists(job.final_video_path):
+            return None
+        probe = probe_file(job.final_video_path)
+        return probe if probe and probe.duration else None
@@ -48,6 +48,9 @@ FORMAT DE SORTIE (JSON):
 
 class ScriptWriterAgent(BaseAgent):
     name = "ScriptWriterAgent"
+    inputs = ('theme',)
+    outputs = ('script',)
+    resource = 'anthropic'
     
     def can_run(self, job) -> bool:
         return job.status in ('draft', 'script_pending')
@@ -109,6 +112,9 @@ Pilier: {job.get_config('pillar', 'tips')}
             job.save(update_fields=['script_text', 'status', 'script_metadata'])
             
             cost = (response.usage.input_tokens * 3 + response.usage.output_tokens * 15) / 1_000_000
+            from marketing.cost_ledger import record_cost
+            from marketing.models_extended import CostEntry
+            record_cost(job, cost, 'anthropic', CostEntry.Kind.SCRIPT)
             
             return AgentResult(
                 success=True,
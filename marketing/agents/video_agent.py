@@ -16,10 +16,23 @@ from .base import BaseAgent, AgentResult
 
 class VideoAgent(BaseAgent):
     name = "VideoAgent"
+    inputs = ('script',)
+    outputs = ('video_job',)
     
     def can_run(self, job) -> bool:
         return job.status in ('assets_ready', 'script_ready')
     
+    def get_inputs(self, job) -> tuple:
+        # Le mode avatar a besoin de la voix-off ; le mode IA est indépendant
+        if job.get_config('video_mode', 'ai_segments') == 'avatar':
+            return self.inputs + ('audio',)
+        return self.inputs
+    
+    def get_resource(self, job):
+        if job.get_config('video_mode', 'ai_segments') == 'avatar':
+            return 'heygen'
+        return job.get_config('provider', 'minimax')
+    
     def execute(self, job) -> AgentResult:
         """Route vers le bon mode de génération."""
         mode = job.get_config('video_mode', 'ai_segments')
@@ -30,8 +43,13 @@ class VideoAgent(BaseAgent):
             return self._generate_ai_segments(job)
     
     def _generate_avatar(self, job) -> AgentResult:
-        """Mode HeyGen: génère une vidéo avatar talking head."""
-        from marketing.ai.heygen import HeyGenProvider
+        """
+        Mode HeyGen: lance une vidéo avatar talking head.
+        
+        Le suivi (polling avec backoff ou webhook, téléchargement, passage
+        en video_ready) est assuré par HeyGenTracker, sans bloquer.
+        """
+        from marketing.ai.heygen_tracker import HeyGenTracker
         
         api_key = getattr(settings, 'HEYGEN_API_KEY', None)
         avatar_id = job.get_config('avatar_id') or getattr(settings, 'HEYGEN_AVATAR_ID', None)
@@ -52,46 +70,8 @@ class VideoAgent(BaseAgent):
                 errors=["missing_avatar_id"]
             )
         
-        heygen = HeyGenProvider(api_key=api_key, avatar_id=avatar_id)
-        
-        # Vérifier qu'on a l'audio
-        audio_path = job.get_config('audio_path')
-        
-        if audio_path:
-            # Upload audio puis générer
-            audio_url = heygen.upload_audio(audio_path)
-            if not audio_url:
-                return AgentResult(
-                    success=False,
-                    agent_name=self.name,
-                    message="Échec upload audio vers HeyGen",
-                    errors=["audio_upload_failed"]
-                )
-            
-            result = heygen.generate_talking_video(
-                audio_url=audio_url,
-                background=job.get_config('background'),
-                aspect_ratio=job.get_config('aspect_ratio', '9:16')
-            )
-        else:
-            # Mode TTS direct HeyGen (fallback)
-            from marketing.agents.voice_agent import VoiceAgent
-            voiceover = VoiceAgent()._extract_voiceover(job)
-            
-            voice_id = job.get_config('voice_id')
-            if not voice_id:
-                return AgentResult(
-                    success=False,
-                    agent_name=self.name,
-                    message="voice_id requis pour mode TTS HeyGen",
-                    errors=["missing_voice_id"]
-                )
-            
-            result = heygen.generate_talking_video(
-                text=voiceover,
-                voice_id=voice_id,
-                aspect_ratio=job.get_config('aspect_ratio', '9:16')
-            )
+        tracker = HeyGenTracker(job)
+        result = tracker.submit()
         
         if result.status == "failed":
             return AgentResult(
@@ -101,33 +81,24 @@ class VideoAgent(BaseAgent):
                 errors=[result.error_message]
             )
         
-        # Stocker le job_id pour polling
-        job.config = {
-            **job.config,
-            'heygen_video_id': result.job_id,
-            'video_provider': 'heygen',
-        }
-        job.status = 'video_pending'
-        job.started_at = timezone.now()
-        job.save(update_fields=['config', 'status', 'started_at'])
-        
         return AgentResult(
             success=True,
             agent_name=self.name,
             message=f"HeyGen job lancé: {result.job_id}",
             data={"heygen_video_id": result.job_id},
-            cost_usd=heygen.estimate_cost(job.get_config('duration_max', 30))
+            cost_usd=tracker.provider.estimate_cost(job.get_config('duration_max', 30))
         )
     
     def _generate_ai_segments(self, job) -> AgentResult:
         """Mode IA: génère des segments vidéo via MiniMax/Luma."""
-        from marketing.ai.video_providers import get_provider
-        from marketing.models_extended import VideoSegmentGeneration
+        from marketing.ai.video_providers import ProviderRouter
+        from marketing.models_extended import ProviderPayload, VideoSegmentGeneration
+        from marketing.payloads import store_payload
         
         provider_name = job.get_config('provider', 'minimax')
         
         try:
-            provider = get_provider(provider_name)
+            router = ProviderRouter(job=job, default_provider='minimax')
         except ValueError as e:
             return AgentResult(
                 success=False,
@@ -144,6 +115,14 @@ class VideoAgent(BaseAgent):
         if not segments.exists():
             # Pas de segments pré-créés — les créer depuis le script
             segments = self._create_segments_from_script(job, provider_name)
+            if not segments and job.generations.exists():
+                # Segments déjà lancés ou terminés (nouvelle exécution de l'étape)
+                return AgentResult(
+                    success=True,
+                    agent_name=self.name,
+                    message="Segments déjà lancés, rien à générer",
+                    data={"launched": 0, "provider": provider_name},
+                )
             if not segments:
                 return AgentResult(
                     success=False,
@@ -168,11 +147,21 @@ class VideoAgent(BaseAgent):
             prompt = seg.get_enriched_prompt()
             duration = seg.duration or 6
             
-            result = provider.generate_clip(
-                prompt=prompt,
-                duration=duration,
-                **seg.provider_config
-            )
+            try:
+                launch = router.launch(
+                    prompt=prompt,
+                    duration=duration,
+                    provider_kwargs={seg.provider: seg.provider_config},
+                )
+            except ValueError as e:
+                # Budget épuisé ou durée non supportée
+                seg.status = 'failed'
+                seg.error_message = str(e)
+                seg.save(update_fields=['status', 'error_message'])
+                errors.append(f"Segment {seg.segment_index}: {e}")
+                continue
+            result = launch.result
+            store_payload(result.metadata, launch.provider_name, ProviderPayload.Kind.LAUNCH, job=job, generation=seg)
             
             if result.status == "failed":
                 seg.status = 'failed'
@@ -180,11 +169,12 @@ class VideoAgent(BaseAgent):
                 seg.save(update_fields=['status', 'error_message'])
                 errors.append(f"Segment {seg.segment_index}: {result.error_message}")
             else:
+                seg.provider = launch.provider_name
                 seg.provider_job_id = result.job_id
                 seg.status = 'processing'
                 seg.started_at = timezone.now()
-                seg.cost = provider.estimate_cost(duration)
-                seg.save(update_fields=['provider_job_id', 'status', 'started_at', 'cost'])
+                seg.cost = launch.cost
+                seg.save(update_fields=['provider', 'provider_job_id', 'status', 'started_at', 'cost'])
                 launched += 1
                 total_cost += float(seg.cost)
         
@@ -202,9 +192,14 @@ class VideoAgent(BaseAgent):
         )
     
     def _create_segments_from_script(self, job, provider_name: str):
-        """Crée des VideoSegmentGeneration depuis le script du job."""
+        """
+        Crée des VideoSegmentGeneration depuis le script du job.
+        
+        Les index déjà présents (segments en cours ou terminés) sont conservés
+        tels quels : seuls les manquants sont écrits (unique job/segment_index).
+        """
         import json
-        from marketing.models_extended import VideoSegmentGeneration
+        from marketing.segment_writer import write_segments
         
         # Essayer de parser le script JSON
         try:
@@ -218,18 +213,21 @@ class VideoAgent(BaseAgent):
         if not visual_directions:
             return None
         
-        segments = []
-        for i, direction in enumerate(visual_directions):
-            seg = VideoSegmentGeneration.objects.create(
-                job=job,
-                segment_index=i,
-                segment_name=f"segment_{i}",
-                prompt=direction,
-                provider=provider_name,
-                duration=job.get_config('segment_duration', 6),
-                generation_mode='text_to_video',
-                provider_config=job.get_config('provider_config', {})
-            )
-            segments.append(seg)
-        
-        return segments
+        existing = set(job.generations.values_list('segment_index', flat=True))
+        missing = [i for i in range(len(visual_directions)) if i not in existing]
+        write_segments(job, generations=[
+            {
+                'segment_index': i,
+                'segment_name': f"segment_{i}",
+                'prompt': visual_directions[i],
+                'provider': provider_name,
+                'duration': job.get_config('segment_duration', 6),
+                'generation_mode': 'text_to_video',
+                'provider_config': job.get_config('provider_config', {}),
+            }
+            for i in missing
+        ])
+        
+        return list(
+            job.generations.filter(segment_index__in=missing, status='pending').order_by('segment_index')
+        )
@@ -3,19 +3,23 @@ VoiceAgent — Génère l'audio voix-off via ElevenLabs.
 
 Workflow:
 1. Récupère le texte voiceover du script
-2. Envoie à ElevenLabs TTS
-3. Sauvegarde le .wav/.mp3
+2. Synthèse ElevenLabs par phrases, en parallèle et en cache (ChunkedTTS)
+3. Recolle les morceaux en un .mp3
 4. Met à jour le job avec le chemin audio
 """
 
 import os
-import requests
 from django.conf import settings
+from django.utils import timezone
+from marketing.ai.tts_chunked import ChunkedTTS
 from .base import BaseAgent, AgentResult
 
 
 class VoiceAgent(BaseAgent):
     name = "VoiceAgent"
+    inputs = ('script',)
+    outputs = ('audio',)
+    resource = 'elevenlabs'
     
     # Voix par défaut ElevenLabs
     DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel
@@ -50,54 +54,56 @@ class VoiceAgent(BaseAgent):
         model_id = job.get_config('tts_model', self.DEFAULT_MODEL)
         
         try:
-            # Appel ElevenLabs TTS
-            response = requests.post(
-                f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
-                headers={
-                    "xi-api-key": api_key,
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "text": voiceover_text,
-                    "model_id": model_id,
-                    "voice_settings": {
-                        "stability": 0.5,
-                        "similarity_boost": 0.75,
-                        "style": 0.5,
-                        "use_speaker_boost": True
-                    }
-                },
-                timeout=60
-            )
-            response.raise_for_status()
-            
-            # Sauvegarder l'audio
             output_dir = os.path.join(
                 getattr(settings, 'MEDIA_ROOT', '/tmp'),
                 'marketing', 'audio'
             )
-            os.makedirs(output_dir, exist_ok=True)
-            
             audio_path = os.path.join(output_dir, f"job_{job.id}_voiceover.mp3")
-            with open(audio_path, 'wb') as f:
-                f.write(response.content)
+            
+            # Synthèse par phrases (morceaux déjà en cache non refacturés)
+            tts = ChunkedTTS(
+                api_key,
+                model_id=model_id,
+                voice_settings={
+                    "stability": 0.5,
+                    "similarity_boost": 0.75,
+                    "style": 0.5,
+                    "use_speaker_boost": True
+                },
+            )
+            tts_result = tts.synthesize(voiceover_text, voice_id, audio_path)
             
             # Mettre à jour le job
             job.config = {**job.config, 'audio_path': audio_path}
-            job.status = 'assets_ready'
-            job.save(update_fields=['config', 'status'])
+            job.save(update_fields=['config'])
+            
+            # N'avancer le statut que si la vidéo n'a pas déjà été lancée
+            # en parallèle (exécuteur DAG)
+            type(job).objects.filter(
+                pk=job.pk, status='script_ready'
+            ).update(status='assets_ready', updated_at=timezone.now())
+            job.refresh_from_db(fields=['status'])
             
-            # Estimer coût (~$0.30/1000 chars pour Multilingual v2)
-            cost = len(voiceover_text) * 0.0003
+            # Estimer coût (~$0.30/1000 chars pour Multilingual v2), cache gratuit
+            from marketing.cost_ledger import VOICE_COST_PER_CHAR, record_cost
+            from marketing.models_extended import CostEntry
+            cost = tts_result.billed_characters * VOICE_COST_PER_CHAR
+            record_cost(job, cost, 'elevenlabs', CostEntry.Kind.VOICE)
             
             return AgentResult(
                 success=True,
                 agent_name=self.name,
-                message=f"Audio généré: {len(voiceover_text)} chars → {audio_path}",
+                message=(
+                    f"Audio généré: {len(voiceover_text)} chars → {audio_path} "
+                    f"({tts_result.cached_chunks}/{tts_result.chunks} morceaux en cache)"
+                ),
                 data={
                     "audio_path": audio_path,
                     "text_length": len(voiceover_text),
                     "voice_id": voice_id,
+                    "chunks": tts_result.chunks,
+                    "cached_chunks": tts_result.cached_chunks,
+                    "billed_characters": tts_result.billed_characters,
                 },
                 cost_usd=cost
             )
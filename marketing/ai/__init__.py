@@ -2,7 +2,8 @@
 from .script_generator import ScriptGenerator, generate_script
 from .image_generator import ImageGenerator, generate_image, generate_images_for_script
 from .tts_generator import TTSGenerator, generate_voiceover, generate_voiceover_from_script
-from .video_editor import VideoEditor, create_video, transcribe_audio
+from .video_editor import VideoEditor, create_video, get_video_editor, transcribe_audio
+from .ffmpeg_editor import FFmpegVideoEditor
 
 __all__ = [
     'ScriptGenerator',
@@ -14,6 +15,8 @@ __all__ = [
     'generate_voiceover',
     'generate_voiceover_from_script',
     'VideoEditor',
+    'FFmpegVideoEditor',
+    'get_video_editor',
     'create_video',
     'transcribe_audio',
 ]
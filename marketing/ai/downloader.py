@@ -0,0 +1,254 @@
+"""
+Gestionnaire de téléchargements partagé (vidéos providers, images DALL-E).
+
+- Téléchargements concurrents avec pool de connexions (requests.Session)
+- Gros buffers (1 MB) au lieu de 8 KB
+- Reprise HTTP Range après interruption (fichier .part)
+- Vérification de taille (Content-Length) et checksum SHA-256 optionnel
+- Plafond global de concurrence et de bande passante (toutes instances)
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class DownloadItem:
+    """Un fichier à télécharger"""
+    url: str
+    dest_path: str
+    sha256: Optional[str] = None  # Checksum attendu (optionnel)
+    key: Optional[str] = None     # Clé de retour (défaut: url)
+
+
+class DownloadError(Exception):
+    """Échec définitif d'un téléchargement"""
+    pass
+
+
+def local_clip_path(url: str) -> Optional[str]:
+    """
+    Chemin d'une URL file:// si elle désigne un clip du provider simulé
+    (dossier des clips synthétiques, ou os.devnull), None sinon.
+    """
+    from .video_providers.mock import mock_clips_dir
+
+    path = os.path.realpath(url[len('file://'):])
+    if path == os.path.realpath(os.devnull):
+        return path
+    root = os.path.realpath(mock_clips_dir())
+    return path if path.startswith(root + os.sep) else None
+
+
+class BandwidthLimiter:
+    """Token bucket en octets/seconde, partagé entre threads"""
+
+    def __init__(self, bytes_per_second: int = 0):
+        self.rate = bytes_per_second
+        self.tokens = float(bytes_per_second)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int):
+        """Bloque jusqu'à ce que `amount` octets puissent être consommés"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount or self.tokens >= self.rate:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+
+class DownloadManager:
+    """
+    Télécharge des fichiers en parallèle avec reprise et vérification.
+
+    Usage:
+        manager = get_download_manager()
+        paths = manager.download_many([
+            DownloadItem(url=seg.video_url, dest_path='/tmp/seg_0.mp4'),
+        ])
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        max_bytes_per_second: int = None,
+        max_retries: int = 3,
+        timeout: int = 60,
+    ):
+        self.max_concurrency = max_concurrency or getattr(
+            settings, 'MARKETING_DOWNLOAD_MAX_CONCURRENCY', 6
+        )
+        rate = max_bytes_per_second if max_bytes_per_second is not None else getattr(
+            settings, 'MARKETING_DOWNLOAD_MAX_BYTES_PER_SECOND', 0
+        )
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # Plafonds globaux (partagés par tous les appels de ce manager)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._bandwidth = BandwidthLimiter(rate)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_concurrency,
+            pool_maxsize=self.max_concurrency,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def download(self, url: str, dest_path: str, sha256: str = None) -> str:
+        """
+        Télécharge un fichier (avec reprise Range) et retourne son chemin local.
+
+        Raises:
+            DownloadError: après max_retries tentatives
+        """
+        os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+
+        # Fichier local : uniquement les clips du provider simulé (les URLs
+        # viennent des providers et webhooks, jamais un chemin arbitraire)
+        if url.startswith('file://'):
+            source = local_clip_path(url)
+            if source is None:
+                raise DownloadError(f"URL locale refusée : {url}")
+            try:
+                shutil.copyfile(source, dest_path)
+            except OSError as e:
+                raise DownloadError(f"Échec copie {url}: {e}")
+            return dest_path
+
+        part_path = f"{dest_path}.part"
+        last_error = None
+
+        with self._slots:
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    self._fetch(url, part_path)
+                    if sha256 and self._sha256(part_path) != sha256.lower():
+                        os.remove(part_path)
+                        raise DownloadError(f"Checksum invalide pour {url}")
+                    os.replace(part_path, dest_path)
+                    return dest_path
+                except (requests.exceptions.RequestException, DownloadError, OSError) as e:
+                    last_error = e
+                    logger.warning(f"Téléchargement {url} (essai {attempt}/{self.max_retries}): {e}")
+                    if attempt < self.max_retries:
+                        time.sleep(min(2 ** attempt, 10))
+
+        # Échec définitif : le .part (nom souvent temporaire) ne serait jamais repris
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise DownloadError(f"Échec téléchargement {url}: {last_error}")
+
+    def download_many(self, items: List[DownloadItem]) -> Dict[str, Optional[str]]:
+        """
+        Télécharge plusieurs fichiers en parallèle.
+        Les échecs sont isolés : la clé correspondante vaut None.
+
+        Returns:
+            Dict {key: chemin local ou None}
+        """
+        results = {}
+        if not items:
+            return results
+
+        def run(item):
+            try:
+                return self.download(item.url, item.dest_path, item.sha256)
+            except DownloadError as e:
+                logger.error(str(e))
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = {(item.key or item.url): pool.submit(run, item) for item in items}
+            for key, future in futures.items():
+                results[key] = future.result()
+
+        return results
+
+    def fetch_bytes(self, url: str, timeout: int = None) -> bytes:
+        """Télécharge un petit fichier en mémoire (session poolée)"""
+        with self._slots:
+            response = self.session.get(url, timeout=timeout or self.timeout)
+            response.raise_for_status()
+            self._bandwidth.consume(len(response.content))
+            return response.content
+
+    def _fetch(self, url: str, part_path: str):
+        """Télécharge vers part_path, en reprenant si un .part existe déjà"""
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 416:
+                # Range hors limites : le .part n'est complet que s'il a la
+                # taille annoncée (Content-Range: bytes */<total>)
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                if total.isdigit() and int(total) == offset:
+                    return
+                os.remove(part_path)
+                raise DownloadError(f"Reprise impossible ({offset}/{total or '?'} octets), nouvel essai complet")
+            response.raise_for_status()
+
+            if offset and response.status_code != 206:
+                # Serveur sans support Range : on repart de zéro
+                offset = 0
+
+            expected = response.headers.get('Content-Length')
+            expected = int(expected) + offset if expected else None
+
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    self._bandwidth.consume(len(chunk))
+                    f.write(chunk)
+
+        size = os.path.getsize(part_path)
+        if expected is not None and size != expected:
+            raise DownloadError(f"Téléchargement incomplet ({size}/{expected} octets)")
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+
+# Instance globale (singleton) : les plafonds s'appliquent à tout le process
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_download_manager() -> DownloadManager:
+    """Retourne l'instance globale du DownloadManager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DownloadManager()
+    return _manager
@@ -0,0 +1,263 @@
+"""
+Montage vidéo (diaporama) 100% FFmpeg.
+
+Alternative à VideoEditor (MoviePy) avec la même signature
+`create_video_from_images` : aucune frame ne transite par Python/numpy,
+les sous-titres sont rendus par libass (ASS) au lieu d'ImageMagick.
+
+Filtres utilisés :
+- loop / zoompan : image fixe ou effet Ken Burns
+- xfade           : transitions entre images
+- ass             : sous-titres incrustés
+"""
+
+import os
+import subprocess
+
+
+class FFmpegVideoEditor:
+    """Montage vidéo automatique pour Reels/TikTok (backend FFmpeg)"""
+
+    def __init__(self, ken_burns: bool = False, preset: str = 'medium', threads: int = 4):
+        """
+        Args:
+            ken_burns: Zoom lent sur chaque image (zoompan) au lieu d'une image fixe
+            preset: Preset libx264
+            threads: Threads d'encodage
+        """
+        # Format vertical pour Reels/TikTok (9:16)
+        self.width = 1080
+        self.height = 1920
+        self.fps = 30
+        self.ken_burns = ken_burns
+        self.preset = preset
+        self.threads = threads
+
+        # Style sous-titres (équivalent du rendu MoviePy)
+        self.subtitle_font = 'Arial'
+        self.subtitle_fontsize = 60
+        self.subtitle_margin = 50
+
+    def create_video_from_images(
+        self,
+        image_paths: list,
+        audio_path: str,
+        output_path: str,
+        subtitles: list = None,
+        transition_duration: float = 0.5
+    ):
+        """
+        Crée une vidéo à partir d'images et d'un audio
+
+        Args:
+            image_paths: Liste de chemins d'images
+            audio_path: Chemin du fichier audio (voix-off)
+            output_path: Chemin de sauvegarde de la vidéo
+            subtitles: Liste de dicts {'text': ..., 'start': ..., 'duration': ...}
+            transition_duration: Durée des transitions entre images (secondes)
+        """
+        if not image_paths:
+            raise ValueError("Aucune image fournie")
+
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Fichier audio introuvable : {audio_path}")
+
+        images = []
+        for img_path in image_paths:
+            if os.path.exists(img_path):
+                images.append(img_path)
+            else:
+                print(f"⚠️ Image ignorée (introuvable) : {img_path}")
+
+        if not images:
+            raise ValueError("Aucun clip d'image valide créé")
+
+        total_duration = probe_duration(audio_path)
+
+        print(f"🎬 Durée audio : {total_duration:.2f}s")
+        print(f"🖼️ Nombre d'images : {len(images)}")
+
+        # Avec xfade les clips se chevauchent : on allonge chaque clip pour
+        # que la durée totale reste égale à celle de l'audio
+        count = len(images)
+        transition = transition_duration if count > 1 else 0
+        transition = min(transition, total_duration / count / 2)
+        clip_duration = (total_duration + (count - 1) * transition) / count
+
+        cmd = ['ffmpeg', '-y']
+        for img_path in images:
+            if self.ken_burns:
+                cmd += ['-i', img_path]
+            else:
+                cmd += ['-loop', '1', '-framerate', str(self.fps),
+                        '-t', f'{clip_duration:.3f}', '-i', img_path]
+        cmd += ['-i', audio_path]
+
+        filter_graph = self._build_filter_graph(count, clip_duration, transition)
+
+        ass_path = None
+        if subtitles:
+            ass_path = f"{os.path.splitext(output_path)[0]}.ass"
+            self.write_ass(subtitles, ass_path)
+            filter_graph += f";[vout]ass={_escape_filter_path(ass_path)}[vsub]"
+            video_label = '[vsub]'
+        else:
+            video_label = '[vout]'
+
+        cmd += [
+            '-filter_complex', filter_graph,
+            '-map', video_label, '-map', f'{count}:a',
+            '-c:v', 'libx264', '-preset', self.preset, '-pix_fmt', 'yuv420p',
+            '-r', str(self.fps), '-threads', str(self.threads),
+            '-c:a', 'aac',
+            '-t', f'{total_duration:.3f}',
+            '-movflags', '+faststart',
+            output_path
+        ]
+
+        print(f"💾 Export vidéo vers {output_path}...")
+        result = subprocess.run(cmd, capture_output=True, text=True)
+
+        if ass_path and os.path.exists(ass_path):
+            os.remove(ass_path)
+
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg a échoué : {result.stderr[-1000:]}")
+
+        print(f"✅ Vidéo créée : {output_path}")
+
+        file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        return {
+            'duration': total_duration,
+            'file_size_mb': round(file_size_mb, 2),
+            'resolution': f"{self.width}x{self.height}",
+            'fps': self.fps
+        }
+
+    def create_simple_video(
+        self,
+        image_paths: list,
+        audio_path: str,
+        output_path: str
+    ):
+        """Version simplifiée sans sous-titres"""
+        return self.create_video_from_images(
+            image_paths,
+            audio_path,
+            output_path,
+            subtitles=None
+        )
+
+    def _build_filter_graph(self, count: int, clip_duration: float, transition: float) -> str:
+        """
+        Construit le filtergraph : normalisation 9:16 de chaque image,
+        puis chaîne xfade (ou concat si pas de transition).
+        """
+        w, h, fps = self.width, self.height, self.fps
+        frames = max(1, round(clip_duration * fps))
+        parts = []
+
+        for i in range(count):
+            # Même cadrage que MoviePy : hauteur 1920, crop centré si trop
+            # large, bandes noires si trop étroit
+            chain = (
+                f"[{i}:v]scale=-2:{h},crop='min(iw,{w})':{h},"
+                f"pad={w}:{h}:(ow-iw)/2:0:black,setsar=1"
+            )
+            if self.ken_burns:
+                chain += (
+                    f",zoompan=z='min(zoom+0.0008,1.15)':d={frames}"
+                    f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={w}x{h}:fps={fps}"
+                )
+            else:
+                chain += f",fps={fps}"
+            chain += f",format=yuv420p[v{i}]"
+            parts.append(chain)
+
+        if count == 1:
+            parts.append("[v0]null[vout]")
+        elif transition > 0:
+            previous = "[v0]"
+            for i in range(1, count):
+                offset = i * (clip_duration - transition)
+                label = "[vout]" if i == count - 1 else f"[x{i}]"
+                parts.append(
+                    f"{previous}[v{i}]xfade=transition=fade:"
+                    f"duration={transition:.3f}:offset={offset:.3f}{label}"
+                )
+                previous = label
+        else:
+            inputs = ''.join(f"[v{i}]" for i in range(count))
+            parts.append(f"{inputs}concat=n={count}:v=1:a=0[vout]")
+
+        return ';'.join(parts)
+
+    def write_ass(self, subtitles: list, ass_path: str):
+        """
+        Écrit un fichier ASS (texte blanc, fond noir, centré).
+
+        Args:
+            subtitles: Liste de dicts {'text': ..., 'start': ..., 'duration': ...}
+            ass_path: Chemin du fichier .ass
+        """
+        header = (
+            "[Script Info]\n"
+            "ScriptType: v4.00+\n"
+            f"PlayResX: {self.width}\n"
+            f"PlayResY: {self.height}\n"
+            "WrapStyle: 0\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+            "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
+            "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            f"Style: Default,{self.subtitle_font},{self.subtitle_fontsize},"
+            "&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,-1,0,0,0,"
+            f"100,100,0,0,3,8,0,5,{self.subtitle_margin},{self.subtitle_margin},0,1\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
+
+        lines = [header]
+        for sub in subtitles:
+            start = sub['start']
+            end = start + sub['duration']
+            text = str(sub['text']).replace('\n', '\\N').replace('{', '(').replace('}', ')')
+            lines.append(
+                f"Dialogue: 0,{format_ass_time(start)},{format_ass_time(end)},"
+                f"Default,,0,0,0,,{text}\n"
+            )
+
+        with open(ass_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+
+
+def probe_duration(path: str) -> float:
+    """Durée d'un fichier média en secondes (ffprobe)"""
+    result = subprocess.run(
+        [
+            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1', path
+        ],
+        capture_output=True, text=True, timeout=30
+    )
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(f"ffprobe impossible sur {path}: {result.stderr.strip()}")
+    return float(result.stdout.strip())
+
+
+def format_ass_time(seconds: float) -> str:
+    """Convertit secondes en format ASS (H:MM:SS.cc)"""
+    centis = int(round(seconds * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def _escape_filter_path(path: str) -> str:
+    """Échappe un chemin pour l'utiliser comme argument de filtre FFmpeg"""
+    escaped = path.replace('\\', '\\\\').replace(':', '\\:').replace("'", "\\'")
+    return f"'{escaped}'"
@@ -0,0 +1,284 @@
+"""
+Cache des clips générés (opt-in).
+
+Relancer un job ou régénérer un segment avec le même prompt enrichi
+repayait le provider. Le cache associe une clé
+
+    sha256(provider, modèle, prompt enrichi, durée, ratio, résolution)
+
+à une copie du clip dans MinIO, et la réutilise au lieu d'appeler
+generate_clip. Le coût évité est cumulé sur le job (cache_savings).
+
+Activation :
+- globale : MARKETING_GENERATION_CACHE_ENABLED = True
+- par job : job.config['generation_cache'] = True / False
+
+Validité : MARKETING_GENERATION_CACHE_TTL secondes (0 = sans expiration),
+invalidation manuelle via `python manage.py generation_cache invalidate`
+ou l'action admin.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(
+    provider: str,
+    model: str,
+    prompt: str,
+    duration: int,
+    aspect_ratio: str,
+    resolution: str,
+) -> str:
+    """Clé de cache d'une génération (ordre et types stables)"""
+    payload = json.dumps(
+        [provider, model or '', prompt.strip(), int(duration), aspect_ratio or '', resolution or ''],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_enabled(job=None) -> bool:
+    """Cache actif pour ce job (config du job, sinon settings)"""
+    default = getattr(settings, 'MARKETING_GENERATION_CACHE_ENABLED', False)
+    if job is None:
+        return default
+    return bool(job.get_config('generation_cache', default))
+
+
+def is_cacheable(segment) -> bool:
+    """Seuls les clips text-to-video sans asset de référence sont réutilisables"""
+    from marketing.models_extended import VideoGenerationMode
+
+    return (
+        segment.source_type == 'ai_generated'
+        and segment.generation_mode == VideoGenerationMode.TEXT_TO_VIDEO
+        and not segment.reference_asset_id
+    )
+
+
+class GenerationCache:
+    """
+    Index (table GeneratedClip) + stockage MinIO des clips générés.
+
+    Usage:
+        cache = get_generation_cache()
+        key = cache.key_for(provider, prompt, duration=6, aspect_ratio='9:16')
+        entry = cache.lookup(key)
+        if entry:
+            cache.record_hit(entry, job=job)
+    """
+
+    def __init__(self, ttl: int = None, prefix: str = None):
+        self.ttl = ttl if ttl is not None else getattr(
+            settings, 'MARKETING_GENERATION_CACHE_TTL', 30 * 24 * 3600
+        )
+        self.prefix = prefix or getattr(settings, 'MARKETING_GENERATION_CACHE_PREFIX', 'generation-cache')
+
+    # ------------------------------------------------------------------
+    # Clés
+    # ------------------------------------------------------------------
+
+    def key_for(
+        self,
+        provider,
+        prompt: str,
+        duration: int,
+        aspect_ratio: str = '9:16',
+        provider_kwargs: dict = None,
+    ) -> str:
+        """Clé pour une instance de VideoProvider et ses paramètres"""
+        params = provider.generation_params(**(provider_kwargs or {}))
+        return cache_key(
+            provider.get_provider_name(),
+            params['model'],
+            prompt,
+            duration,
+            aspect_ratio,
+            params['resolution'],
+        )
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def _valid(self):
+        from marketing.models_extended import GeneratedClip
+
+        return GeneratedClip.objects.filter(invalidated=False).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+        )
+
+    def lookup(self, key: str):
+        """Entrée valide pour cette clé, ou None"""
+        return self._valid().filter(cache_key=key).first()
+
+    def lookup_many(self, keys) -> Dict[str, object]:
+        """Entrées valides pour plusieurs clés, en une requête"""
+        keys = [k for k in keys if k]
+        if not keys:
+            return {}
+        return {entry.cache_key: entry for entry in self._valid().filter(cache_key__in=keys)}
+
+    def record_hit(self, entry, job=None) -> Decimal:
+        """
+        Comptabilise une réutilisation : hits et économies sur l'entrée,
+        coût évité sur le job.
+
+        Returns:
+            Coût évité ($)
+        """
+        from marketing.models_extended import GeneratedClip, VideoProductionJob
+
+        saved = entry.cost or Decimal('0')
+        now = timezone.now()
+
+        GeneratedClip.objects.filter(pk=entry.pk).update(
+            hits=F('hits') + 1,
+            saved_cost=F('saved_cost') + saved,
+            last_used_at=now,
+        )
+        if job is not None and job.pk:
+            VideoProductionJob.objects.filter(pk=job.pk).update(
+                cache_savings=F('cache_savings') + saved,
+                updated_at=now,
+            )
+            # Garde l'instance cohérente (les save() complets suivants)
+            job.cache_savings = (job.cache_savings or Decimal('0')) + saved
+        return saved
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def object_name(self, key: str) -> str:
+        return f"{self.prefix}/{key[:2]}/{key}.mp4"
+
+    def store(
+        self,
+        key: str,
+        video_url: str,
+        provider: str,
+        prompt: str,
+        duration: int,
+        aspect_ratio: str = '9:16',
+        model: str = '',
+        resolution: str = '',
+        cost=0,
+        source_generation=None,
+    ):
+        """
+        Copie un clip terminé dans MinIO et l'indexe (remplace une entrée
+        invalidée ou expirée de même clé).
+
+        Returns:
+            GeneratedClip, ou None si la copie a échoué
+        """
+        from marketing.models_extended import GeneratedClip
+        from marketing.storage import get_storage
+        from .downloader import get_download_manager
+
+        existing = self.lookup(key)
+        if existing:
+            return existing
+
+        fd, tmp_path = tempfile.mkstemp(suffix='.mp4')
+        os.close(fd)
+        try:
+            get_download_manager().download(video_url, tmp_path)
+            object_name = self.object_name(key)
+            url = get_storage().upload_file(tmp_path, object_name)
+        except Exception as e:
+            logger.warning(f"Cache génération: copie du clip impossible ({e})")
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        entry, _created = GeneratedClip.objects.update_or_create(
+            cache_key=key,
+            defaults={
+                'provider': provider,
+                'model': model or '',
+                'resolution': resolution or '',
+                'duration': duration,
+                'aspect_ratio': aspect_ratio,
+                'prompt': prompt,
+                'object_name': object_name,
+                'url': url,
+                'cost': cost or 0,
+                'source_generation': source_generation,
+                'invalidated': False,
+                'expires_at': timezone.now() + timedelta(seconds=self.ttl) if self.ttl else None,
+            },
+        )
+        return entry
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self, queryset=None, purge: bool = False) -> int:
+        """
+        Invalide des entrées (toutes par défaut).
+
+        Args:
+            queryset: Entrées GeneratedClip à invalider
+            purge: Supprimer aussi les objets MinIO et les lignes
+
+        Returns:
+            Nombre d'entrées invalidées
+        """
+        from marketing.models_extended import GeneratedClip
+
+        if queryset is None:
+            queryset = GeneratedClip.objects.all()
+
+        if not purge:
+            return queryset.filter(invalidated=False).update(invalidated=True)
+
+        from marketing.storage import get_storage
+
+        storage = get_storage()
+        count = 0
+        for entry in queryset.only('pk', 'object_name'):
+            try:
+                storage.delete_file(entry.object_name)
+            except Exception as e:
+                logger.warning(f"Cache génération: suppression de {entry.object_name} impossible ({e})")
+            count += 1
+        queryset.delete()
+        return count
+
+    def expired(self):
+        """Entrées expirées ou invalidées (candidates à la purge)"""
+        from marketing.models_extended import GeneratedClip
+
+        return GeneratedClip.objects.filter(
+            Q(invalidated=True) | Q(expires_at__lte=timezone.now())
+        )
+
+
+# Instance globale (singleton)
+_generation_cache = None
+
+
+def get_generation_cache() -> GenerationCache:
+    """Retourne l'instance globale du cache de génération"""
+    global _generation_cache
+    if _generation_cache is None:
+        _generation_cache = GenerationCache()
+    return _generation_cache
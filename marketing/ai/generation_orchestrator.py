@@ -3,12 +3,16 @@ Orchestrateur de génération vidéo.
 Lance et gère la génération de tous les segments d'un job.
 """
 
-import os
 import time
 from django.conf import settings
-from ..models_extended import VideoProductionJob, VideoSegmentGeneration
-from .video_providers.luma import LumaProvider
+from django.utils import timezone
+from ..cost_ledger import record_segment_cost
+from ..models_extended import ProviderPayload, VideoProductionJob, VideoSegmentGeneration
+from ..payloads import store_payload
+from .video_providers import get_provider
 from .video_providers.base import VideoGenerationResult
+from .video_providers.router import ProviderRouter, record_outcome
+from . import generation_cache
 
 
 class GenerationOrchestrator:
@@ -21,23 +25,16 @@ class GenerationOrchestrator:
     
     def __init__(self, job: VideoProductionJob):
         self.job = job
-        self.provider = self._get_provider()
+        # Choix du provider par segment (coût, latence, échecs, budget)
+        self.router = ProviderRouter(job=job)
+        self._providers = dict(self.router.providers)
+        self.use_cache = generation_cache.is_enabled(job)
     
-    def _get_provider(self):
-        """Initialise le provider selon la config du job"""
-        provider_name = self.job.get_config('provider', 'luma')
-        
-        if provider_name == 'luma':
-            api_key = os.environ.get('LUMA_API_KEY')
-            if not api_key:
-                raise ValueError("LUMA_API_KEY not found in environment")
-            return LumaProvider(api_key)
-        
-        # Ajouter d'autres providers ici
-        # elif provider_name == 'runway':
-        #     return RunwayProvider(...)
-        
-        raise ValueError(f"Unknown provider: {provider_name}")
+    def _get_provider(self, provider_name: str):
+        """Provider d'un segment déjà lancé (pour le polling)"""
+        if provider_name not in self._providers:
+            self._providers[provider_name] = get_provider(provider_name)
+        return self._providers[provider_name]
     
     def start_generation(self):
         """
@@ -57,7 +54,8 @@ class GenerationOrchestrator:
         # Update job status
         self.job.status = VideoProductionJob.Status.VIDEO_PENDING
         self.job.current_step = f"Génération de {segments.count()} segments..."
-        self.job.save()
+        # Pas de save() complet : actual_cost est incrémenté en base par le ledger
+        self.job.save(update_fields=['status', 'updated_at'])
         
         # Lancer tous les segments
         for segment in segments:
@@ -78,7 +76,7 @@ class GenerationOrchestrator:
             segment.save()
             
             # Skip les segments uploadés (pas besoin de génération IA)
-            if segment.source_type == 'uploaded_clip' and segment.uploaded_clip:
+            if segment.source_type == 'uploaded_clip' and (segment.uploaded_clip or segment.video_url):
                 segment.status = VideoSegmentGeneration.Status.COMPLETED
                 segment.save()
                 print(f"✓ Segment {segment.segment_index} = clip uploadé, skip IA")
@@ -87,12 +85,20 @@ class GenerationOrchestrator:
             # Utiliser le prompt enrichi (cohérence personnage/scène)
             enriched_prompt = segment.get_enriched_prompt()
             
-            # Appel provider
-            result = self.provider.generate_clip(
+            # Clip identique déjà généré : pas de nouvel appel provider
+            if self._reuse_cached_clip(segment, enriched_prompt):
+                return
+            
+            # Appel provider (routé, avec bascule automatique)
+            requested_provider = segment.provider
+            launch = self.router.launch(
                 prompt=enriched_prompt,
                 duration=segment.duration,
                 aspect_ratio=segment.aspect_ratio,
+                provider_kwargs={segment.provider: segment.provider_config or {}},
             )
+            result = launch.result
+            store_payload(result.metadata, launch.provider_name, ProviderPayload.Kind.LAUNCH, job=self.job, generation=segment)
             
             if result.status == "failed":
                 segment.status = VideoSegmentGeneration.Status.FAILED
@@ -100,12 +106,32 @@ class GenerationOrchestrator:
                 segment.save()
                 return
             
-            # Sauvegarder job_id
+            # Sauvegarder job_id et provider effectivement utilisé
+            segment.provider = launch.provider_name
             segment.provider_job_id = result.job_id
+            segment.cost = launch.cost
+            segment.started_at = timezone.now()
+            segment.provider_metadata = {
+                **(segment.provider_metadata or {}),
+                'routing': {
+                    'attempts': launch.attempts,
+                    'generated_duration': launch.duration,
+                },
+            }
+            if self.use_cache and generation_cache.is_cacheable(segment):
+                provider = self._get_provider(launch.provider_name)
+                kwargs = (segment.provider_config or {}) if launch.provider_name == requested_provider else {}
+                segment.provider_metadata['generation_cache'] = {
+                    'key': generation_cache.get_generation_cache().key_for(
+                        provider, enriched_prompt, launch.duration, segment.aspect_ratio, kwargs
+                    ),
+                    'duration': launch.duration,
+                    **provider.generation_params(**kwargs),
+                }
             segment.save()
             
             # Log
-            print(f"✓ Segment {segment.segment_index} lancé: {result.job_id}")
+            print(f"✓ Segment {segment.segment_index} lancé sur {launch.provider_name}: {result.job_id}")
             
         except Exception as e:
             segment.status = VideoSegmentGeneration.Status.FAILED
@@ -135,25 +161,46 @@ class GenerationOrchestrator:
             'processing': 0
         }
         
+        # Un appel groupé par provider au lieu d'un GET par segment
+        results = self._fetch_statuses(segments)
+        
         for segment in segments:
             if not segment.provider_job_id:
                 continue
             
             try:
-                result = self.provider.get_status(segment.provider_job_id)
+                provider = self._get_provider(segment.provider)
+                result = results.get((segment.provider, segment.provider_job_id))
+                if result is None:
+                    # Erreur transitoire de l'appel groupé : on repollera
+                    print(f"⚠ Statut non disponible pour le segment {segment.segment_index}")
+                    stats['processing'] += 1
+                    continue
+                if result.status in ("completed", "failed"):
+                    store_payload(result.metadata, segment.provider, ProviderPayload.Kind.STATUS, job=self.job, generation=segment)
                 
                 if result.status == "completed":
-                    segment.status = VideoSegmentGeneration.Status.COMPLETED
-                    segment.video_url = result.video_url
-                    segment.cost = self.provider.estimate_cost(segment.duration)
-                    segment.save()
+                    if not self._finish_segment(
+                        segment,
+                        status=VideoSegmentGeneration.Status.COMPLETED,
+                        video_url=result.video_url,
+                        cost=segment.cost or provider.estimate_cost(segment.duration),
+                    ):
+                        continue  # Déjà terminé par un poll concurrent : ne pas refacturer
+                    record_segment_cost(segment, job=self.job)
+                    self._record_outcome(segment, failed=False)
+                    self._store_in_cache(segment)
                     stats['completed'] += 1
                     print(f"✓ Segment {segment.segment_index} terminé: {result.video_url}")
                 
                 elif result.status == "failed":
-                    segment.status = VideoSegmentGeneration.Status.FAILED
-                    segment.error_message = result.error_message
-                    segment.save()
+                    if not self._finish_segment(
+                        segment,
+                        status=VideoSegmentGeneration.Status.FAILED,
+                        error_message=result.error_message,
+                    ):
+                        continue
+                    self._record_outcome(segment, failed=True)
                     stats['failed'] += 1
                     print(f"✗ Segment {segment.segment_index} échoué: {result.error_message}")
                 
@@ -161,14 +208,137 @@ class GenerationOrchestrator:
                     stats['processing'] += 1
                 
             except Exception as e:
+                # Le segment n'a pas changé d'état en base : toujours en cours
                 print(f"⚠ Erreur polling segment {segment.segment_index}: {e}")
-                stats['failed'] += 1
+                stats['processing'] += 1
         
         # Update job status si tout est terminé
         self._update_job_status()
         
         return stats
     
+    def _finish_segment(self, segment: VideoSegmentGeneration, **fields) -> bool:
+        """
+        Passe un segment en cours à un état terminal, une seule fois.
+        
+        Mise à jour conditionnelle sur le statut : si deux polls (worker,
+        webhook, vue) voient le même résultat, un seul gagne.
+        
+        Returns:
+            bool: True si ce poll a effectué la transition
+        """
+        fields['completed_at'] = timezone.now()
+        updated = VideoSegmentGeneration.objects.filter(
+            pk=segment.pk,
+            status__in=[
+                VideoSegmentGeneration.Status.PENDING,
+                VideoSegmentGeneration.Status.PROCESSING
+            ]
+        ).update(**fields)
+        if not updated:
+            return False
+        for name, value in fields.items():
+            setattr(segment, name, value)
+        return True
+    
+    def _fetch_statuses(self, segments) -> dict:
+        """
+        Statuts de tous les segments lancés, groupés par provider.
+        
+        Returns:
+            Dict {(provider, provider_job_id): VideoGenerationResult}
+        """
+        by_provider = {}
+        for segment in segments:
+            if segment.provider_job_id:
+                by_provider.setdefault(segment.provider, []).append(segment.provider_job_id)
+        
+        results = {}
+        for provider_name, job_ids in by_provider.items():
+            try:
+                statuses = self._get_provider(provider_name).get_status_many(job_ids)
+            except Exception as e:
+                print(f"⚠ Erreur polling {provider_name}: {e}")
+                continue
+            for job_id, result in statuses.items():
+                results[(provider_name, job_id)] = result
+        
+        return results
+    
+    def _reuse_cached_clip(self, segment: VideoSegmentGeneration, enriched_prompt: str) -> bool:
+        """
+        Cherche un clip identique (provider, modèle, prompt, durée, ratio,
+        résolution) dans le cache de génération, pour chaque provider
+        candidat. Si trouvé, le segment est terminé sans appel API.
+        
+        Returns:
+            bool: True si le segment a été servi par le cache
+        """
+        if not self.use_cache or not generation_cache.is_cacheable(segment):
+            return False
+        
+        cache = generation_cache.get_generation_cache()
+        keys = {}
+        for name, provider in self.router.providers.items():
+            duration = provider.snap_duration(segment.duration)
+            if duration is None:
+                continue
+            kwargs = (segment.provider_config or {}) if name == segment.provider else {}
+            keys[cache.key_for(provider, enriched_prompt, duration, segment.aspect_ratio, kwargs)] = name
+        
+        entries = cache.lookup_many(keys)
+        if not entries:
+            return False
+        
+        # Ordre des candidats du router (provider demandé d'abord)
+        key = next(k for k in keys if k in entries)
+        entry = entries[key]
+        saved = cache.record_hit(entry, job=self.job)
+        
+        now = timezone.now()
+        segment.status = VideoSegmentGeneration.Status.COMPLETED
+        segment.provider = keys[key]
+        segment.provider_job_id = ''
+        segment.video_url = entry.url
+        segment.cost = 0
+        segment.started_at = now
+        segment.completed_at = now
+        segment.error_message = ''
+        segment.provider_metadata = {
+            **(segment.provider_metadata or {}),
+            'cache_hit': {'key': key, 'saved_cost': float(saved)},
+        }
+        segment.save()
+        
+        print(f"♻️ Segment {segment.segment_index} servi par le cache ({keys[key]}, ${saved} évités)")
+        return True
+    
+    def _store_in_cache(self, segment: VideoSegmentGeneration):
+        """Copie un clip terminé dans le cache de génération (si activé)"""
+        params = (segment.provider_metadata or {}).get('generation_cache')
+        if not self.use_cache or not params or not segment.video_url:
+            return
+        
+        generation_cache.get_generation_cache().store(
+            params['key'],
+            segment.video_url,
+            provider=segment.provider,
+            prompt=segment.get_enriched_prompt(),
+            duration=params['duration'],
+            aspect_ratio=segment.aspect_ratio,
+            model=params.get('model', ''),
+            resolution=params.get('resolution', ''),
+            cost=segment.cost,
+            source_generation=segment,
+        )
+    
+    def _record_outcome(self, segment: VideoSegmentGeneration, failed: bool):
+        """Alimente les statistiques de latence/échec du router"""
+        latency = None
+        if segment.started_at and segment.completed_at:
+            latency = (segment.completed_at - segment.started_at).total_seconds()
+        record_outcome(segment.provider, failed=failed, latency=latency)
+    
     def _update_job_status(self):
         """Met à jour le status global du job selon l'état des segments"""
         total = self.job.generations.count()
@@ -189,7 +359,7 @@ class GenerationOrchestrator:
             self.job.status = VideoProductionJob.Status.VIDEO_PENDING
             self.job.current_step = f"⏳ {completed}/{total} segments générés"
         
-        self.job.save()
+        self.job.save(update_fields=['status', 'updated_at'])
     
     def wait_for_completion(self, max_wait: int = 600, poll_interval: int = 10):
         """
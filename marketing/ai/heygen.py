@@ -15,6 +15,8 @@ import time
 from typing import Optional, Dict
 from dataclasses import dataclass
 
+from .rate_governor import governed
+
 
 @dataclass
 class HeyGenResult:
@@ -43,6 +45,7 @@ class HeyGenProvider:
             "Content-Type": "application/json"
         }
     
+    @governed('heygen')
     def generate_talking_video(
         self,
         audio_url: str = None,
@@ -52,6 +55,7 @@ class HeyGenProvider:
         avatar_id: str = None,
         background: str = None,
         aspect_ratio: str = "9:16",
+        callback_id: str = None,
     ) -> HeyGenResult:
         """
         Génère une vidéo avatar parlant.
@@ -68,6 +72,7 @@ class HeyGenProvider:
             avatar_id: ID avatar (override instance default)
             background: URL ou couleur de fond
             aspect_ratio: "9:16" (portrait) ou "16:9" (paysage)
+            callback_id: Identifiant renvoyé tel quel par le webhook (ex: ID du job)
         """
         avatar_id = avatar_id or self.avatar_id
         
@@ -121,6 +126,9 @@ class HeyGenProvider:
                 error_message="Fournir audio_url OU (text + voice_id)"
             )
         
+        if callback_id:
+            payload["callback_id"] = callback_id
+        
         try:
             response = requests.post(
                 f"{self.BASE_URL}/v2/video/generate",
@@ -160,6 +168,7 @@ class HeyGenProvider:
                 error_message=f"HeyGen API error: {e} {error_detail}"
             )
     
+    @governed('heygen')
     def get_status(self, video_id: str) -> HeyGenResult:
         """Vérifie le statut d'une génération vidéo."""
         try:
@@ -232,7 +241,12 @@ class HeyGenProvider:
         max_wait: int = 600,
         poll_interval: int = 15
     ) -> HeyGenResult:
-        """Attend la fin de la génération (1-5 min typiquement)."""
+        """
+        Attend la fin de la génération (1-5 min typiquement).
+        
+        Bloquant : réservé aux scripts et au debug. Le pipeline utilise
+        HeyGenTracker (marketing/ai/heygen_tracker.py), non bloquant.
+        """
         start_time = time.time()
         
         while time.time() - start_time < max_wait:
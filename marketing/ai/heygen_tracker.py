@@ -0,0 +1,304 @@
+"""
+Suivi asynchrone des vidéos avatar HeyGen.
+
+Remplace l'attente bloquante (HeyGenProvider.wait_for_completion) :
+
+1. submit()   : upload de l'audio, lancement HeyGen, job en video_pending,
+                premier poll planifié dans la file de tâches ('heygen.poll')
+2. poll()     : un seul appel de statut ; si la vidéo n'est pas prête, le
+                poll suivant est replanifié avec un délai croissant
+3. complete() : téléchargement de la vidéo, job en video_ready (QA)
+
+Le webhook HeyGen (avatar_video.success / avatar_video.fail) met
+complete() en file ('heygen.complete') ou appelle fail() ; les polls
+planifiés servent alors de filet de sécurité. `poll_video_generations` (cron) poll aussi les jobs
+avatar dont l'échéance est passée.
+
+L'état est conservé dans job.config['heygen'].
+"""
+
+import logging
+import math
+import os
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from marketing.cost_ledger import record_cost
+from marketing.models_extended import CostEntry, ProviderPayload, VideoProductionJob
+from marketing.payloads import store_payload
+
+from .downloader import DownloadError, get_download_manager
+from .heygen import HeyGenProvider, HeyGenResult
+
+logger = logging.getLogger(__name__)
+
+TASK_NAME = 'heygen.poll'
+
+
+def poll_delay(polls: int) -> float:
+    """Délai avant le poll suivant : initial × 1.5^n, plafonné"""
+    initial = getattr(settings, 'MARKETING_HEYGEN_POLL_INITIAL', 30)
+    cap = getattr(settings, 'MARKETING_HEYGEN_POLL_MAX', 300)
+    return min(cap, initial * (1.5 ** polls))
+
+
+def _downloading(state: dict) -> bool:
+    """Téléchargement en cours (une réservation de plus de 10 min est abandonnée)"""
+    started = parse_datetime(state.get('downloading_at') or '')
+    return (
+        state.get('status') == 'downloading'
+        and started is not None
+        and (timezone.now() - started).total_seconds() < 600
+    )
+
+
+def find_job(video_id: str) -> Optional[VideoProductionJob]:
+    """Job associé à une vidéo HeyGen"""
+    return VideoProductionJob.objects.filter(config__heygen_video_id=video_id).first()
+
+
+class HeyGenTracker:
+    """
+    Cycle de vie d'une vidéo avatar HeyGen pour un job.
+
+    Usage:
+        tracker = HeyGenTracker(job)
+        tracker.submit()          # retourne immédiatement
+        # ... puis tâche 'heygen.poll', cron ou webhook
+    """
+
+    def __init__(self, job: VideoProductionJob, provider: HeyGenProvider = None):
+        self.job = job
+        self.provider = provider or HeyGenProvider(
+            api_key=getattr(settings, 'HEYGEN_API_KEY', None),
+            avatar_id=job.get_config('avatar_id') or getattr(settings, 'HEYGEN_AVATAR_ID', None),
+        )
+
+    # ------------------------------------------------------------------
+    # État
+    # ------------------------------------------------------------------
+
+    @property
+    def state(self) -> dict:
+        return self.job.config.get('heygen', {})
+
+    def _save_state(self, **changes):
+        """Fusionne les changements dans job.config['heygen'] (ligne verrouillée)"""
+        with transaction.atomic():
+            job = VideoProductionJob.objects.select_for_update().get(pk=self.job.pk)
+            state = {**job.config.get('heygen', {}), **changes}
+            job.config = {**job.config, 'heygen': state}
+            job.save(update_fields=['config', 'updated_at'])
+        self.job.config = job.config
+        return state
+
+    def is_due(self) -> bool:
+        """Vrai si le prochain poll planifié est échu"""
+        next_poll = parse_datetime(self.state.get('next_poll_at') or '')
+        return next_poll is None or next_poll <= timezone.now()
+
+    # ------------------------------------------------------------------
+    # Lancement
+    # ------------------------------------------------------------------
+
+    def submit(self) -> HeyGenResult:
+        """Lance la génération (audio du job ou TTS HeyGen) sans attendre"""
+        audio_path = self.job.get_config('audio_path')
+
+        if audio_path:
+            audio_url = self.provider.upload_audio(audio_path)
+            if not audio_url:
+                return HeyGenResult(job_id='', status='failed', error_message="Échec upload audio vers HeyGen")
+            result = self.provider.generate_talking_video(
+                audio_url=audio_url,
+                background=self.job.get_config('background'),
+                aspect_ratio=self.job.get_config('aspect_ratio', '9:16'),
+                callback_id=str(self.job.pk),
+            )
+        else:
+            # Mode TTS direct HeyGen (fallback)
+            from marketing.agents.voice_agent import VoiceAgent
+
+            voice_id = self.job.get_config('voice_id')
+            if not voice_id:
+                return HeyGenResult(job_id='', status='failed', error_message="voice_id requis pour mode TTS HeyGen")
+            result = self.provider.generate_talking_video(
+                text=VoiceAgent()._extract_voiceover(self.job),
+                voice_id=voice_id,
+                aspect_ratio=self.job.get_config('aspect_ratio', '9:16'),
+                callback_id=str(self.job.pk),
+            )
+
+        store_payload(result.metadata, 'heygen', ProviderPayload.Kind.LAUNCH, job=self.job)
+        if result.status == 'failed':
+            return result
+
+        now = timezone.now()
+        self.job.config = {
+            **self.job.config,
+            'heygen_video_id': result.job_id,
+            'video_provider': 'heygen',
+            'heygen': {
+                'video_id': result.job_id,
+                'status': 'pending',
+                'submitted_at': now.isoformat(),
+                'polls': 0,
+                'next_poll_at': (now + timedelta(seconds=poll_delay(0))).isoformat(),
+            },
+        }
+        self.job.status = VideoProductionJob.Status.VIDEO_PENDING
+        self.job.started_at = now
+        self.job.save(update_fields=['config', 'status', 'started_at', 'updated_at'])
+
+        self._schedule(poll_delay(0))
+        return result
+
+    # ------------------------------------------------------------------
+    # Suivi
+    # ------------------------------------------------------------------
+
+    def _schedule(self, delay: float):
+        from marketing.task_queue import enqueue
+
+        state = self.state
+        enqueue(
+            TASK_NAME,
+            {'job_id': self.job.pk},
+            delay=math.ceil(delay),
+            # Une tâche par échéance : la tâche en cours peut planifier la suivante
+            unique_key=f"heygen:{state.get('video_id')}:{state.get('polls', 0)}",
+        )
+
+    def poll(self, force: bool = False) -> str:
+        """
+        Un appel de statut HeyGen ; replanifie le poll suivant si besoin.
+
+        Args:
+            force: Ignorer l'échéance (next_poll_at)
+
+        Returns:
+            Statut du suivi : pending, processing, completed, failed
+        """
+        # Réserve ce poll : échéance suivante fixée avant l'appel, pour qu'un
+        # autre poller (tâche, cron) ne lance pas une seconde chaîne
+        with transaction.atomic():
+            job = VideoProductionJob.objects.select_for_update().get(pk=self.job.pk)
+            state = job.config.get('heygen', {})
+            video_id = state.get('video_id') or job.get_config('heygen_video_id')
+            if not video_id or state.get('status') in ('completed', 'failed') or _downloading(state):
+                self.job.config = job.config
+                return state.get('status', 'failed')
+            next_poll = parse_datetime(state.get('next_poll_at') or '')
+            if not force and next_poll and next_poll > timezone.now():
+                self.job.config = job.config
+                return state.get('status', 'pending')
+            
+            polls = state.get('polls', 0) + 1
+            delay = poll_delay(polls)
+            state = {
+                **state,
+                'video_id': video_id,
+                'polls': polls,
+                'next_poll_at': (timezone.now() + timedelta(seconds=delay)).isoformat(),
+            }
+            job.config = {**job.config, 'heygen': state}
+            job.save(update_fields=['config', 'updated_at'])
+        self.job.config = job.config
+
+        result = self.provider.get_status(video_id)
+        if result.status in ('completed', 'failed'):
+            store_payload(result.metadata, 'heygen', ProviderPayload.Kind.STATUS, job=self.job)
+
+        if result.status == 'completed' and result.video_url:
+            return self.complete(result.video_url, metadata=result.metadata)
+
+        if result.status == 'failed' and 'Status check error' not in (result.error_message or ''):
+            return self.fail(result.error_message or "HeyGen: génération échouée")
+
+        # En cours (ou erreur réseau passagère) : poll suivant plus tard
+        submitted = parse_datetime(state.get('submitted_at') or '') or timezone.now()
+        max_wait = getattr(settings, 'MARKETING_HEYGEN_MAX_WAIT', 3600)
+        if (timezone.now() - submitted).total_seconds() > max_wait:
+            return self.fail(f"HeyGen: vidéo non prête après {max_wait}s")
+
+        if state.get('status') != 'processing':
+            self._save_state(status='processing')
+        self._schedule(delay)
+        return 'processing'
+
+    def complete(self, video_url: str, metadata: dict = None) -> str:
+        """Télécharge la vidéo terminée et passe le job en video_ready"""
+        # Réserve la finalisation (webhook et poll peuvent arriver ensemble)
+        with transaction.atomic():
+            job = VideoProductionJob.objects.select_for_update().get(pk=self.job.pk)
+            state = job.config.get('heygen', {})
+            if state.get('status') == 'completed' or _downloading(state):
+                self.job.config = job.config
+                return state['status']
+            state = {**state, 'status': 'downloading', 'downloading_at': timezone.now().isoformat()}
+            job.config = {**job.config, 'heygen': state}
+            job.save(update_fields=['config', 'updated_at'])
+        self.job.config = job.config
+
+        video_id = state.get('video_id') or job.get_config('heygen_video_id')
+        output_dir = os.path.join(settings.MEDIA_ROOT, 'marketing', 'output', str(job.pk))
+        path = os.path.join(output_dir, f"heygen_{video_id}.mp4")
+
+        try:
+            get_download_manager().download(video_url, path)
+        except DownloadError as e:
+            # L'URL est redonnée à chaque statut : nouvel essai au poll suivant
+            logger.warning(f"HeyGen job #{job.pk}: {e}")
+            polls = state.get('polls', 0) + 1
+            self._save_state(
+                status='processing',
+                polls=polls,
+                next_poll_at=(timezone.now() + timedelta(seconds=poll_delay(polls))).isoformat(),
+            )
+            self._schedule(poll_delay(polls))
+            return 'processing'
+
+        data = (metadata or {}).get('data', {}) if isinstance(metadata, dict) else {}
+        self._save_state(
+            status='completed',
+            video_url=video_url,
+            local_path=path,
+            duration=data.get('duration'),
+            completed_at=timezone.now().isoformat(),
+        )
+        duration = data.get('duration') or self.job.get_config('duration_max', 30)
+        record_cost(self.job, self.provider.estimate_cost(duration), 'heygen', CostEntry.Kind.AVATAR)
+
+        # N'avancer que si le job attend toujours sa vidéo (pas annulé entre-temps)
+        VideoProductionJob.objects.filter(
+            pk=job.pk, status=VideoProductionJob.Status.VIDEO_PENDING
+        ).update(
+            status=VideoProductionJob.Status.VIDEO_READY,
+            final_video_path=path,
+            progress_percent=80,
+            updated_at=timezone.now(),
+        )
+        self.job.refresh_from_db()
+        logger.info(f"HeyGen job #{job.pk}: vidéo {video_id} prête → {path}")
+        return 'completed'
+
+    def fail(self, message: str) -> str:
+        """Marque la vidéo et le job en échec"""
+        if self.state.get('status') == 'completed':
+            return 'completed'
+        self._save_state(status='failed', error=message)
+        VideoProductionJob.objects.filter(
+            pk=self.job.pk, status=VideoProductionJob.Status.VIDEO_PENDING
+        ).update(
+            status=VideoProductionJob.Status.FAILED,
+            error_log=message,
+            updated_at=timezone.now(),
+        )
+        self.job.refresh_from_db()
+        logger.warning(f"HeyGen job #{self.job.pk}: {message}")
+        return 'failed'
@@ -1,12 +1,62 @@
 """
 Générateur d'images avec DALL-E 3 (OpenAI)
+
+Les images d'un script passent par un pipeline concurrent
+(generate_and_save_images) : appels DALL-E en parallèle bornés par le
+gouverneur 'dalle', téléchargement de chaque image dès qu'elle est prête,
+redimensionnement 9:16 dans un pool de processus.
 """
 import os
-import requests
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
 from io import BytesIO
+from typing import Dict, List, Optional
+
+from django.conf import settings
 from PIL import Image
 from openai import OpenAI
 
+from .downloader import get_download_manager, DownloadItem
+from .rate_governor import RATE_LIMIT_MARKERS, get_governor
+
+# Gouverneur partagé des appels DALL-E (MARKETING_VIDEO_PROVIDER_LIMITS['dalle'])
+GOVERNOR_NAME = 'dalle'
+
+
+def _image_concurrency() -> int:
+    return max(1, getattr(settings, 'MARKETING_IMAGE_CONCURRENCY', 4))
+
+
+def _resize_bytes(image_bytes: bytes, target_size: tuple) -> bytes:
+    """Letterbox 9:16 sur fond noir (fonction de module : exécutable en sous-processus)"""
+    img = Image.open(BytesIO(image_bytes))
+    
+    # Redimensionner en gardant le ratio
+    img.thumbnail(target_size, Image.Resampling.LANCZOS)
+    
+    # Créer un fond noir au format cible
+    background = Image.new('RGB', target_size, (0, 0, 0))
+    
+    # Centrer l'image redimensionnée sur le fond
+    offset_x = (target_size[0] - img.width) // 2
+    offset_y = (target_size[1] - img.height) // 2
+    background.paste(img, (offset_x, offset_y))
+    
+    output = BytesIO()
+    background.save(output, format='PNG')
+    return output.getvalue()
+
+
+def _resize_file(path: str, target_size: tuple) -> float:
+    """Redimensionne une image sur place ; retourne la durée (secondes)"""
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        data = _resize_bytes(f.read(), target_size)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return time.perf_counter() - start
+
 
 class ImageGenerator:
     """Génère des images avec DALL-E 3"""
@@ -45,26 +95,36 @@ class ImageGenerator:
         quality = quality or self.default_quality
         style = style or self.default_style
         
-        try:
-            response = self.client.images.generate(
-                model=self.model,
-                prompt=prompt,
-                size=size,
-                quality=quality,
-                style=style,
-                n=1
-            )
-            
-            image_data = response.data[0]
-            
-            return {
-                'url': image_data.url,
-                'revised_prompt': image_data.revised_prompt
-            }
+        governor = get_governor(GOVERNOR_NAME)
         
-        except Exception as e:
-            print(f"❌ Erreur génération image : {e}")
-            raise
+        for attempt in range(governor.max_retries + 1):
+            try:
+                with governor.slot():
+                    response = self.client.images.generate(
+                        model=self.model,
+                        prompt=prompt,
+                        size=size,
+                        quality=quality,
+                        style=style,
+                        n=1
+                    )
+                
+                image_data = response.data[0]
+                
+                return {
+                    'url': image_data.url,
+                    'revised_prompt': image_data.revised_prompt
+                }
+            
+            except Exception as e:
+                # 429 : pause de tout le bucket DALL-E puis nouvel essai
+                message = str(e).lower()
+                if attempt < governor.max_retries and any(m in message for m in RATE_LIMIT_MARKERS):
+                    delay = governor.backoff(attempt)
+                    print(f"⏳ DALL-E rate limit, nouvel essai dans {delay:.0f}s")
+                    continue
+                print(f"❌ Erreur génération image : {e}")
+                raise
     
     def generate_multiple(
         self,
@@ -81,26 +141,37 @@ class ImageGenerator:
             size, quality, style: Paramètres DALL-E
         
         Returns:
-            Liste de dicts {'url': ..., 'revised_prompt': ...}
+            Liste de dicts {'url': ..., 'revised_prompt': ...} (ordre des prompts)
         """
-        results = []
+        results = [None] * len(prompts)
         
-        for i, prompt in enumerate(prompts):
-            print(f"🎨 Génération image {i+1}/{len(prompts)}...")
-            try:
-                result = self.generate(prompt, size, quality, style)
-                results.append(result)
-            except Exception as e:
-                print(f"⚠️ Erreur image {i+1}: {e}")
-                # Continuer avec les autres
-                results.append({
-                    'url': None,
-                    'revised_prompt': None,
-                    'error': str(e)
-                })
+        # Appels en parallèle, bornés par MARKETING_IMAGE_CONCURRENCY et le gouverneur
+        with ThreadPoolExecutor(max_workers=min(_image_concurrency(), max(1, len(prompts)))) as pool:
+            futures = {
+                pool.submit(self._generate_safe, i, len(prompts), prompt, size, quality, style): i
+                for i, prompt in enumerate(prompts)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
         
         return results
     
+    def _generate_safe(self, index, total, prompt, size=None, quality=None, style=None) -> dict:
+        """generate() sans exception : l'échec d'une image n'arrête pas les autres"""
+        print(f"🎨 Génération image {index+1}/{total}...")
+        start = time.perf_counter()
+        try:
+            result = self.generate(prompt, size, quality, style)
+        except Exception as e:
+            print(f"⚠️ Erreur image {index+1}: {e}")
+            result = {
+                'url': None,
+                'revised_prompt': None,
+                'error': str(e)
+            }
+        result['generation_seconds'] = time.perf_counter() - start
+        return result
+    
     def download_image(self, url: str) -> bytes:
         """
         Télécharge une image depuis une URL
@@ -112,9 +183,7 @@ class ImageGenerator:
             Bytes de l'image (PNG)
         """
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            return response.content
+            return get_download_manager().fetch_bytes(url, timeout=30)
         except Exception as e:
             print(f"❌ Erreur téléchargement image : {e}")
             raise
@@ -127,10 +196,7 @@ class ImageGenerator:
             url: URL de l'image
             file_path: Chemin de sauvegarde local
         """
-        image_bytes = self.download_image(url)
-        
-        with open(file_path, 'wb') as f:
-            f.write(image_bytes)
+        get_download_manager().download(url, file_path)
         
         print(f"✅ Image sauvegardée : {file_path}")
     
@@ -146,25 +212,7 @@ class ImageGenerator:
             Image redimensionnée en bytes (PNG)
         """
         try:
-            # Charger l'image
-            img = Image.open(BytesIO(image_bytes))
-            
-            # Redimensionner en gardant le ratio
-            img.thumbnail(target_size, Image.Resampling.LANCZOS)
-            
-            # Créer un fond noir au format cible
-            background = Image.new('RGB', target_size, (0, 0, 0))
-            
-            # Centrer l'image redimensionnée sur le fond
-            offset_x = (target_size[0] - img.width) // 2
-            offset_y = (target_size[1] - img.height) // 2
-            background.paste(img, (offset_x, offset_y))
-            
-            # Convertir en bytes
-            output = BytesIO()
-            background.save(output, format='PNG')
-            return output.getvalue()
-        
+            return _resize_bytes(image_bytes, tuple(target_size))
         except Exception as e:
             print(f"❌ Erreur redimensionnement : {e}")
             raise
@@ -243,26 +291,159 @@ def download_and_save_images(image_results: list, output_dir: str, video_id: int
     
     os.makedirs(output_dir, exist_ok=True)
     
-    generator = ImageGenerator()
-    saved_paths = []
+    # Téléchargements en parallèle (pool de connexions partagé)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    items = []
     
     for i, result in enumerate(image_results):
         if result.get('url'):
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"img_{i}_{timestamp}.png"
-            file_path = os.path.join(output_dir, filename)
-            
-            try:
-                generator.save_image(result['url'], file_path)
-                saved_paths.append(file_path)
-            except Exception as e:
-                print(f"⚠️ Impossible de sauvegarder image {i}: {e}")
+            items.append(DownloadItem(
+                url=result['url'],
+                dest_path=os.path.join(output_dir, filename),
+                key=str(i),
+            ))
         else:
             print(f"⚠️ Image {i} n'a pas d'URL (erreur lors de la génération)")
     
+    paths = get_download_manager().download_many(items)
+    
+    saved_paths = []
+    for item in items:
+        path = paths.get(item.key)
+        if path:
+            print(f"✅ Image sauvegardée : {path}")
+            saved_paths.append(path)
+        else:
+            print(f"⚠️ Impossible de sauvegarder image {item.key}")
+    
     return saved_paths
 
 
+@dataclass
+class ImagePipelineResult:
+    """Résultat du pipeline concurrent d'images"""
+    images: List[dict]                      # Résultats DALL-E (ordre des prompts)
+    paths: List[str]                        # Images sauvegardées (ordre des prompts, échecs exclus)
+    wall_seconds: float = 0.0               # Durée réelle du pipeline
+    stage_seconds: Dict[str, float] = field(default_factory=dict)  # Cumul par étape
+    
+    @property
+    def serial_seconds(self) -> float:
+        """Durée estimée d'une exécution séquentielle (somme des étapes)"""
+        return sum(self.stage_seconds.values())
+    
+    @property
+    def speedup(self) -> float:
+        return self.serial_seconds / self.wall_seconds if self.wall_seconds else 1.0
+
+
+def generate_and_save_images(
+    prompts: list,
+    output_dir: str,
+    video_id: int = None,
+    resize: bool = True,
+    target_size: tuple = (1080, 1920),
+    workers: Optional[int] = None,
+) -> ImagePipelineResult:
+    """
+    Pipeline concurrent : génération DALL-E → téléchargement → redimensionnement.
+    
+    Chaque image avance dès que son étape précédente est terminée : le
+    téléchargement de l'image 1 recouvre la génération des suivantes, et les
+    redimensionnements (CPU) tournent dans un pool de processus. Une image en
+    échec est simplement absente de `paths`, comme avec
+    download_and_save_images.
+    
+    Args:
+        prompts: Descriptions des images
+        output_dir: Dossier de sauvegarde
+        video_id: ID du projet vidéo (nommage des fichiers)
+        resize: Redimensionner au format vidéo (target_size)
+        workers: Appels DALL-E simultanés (défaut: MARKETING_IMAGE_CONCURRENCY)
+    
+    Usage:
+        from marketing.ai.image_generator import generate_and_save_images
+        
+        result = generate_and_save_images(script['image_prompts'], '/tmp/video_1', video_id=1)
+        print(f"{len(result.paths)} images en {result.wall_seconds:.1f}s (×{result.speedup:.1f})")
+    """
+    from datetime import datetime
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    workers = max(1, workers or _image_concurrency())
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    prefix = f"img_{video_id}_" if video_id is not None else "img_"
+    
+    generator = ImageGenerator()
+    manager = get_download_manager()
+    images = [None] * len(prompts)
+    saved = {}
+    stages = {'generation': 0.0, 'download': 0.0, 'resize': 0.0}
+    
+    def download(index, url):
+        start = time.perf_counter()
+        path = manager.download(url, os.path.join(output_dir, f"{prefix}{index}_{timestamp}.png"))
+        return path, time.perf_counter() - start
+    
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=workers) as generation_pool, \
+            ThreadPoolExecutor(max_workers=workers) as download_pool, \
+            ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as resize_pool:
+        
+        # Chaque future terminée déclenche l'étape suivante de son image
+        pending = {
+            generation_pool.submit(generator._generate_safe, i, len(prompts), prompt): ('generation', i)
+            for i, prompt in enumerate(prompts)
+        }
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, index = pending.pop(future)
+                
+                if stage == 'generation':
+                    result = future.result()
+                    images[index] = result
+                    stages['generation'] += result.get('generation_seconds', 0.0)
+                    if result.get('url'):
+                        pending[download_pool.submit(download, index, result['url'])] = ('download', index)
+                    else:
+                        print(f"⚠️ Image {index} n'a pas d'URL (erreur lors de la génération)")
+                
+                elif stage == 'download':
+                    try:
+                        path, elapsed = future.result()
+                    except Exception as e:
+                        print(f"⚠️ Impossible de sauvegarder image {index} : {e}")
+                        continue
+                    stages['download'] += elapsed
+                    saved[index] = path
+                    if resize:
+                        pending[resize_pool.submit(_resize_file, path, tuple(target_size))] = ('resize', index)
+                
+                else:
+                    try:
+                        stages['resize'] += future.result()
+                    except Exception as e:
+                        # Image conservée dans sa taille d'origine
+                        print(f"⚠️ Redimensionnement image {index} impossible : {e}")
+    
+    result = ImagePipelineResult(
+        images=images,
+        paths=[saved[i] for i in sorted(saved)],
+        wall_seconds=time.perf_counter() - start,
+        stage_seconds=stages,
+    )
+    
+    for path in result.paths:
+        print(f"✅ Image sauvegardée : {path}")
+    
+    return result
+
+
 if __name__ == '__main__':
     # Test rapide
     generator = ImageGenerator()
@@ -0,0 +1,285 @@
+"""
+Cache média adressé par contenu pour l'assemblage vidéo.
+
+Les fichiers sont stockés sous leur empreinte SHA-256 :
+- objects/<ab>/<digest><ext> : fichiers bruts (téléchargés ou uploadés)
+- derived/<ab>/<clé><ext>    : fichiers dérivés (clé = empreinte source + paramètres)
+- urls/<sha256(url)>         : index URL → empreinte du contenu téléchargé
+
+Les fichiers sont ensuite liés (hard link) dans les dossiers de job, ce qui
+évite toute copie. Éviction LRU sur disque (mtime = dernier accès) dès que la
+taille totale dépasse MARKETING_MEDIA_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from typing import Callable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Taille de lecture pour le calcul d'empreinte
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """Calcule l'empreinte SHA-256 d'un fichier (lecture en streaming)"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def params_key(digest: str, params: dict) -> str:
+    """Clé d'un fichier dérivé : empreinte source + paramètres (ordre stable)"""
+    payload = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{digest}:{payload}".encode('utf-8')).hexdigest()
+
+
+class MediaCache:
+    """
+    Cache disque adressé par contenu, partagé entre tous les jobs.
+
+    Usage:
+        cache = get_media_cache()
+        digest = cache.put_file('/tmp/clip.mp4')
+        path = cache.get_or_create_derived(digest, {'w': 1080}, '.mp4', build)
+        cache.link_into(path, '/media/marketing/output/12/segment_0_norm.mp4')
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = None):
+        self.root = root or getattr(
+            settings, 'MARKETING_MEDIA_CACHE_DIR',
+            os.path.join(settings.MEDIA_ROOT, 'marketing', 'cache')
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else getattr(
+            settings, 'MARKETING_MEDIA_CACHE_MAX_BYTES', 5 * 1024 ** 3
+        )
+        self._lock = threading.Lock()
+        for sub in ('objects', 'derived', 'urls', 'tmp'):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Chemins
+    # ------------------------------------------------------------------
+
+    def _object_path(self, digest: str, ext: str = '') -> str:
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}{ext}")
+
+    def _derived_path(self, key: str, ext: str = '') -> str:
+        return os.path.join(self.root, 'derived', key[:2], f"{key}{ext}")
+
+    def _url_index_path(self, url: str) -> str:
+        return os.path.join(
+            self.root, 'urls', hashlib.sha256(url.encode('utf-8')).hexdigest()
+        )
+
+    def temp_path(self, suffix: str = '') -> str:
+        """Chemin temporaire sur le même disque que le cache (rename atomique)"""
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=os.path.join(self.root, 'tmp'))
+        os.close(fd)
+        return path
+
+    # ------------------------------------------------------------------
+    # Objets bruts
+    # ------------------------------------------------------------------
+
+    def put_file(self, path: str, move: bool = False) -> str:
+        """
+        Ajoute un fichier au cache et retourne son empreinte.
+
+        Args:
+            path: Fichier source
+            move: Déplacer au lieu de lier/copier (fichier temporaire)
+        """
+        digest = file_digest(path)
+        ext = os.path.splitext(path)[1]
+        target = self._object_path(digest, ext)
+
+        if os.path.exists(target):
+            self.touch(target)
+            if move:
+                os.remove(path)
+            return digest
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if move:
+            os.replace(path, target)
+        else:
+            self._link_or_copy(path, target)
+
+        self.evict()
+        return digest
+
+    def get_object(self, digest: str, ext: str = '') -> Optional[str]:
+        """Retourne le chemin d'un objet brut s'il est en cache"""
+        path = self._object_path(digest, ext)
+        if os.path.exists(path):
+            self.touch(path)
+            return path
+        return None
+
+    def remember_url(self, url: str, digest: str):
+        """Associe une URL téléchargée à l'empreinte de son contenu"""
+        with open(self._url_index_path(url), 'w') as f:
+            f.write(digest)
+
+    def lookup_url(self, url: str) -> Optional[str]:
+        """Retourne l'empreinte du contenu déjà téléchargé pour cette URL"""
+        index_path = self._url_index_path(url)
+        try:
+            with open(index_path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    # ------------------------------------------------------------------
+    # Fichiers dérivés (normalisation, sous-titres, ...)
+    # ------------------------------------------------------------------
+
+    def get_derived(self, digest: str, params: dict, ext: str = '') -> Optional[str]:
+        """Retourne le fichier dérivé s'il existe déjà"""
+        path = self._derived_path(params_key(digest, params), ext)
+        if os.path.exists(path):
+            self.touch(path)
+            return path
+        return None
+
+    def get_or_create_derived(
+        self,
+        digest: str,
+        params: dict,
+        ext: str,
+        build: Callable[[str], bool],
+    ) -> Optional[str]:
+        """
+        Retourne le fichier dérivé, en le construisant si nécessaire.
+
+        Args:
+            digest: Empreinte du fichier source
+            params: Paramètres de la transformation (font partie de la clé)
+            ext: Extension du fichier produit
+            build: Callable(output_path) -> bool, produit le fichier
+
+        Returns:
+            Chemin en cache, ou None si build a échoué
+        """
+        cached = self.get_derived(digest, params, ext)
+        if cached:
+            return cached
+
+        target = self._derived_path(params_key(digest, params), ext)
+        tmp_path = self.temp_path(suffix=ext)
+
+        try:
+            if not build(tmp_path) or not os.path.getsize(tmp_path):
+                return None
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.evict()
+        return target
+
+    # ------------------------------------------------------------------
+    # Liens vers les dossiers de job
+    # ------------------------------------------------------------------
+
+    def link_into(self, cached_path: str, dest_path: str) -> str:
+        """
+        Lie un fichier du cache dans un dossier de job (remplace l'existant).
+        Hard link si possible, copie sinon (disques différents).
+        """
+        if os.path.exists(dest_path) or os.path.islink(dest_path):
+            if os.path.exists(dest_path) and os.path.samefile(cached_path, dest_path):
+                return dest_path
+            os.remove(dest_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        self._link_or_copy(cached_path, dest_path)
+        return dest_path
+
+    @staticmethod
+    def _link_or_copy(src: str, dst: str):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    # ------------------------------------------------------------------
+    # LRU
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def touch(path: str):
+        """Marque un fichier comme récemment utilisé"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _entries(self):
+        for sub in ('objects', 'derived'):
+            base = os.path.join(self.root, sub)
+            for dirpath, _dirnames, filenames in os.walk(base):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_mtime, st.st_size
+
+    def size(self) -> int:
+        """Taille totale du cache (octets)"""
+        return sum(size for _path, _mtime, size in self._entries())
+
+    def evict(self) -> int:
+        """
+        Supprime les fichiers les moins récemment utilisés jusqu'à repasser
+        sous max_bytes. Les hard links des dossiers de job restent valides.
+
+        Returns:
+            Nombre d'octets libérés
+        """
+        if not self.max_bytes:
+            return 0
+
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[1])
+            total = sum(size for _path, _mtime, size in entries)
+            freed = 0
+
+            for path, _mtime, size in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                freed += size
+
+            if freed:
+                logger.info(f"Media cache: {freed / 1024 / 1024:.1f} MB évincés")
+            return freed
+
+
+# Instance globale (singleton)
+_media_cache = None
+
+
+def get_media_cache() -> MediaCache:
+    """Retourne l'instance globale du cache média"""
+    global _media_cache
+    if _media_cache is None:
+        _media_cache = MediaCache()
+    return _media_cache
@@ -0,0 +1,175 @@
+"""
+Analyse des fichiers média (ffprobe), une fois par contenu.
+
+Le résultat (codecs, profil, résolution, fps, base de temps, durée,
+présence d'audio) est stocké
+dans MediaProbe sous l'empreinte SHA-256 du fichier : un clip réutilisé
+par plusieurs jobs, ou réassemblé, n'est jamais ré-analysé.
+
+Utilisé par :
+- VideoAssembler : choix de la commande FFmpeg (source muette → piste
+  silencieuse dès le premier encodage), clips déjà au format cible non
+  ré-encodés
+- sous-titres : durée réelle des segments normalisés
+- QAAgent : durée réelle de la vidéo finale
+
+Usage:
+    probe = probe_file('/tmp/clip.mp4')
+    if probe and matches_target(probe): ...
+"""
+
+import json
+import logging
+import os
+import subprocess
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+
+from marketing.models_extended import MediaProbe
+
+from .media_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+# Format de sortie de l'assemblage (cf. NORMALIZE_PARAMS)
+TARGET_FORMAT = {
+    'width': 1080,
+    'height': 1920,
+    'fps': 30,
+    'video_codec': 'h264',
+    'pix_fmt': 'yuv420p',
+    # Valeurs produites par libx264 + muxer mp4 à 1080x1920@30 : un clip
+    # concaténé en -c copy doit avoir les mêmes paramètres de flux
+    'time_base': '1/15360',
+    'sample_aspect_ratio': '1:1',
+    'profile': 'High',
+    'level': 40,
+    'audio_codec': 'aac',
+    'sample_rate': 44100,
+    'channels': 2,
+}
+
+
+def run_ffprobe(path: str) -> Optional[dict]:
+    """Sortie JSON de ffprobe (flux + conteneur), ou None si illisible"""
+    try:
+        result = subprocess.run(
+            [
+                'ffprobe', '-v', 'error', '-print_format', 'json',
+                '-show_format', '-show_streams', path
+            ],
+            capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"ffprobe impossible sur {path}: {e}")
+        return None
+    if result.returncode != 0:
+        logger.warning(f"ffprobe impossible sur {path}: {result.stderr.strip()}")
+        return None
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return None
+
+
+def _frame_rate(value: str) -> Optional[float]:
+    """'30000/1001' → 29.97"""
+    try:
+        num, _, den = (value or '').partition('/')
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) if rate > 0 else None
+
+
+def parse_probe(data: dict) -> dict:
+    """Champs MediaProbe depuis la sortie JSON de ffprobe"""
+    streams = data.get('streams') or []
+    video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+    container = data.get('format') or {}
+
+    duration = container.get('duration') or video.get('duration') or 0
+    avg_rate = _frame_rate(video.get('avg_frame_rate'))
+    real_rate = _frame_rate(video.get('r_frame_rate'))
+    return {
+        'duration': float(duration),
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'fps': avg_rate or real_rate,
+        'video_codec': video.get('codec_name', ''),
+        'pix_fmt': video.get('pix_fmt', ''),
+        'time_base': video.get('time_base', ''),
+        'sample_aspect_ratio': video.get('sample_aspect_ratio', ''),
+        'profile': video.get('profile', ''),
+        'level': video.get('level'),
+        'variable_frame_rate': bool(avg_rate and real_rate and abs(avg_rate - real_rate) >= 0.01),
+        'has_audio': audio is not None,
+        'audio_codec': (audio or {}).get('codec_name', ''),
+        'sample_rate': int((audio or {}).get('sample_rate') or 0) or None,
+        'channels': (audio or {}).get('channels'),
+        'size': int(container.get('size') or 0),
+    }
+
+
+def get_probe(digest: str) -> Optional[MediaProbe]:
+    """Analyse déjà enregistrée pour une empreinte"""
+    return MediaProbe.objects.filter(digest=digest).first()
+
+
+def probe_file(path: str, digest: str = None) -> Optional[MediaProbe]:
+    """
+    Analyse d'un fichier, ffprobe lancé seulement au premier passage.
+
+    Args:
+        path: Fichier média local
+        digest: Empreinte déjà connue (évite de re-hasher le fichier)
+
+    Returns:
+        MediaProbe, ou None si le fichier est illisible
+    """
+    if not path or not os.path.exists(path):
+        return None
+    digest = digest or file_digest(path)
+
+    probe = get_probe(digest)
+    if probe:
+        return probe
+
+    data = run_ffprobe(path)
+    if data is None:
+        return None
+
+    try:
+        with transaction.atomic():
+            return MediaProbe.objects.create(digest=digest, **parse_probe(data))
+    except IntegrityError:
+        # Analysé entre-temps par un autre worker
+        return get_probe(digest)
+
+
+def matches_target(probe: MediaProbe, target: dict = None) -> bool:
+    """
+    Vrai si le fichier est déjà au format de sortie (résolution, fps
+    constant, base de temps, codecs, profil, audio) et peut être concaténé
+    sans ré-encodage avec les segments normalisés.
+    """
+    target = target or TARGET_FORMAT
+    return (
+        probe.has_audio
+        and probe.width == target['width']
+        and probe.height == target['height']
+        and probe.fps is not None
+        and abs(probe.fps - target['fps']) < 0.01
+        and not probe.variable_frame_rate
+        and probe.time_base == target['time_base']
+        and probe.sample_aspect_ratio == target['sample_aspect_ratio']
+        and probe.video_codec == target['video_codec']
+        and probe.profile == target['profile']
+        and probe.level == target['level']
+        and probe.pix_fmt == target['pix_fmt']
+        and probe.audio_codec == target['audio_codec']
+        and probe.sample_rate == target['sample_rate']
+        and probe.channels == target['channels']
+    )
@@ -0,0 +1,212 @@
+"""
+Limiteur de débit et de concurrence par provider (vidéo IA, HeyGen).
+
+Chaque provider a un gouverneur partagé par tout le process :
+- token bucket : N requêtes/minute (avec rafale = N/6, au moins 1)
+- max_in_flight : nombre d'appels API simultanés
+- sur 429 : pause de tout le bucket (backoff exponentiel) puis nouvel
+  essai, au lieu de marquer le segment en échec
+
+Les appels attendent leur tour ; le temps d'attente est compté.
+
+Configuration (settings) :
+    MARKETING_VIDEO_PROVIDER_LIMITS = {
+        'minimax': {'requests_per_minute': 20, 'max_in_flight': 5},
+    }
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Marqueurs d'une réponse "trop de requêtes" dans error_message
+RATE_LIMIT_MARKERS = ('429', 'too many requests', 'rate limit')
+
+
+class RateGovernor:
+    """Token bucket + sémaphore de concurrence pour un provider"""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        max_in_flight: int = 0,
+        max_retries: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0,
+    ):
+        self.name = name
+        self.rate = requests_per_minute / 60.0 if requests_per_minute else 0
+        self.capacity = max(1.0, requests_per_minute / 6.0) if requests_per_minute else 0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self._local = threading.local()
+
+        # Compteurs
+        self.calls = 0
+        self.throttled_calls = 0
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+
+    # ------------------------------------------------------------------
+    # Attente
+    # ------------------------------------------------------------------
+
+    def _wait_for_token(self) -> float:
+        """Bloque jusqu'à obtenir un jeton ; retourne le temps attendu"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self.blocked_until - now
+
+                if wait <= 0 and self.rate:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = (1 - self.tokens) / self.rate
+                elif wait <= 0:
+                    return waited
+
+            wait = min(wait, 5.0)
+            time.sleep(wait)
+            waited += wait
+
+    @contextmanager
+    def slot(self):
+        """Réserve un appel : slot de concurrence puis jeton de débit"""
+        start = time.monotonic()
+        if self._slots:
+            self._slots.acquire()
+        try:
+            self._wait_for_token()
+            waited = time.monotonic() - start
+            with self._lock:
+                self.calls += 1
+                if waited > 0.01:
+                    self.throttled_calls += 1
+                    self.throttled_seconds += waited
+            yield
+        finally:
+            if self._slots:
+                self._slots.release()
+
+    def backoff(self, attempt: int) -> float:
+        """Suspend tout le bucket après un 429"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.tokens = 0
+            self.rate_limited += 1
+        return delay
+
+    # ------------------------------------------------------------------
+    # Appel
+    # ------------------------------------------------------------------
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Exécute func sous le gouverneur. Une réponse 429 (résultat
+        status='failed' avec un error_message de rate limit) est rejouée
+        après backoff, jusqu'à max_retries fois.
+        """
+        # Appel imbriqué (ex: super().generate_clip) : déjà gouverné
+        if getattr(self._local, 'active', False):
+            return func(*args, **kwargs)
+
+        self._local.active = True
+        try:
+            for attempt in range(self.max_retries + 1):
+                with self.slot():
+                    result = func(*args, **kwargs)
+
+                if not is_rate_limited(result) or attempt == self.max_retries:
+                    return result
+
+                delay = self.backoff(attempt)
+                logger.warning(f"{self.name}: 429, nouvel essai dans {delay:.1f}s")
+            return result
+        finally:
+            self._local.active = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'throttled_calls': self.throttled_calls,
+                'throttled_seconds': round(self.throttled_seconds, 2),
+                'rate_limited': self.rate_limited,
+            }
+
+
+def is_rate_limited(result) -> bool:
+    """Vrai si le résultat (VideoGenerationResult, HeyGenResult) est un 429"""
+    if getattr(result, 'status', None) != 'failed':
+        return False
+    message = (getattr(result, 'error_message', None) or '').lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+# Gouverneurs partagés (un par provider, pour tout le process)
+_governors: Dict[str, RateGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(provider_name: str) -> RateGovernor:
+    """Retourne le gouverneur d'un provider (créé selon les settings)"""
+    with _governors_lock:
+        governor = _governors.get(provider_name)
+        if governor is None:
+            defaults = getattr(settings, 'MARKETING_VIDEO_PROVIDER_DEFAULT_LIMITS', {})
+            limits = {
+                **defaults,
+                **getattr(settings, 'MARKETING_VIDEO_PROVIDER_LIMITS', {}).get(provider_name, {}),
+            }
+            governor = RateGovernor(
+                provider_name,
+                requests_per_minute=limits.get('requests_per_minute', 0),
+                max_in_flight=limits.get('max_in_flight', 0),
+                max_retries=limits.get('max_retries', 5),
+            )
+            _governors[provider_name] = governor
+        return governor
+
+
+def governor_stats() -> Dict[str, dict]:
+    """Compteurs de tous les gouverneurs actifs"""
+    with _governors_lock:
+        governors = list(_governors.values())
+    return {governor.name: governor.stats() for governor in governors}
+
+
+def governed(provider_name: str = None):
+    """
+    Décorateur de méthode : passe l'appel par le gouverneur du provider.
+
+    Args:
+        provider_name: Nom fixe (ex: 'heygen'), sinon self.get_provider_name()
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            name = provider_name or self.get_provider_name()
+            return get_governor(name).call(func, self, *args, **kwargs)
+        wrapper._governed = True
+        return wrapper
+    return decorator
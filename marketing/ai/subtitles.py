@@ -0,0 +1,259 @@
+"""
+Sous-titres de l'assemblage, calés sur la durée réelle des segments.
+
+Chaque segment est découpé en courtes répliques (style TikTok : quelques
+mots, gros texte blanc contouré, au-dessus de l'interface de l'appli) :
+
+- avec des horodatages de mots (TTS, transcription), les répliques suivent
+  la voix
+- sinon, la durée réelle du segment normalisé (MediaProbe) est répartie au
+  prorata du nombre de caractères de chaque réplique
+
+Les répliques d'un segment sont mises en cache dans le MediaCache (clé =
+empreinte du fichier + texte + paramètres) : seuls les segments modifiés
+sont recalculés, les autres sont décalés sur la piste.
+
+Usage:
+    track = SubtitleTrack()
+    cues = track.build([SegmentText(key, text, duration), ...])
+    write_ass(cues, '/tmp/subtitles.ass')
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .ffmpeg_editor import format_ass_time
+from .media_cache import get_media_cache
+
+# Paramètres de découpage et de style (font partie des clés de cache)
+SUBTITLE_PARAMS = {
+    'version': 2,
+    'max_chars': 32,     # Une ligne lisible sur mobile
+    'max_words': 6,
+    'min_duration': 0.6,  # Une réplique reste lisible au moins ~0.6s
+}
+
+# Style TikTok / Reels (coordonnées en 1080x1920)
+ASS_STYLE = {
+    'font': 'Arial',
+    'size': 78,
+    'bold': -1,
+    'primary': '&H00FFFFFF',   # Blanc
+    'outline_colour': '&H00000000',
+    'back_colour': '&H80000000',
+    'outline': 6,
+    'shadow': 2,
+    'alignment': 2,            # Bas centré
+    'margin_h': 80,
+    'margin_v': 420,           # Au-dessus de la légende et des boutons de l'appli
+}
+
+# Ponctuation forte : fin de réplique préférée
+PHRASE_END = re.compile(r'[.!?…:;,]$')
+
+# Ponctuation détachée (typographie française : « Bonjour ! », « Prêt ? »)
+DETACHED_PUNCTUATION = re.compile(r'^[.!?…:;,»)]+$')
+
+
+@dataclass
+class Cue:
+    """Une réplique (secondes depuis le début de la piste)"""
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class SegmentText:
+    """
+    Texte d'un segment à sous-titrer.
+
+    Args:
+        key: Empreinte du fichier vidéo du segment (clé de cache)
+        text: Texte affiché
+        duration: Durée réelle du segment (secondes)
+        words: Horodatages de mots optionnels, relatifs au segment :
+               [{'word': 'Bonjour', 'start': 0.0, 'end': 0.4}, ...]
+    """
+    key: str
+    text: str
+    duration: float
+    words: Optional[List[dict]] = field(default=None)
+
+
+def attach_punctuation(words: List[str]) -> List[str]:
+    """Rattache la ponctuation détachée au mot précédent ('Prêt', '?' → 'Prêt ?')"""
+    merged = []
+    for word in words:
+        if merged and DETACHED_PUNCTUATION.match(word):
+            merged[-1] = f"{merged[-1]} {word}"
+        else:
+            merged.append(word)
+    return merged
+
+
+def split_phrases(text: str, max_chars: int = None, max_words: int = None) -> List[str]:
+    """Découpe un texte en répliques courtes, de préférence sur la ponctuation"""
+    max_chars = max_chars or SUBTITLE_PARAMS['max_chars']
+    max_words = max_words or SUBTITLE_PARAMS['max_words']
+
+    phrases = []
+    current = []
+    for word in attach_punctuation(text.split()):
+        candidate = ' '.join(current + [word])
+        if current and (len(candidate) > max_chars or len(current) >= max_words):
+            phrases.append(' '.join(current))
+            current = [word]
+        else:
+            current.append(word)
+        if PHRASE_END.search(word) and len(' '.join(current)) >= max_chars // 2:
+            phrases.append(' '.join(current))
+            current = []
+    if current:
+        phrases.append(' '.join(current))
+    return phrases
+
+
+def time_phrases(phrases: List[str], duration: float, min_duration: float = None) -> List[Cue]:
+    """Répartit la durée d'un segment entre ses répliques au prorata des caractères"""
+    if not phrases or duration <= 0:
+        return []
+    min_duration = min(min_duration or SUBTITLE_PARAMS['min_duration'], duration / len(phrases))
+
+    weights = [max(len(p), 1) for p in phrases]
+    spare = duration - min_duration * len(phrases)
+    total = sum(weights)
+
+    cues = []
+    start = 0.0
+    for phrase, weight in zip(phrases, weights):
+        end = start + min_duration + spare * weight / total
+        cues.append(Cue(round(start, 3), round(end, 3), phrase))
+        start = end
+    cues[-1].end = round(duration, 3)
+    return cues
+
+
+def cues_from_words(words: List[dict], duration: float, max_chars: int = None, max_words: int = None) -> List[Cue]:
+    """Groupe des mots horodatés en répliques (mêmes règles que split_phrases)"""
+    max_chars = max_chars or SUBTITLE_PARAMS['max_chars']
+    max_words = max_words or SUBTITLE_PARAMS['max_words']
+
+    merged = []
+    for word in words:
+        if merged and DETACHED_PUNCTUATION.match(word['word'].strip()):
+            merged[-1] = {
+                **merged[-1],
+                'word': f"{merged[-1]['word']} {word['word'].strip()}",
+                'end': max(float(merged[-1]['end']), float(word['end'])),
+            }
+        else:
+            merged.append(word)
+
+    cues = []
+    current = []
+
+    def flush():
+        if current:
+            cues.append(Cue(
+                round(float(current[0]['start']), 3),
+                round(min(float(current[-1]['end']), duration), 3),
+                ' '.join(w['word'] for w in current),
+            ))
+            current.clear()
+
+    for word in merged:
+        text = ' '.join([w['word'] for w in current] + [word['word']])
+        if current and (len(text) > max_chars or len(current) >= max_words):
+            flush()
+        current.append(word)
+        if PHRASE_END.search(word['word']):
+            flush()
+    flush()
+    return [cue for cue in cues if cue.end > cue.start]
+
+
+class SubtitleTrack:
+    """Piste de sous-titres d'un assemblage, répliques mises en cache par segment"""
+
+    def __init__(self, cache=None):
+        self.cache = cache or get_media_cache()
+        self.computed = 0  # Segments recalculés (les autres viennent du cache)
+
+    def segment_cues(self, segment: SegmentText) -> List[Cue]:
+        """Répliques d'un segment, relatives à son début"""
+        params = {
+            **SUBTITLE_PARAMS,
+            'text': segment.text,
+            'duration': round(segment.duration, 3),
+            'words': hashlib.sha256(
+                json.dumps(segment.words, sort_keys=True).encode('utf-8')
+            ).hexdigest() if segment.words else None,
+        }
+
+        def build(tmp_path):
+            if segment.words:
+                cues = cues_from_words(segment.words, segment.duration)
+            else:
+                cues = time_phrases(split_phrases(segment.text), segment.duration)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([[c.start, c.end, c.text] for c in cues], f, ensure_ascii=False)
+            self.computed += 1
+            return True
+
+        cached = self.cache.get_or_create_derived(segment.key, params, '.json', build)
+        if not cached:
+            return []
+        with open(cached, encoding='utf-8') as f:
+            return [Cue(start, end, text) for start, end, text in json.load(f)]
+
+    def build(self, segments: List[SegmentText]) -> List[Cue]:
+        """Piste complète : répliques de chaque segment décalées de sa position"""
+        cues = []
+        offset = 0.0
+        for segment in segments:
+            if segment.text.strip() and segment.duration > 0:
+                for cue in self.segment_cues(segment):
+                    cues.append(Cue(round(offset + cue.start, 3), round(offset + cue.end, 3), cue.text))
+            offset += segment.duration
+        return cues
+
+
+def write_ass(cues: List[Cue], ass_path: str, width: int = 1080, height: int = 1920, style: dict = None):
+    """Écrit les répliques au format ASS (style TikTok par défaut)"""
+    s = {**ASS_STYLE, **(style or {})}
+    header = (
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {width}\n"
+        f"PlayResY: {height}\n"
+        "WrapStyle: 0\n"
+        "ScaledBorderAndShadow: yes\n"
+        "\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+        "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
+        "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding\n"
+        f"Style: Default,{s['font']},{s['size']},{s['primary']},{s['primary']},"
+        f"{s['outline_colour']},{s['back_colour']},{s['bold']},0,0,0,"
+        f"100,100,0,0,1,{s['outline']},{s['shadow']},{s['alignment']},"
+        f"{s['margin_h']},{s['margin_h']},{s['margin_v']},1\n"
+        "\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+
+    lines = [header]
+    for cue in cues:
+        text = cue.text.replace('\n', '\\N').replace('{', '(').replace('}', ')')
+        lines.append(
+            f"Dialogue: 0,{format_ass_time(cue.start)},{format_ass_time(cue.end)},"
+            f"Default,,0,0,0,,{text}\n"
+        )
+
+    with open(ass_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
@@ -0,0 +1,265 @@
+"""
+Synthèse vocale ElevenLabs par morceaux, en parallèle et en cache.
+
+- Le texte est découpé aux fins de phrase (morceaux de ~MARKETING_TTS_CHUNK_CHARS)
+- Chaque morceau est synthétisé via l'endpoint streaming, écrit directement
+  sur disque (pas de réponse complète en mémoire)
+- Les morceaux sont mis en cache dans le MediaCache, clé = (voice_id,
+  modèle, format, réglages de voix, empreinte du texte) : relancer un job ou
+  réutiliser une phrase ne coûte rien
+- Les MP3 sont recollés par FFmpeg concat sans réencodage (-c copy)
+
+Usage:
+    tts = ChunkedTTS(api_key)
+    result = tts.synthesize(text, voice_id, '/tmp/voiceover.mp3')
+    print(result.billed_characters, result.cached_chunks)
+"""
+
+import hashlib
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import requests
+from django.conf import settings
+
+from .media_cache import get_media_cache
+from .rate_governor import get_governor
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
+DEFAULT_MODEL = "eleven_multilingual_v2"
+
+# Format fixe : tous les morceaux doivent être identiques pour concat -c copy
+DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
+
+# Fin de phrase suivie d'un espace (., !, ?, … et guillemets fermants)
+SENTENCE_END = re.compile(r'(?<=[.!?…])["»”)]*\s+')
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class TTSError(Exception):
+    """Échec de synthèse d'un morceau"""
+    pass
+
+
+def split_sentences(text: str, max_chars: int = None) -> List[str]:
+    """
+    Découpe un texte en morceaux aux fins de phrase.
+
+    Les phrases consécutives sont regroupées tant que le morceau reste sous
+    max_chars ; une phrase plus longue forme un morceau à elle seule. Le
+    découpage est déterministe, donc un même texte retombe sur les mêmes
+    entrées de cache.
+    """
+    max_chars = max_chars or getattr(settings, 'MARKETING_TTS_CHUNK_CHARS', 250)
+    sentences = [s.strip() for s in SENTENCE_END.split(' '.join(text.split())) if s.strip()]
+
+    chunks = []
+    current = ''
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@dataclass
+class TTSResult:
+    """Résultat d'une synthèse par morceaux"""
+    path: str
+    chunks: int
+    cached_chunks: int
+    characters: int
+    billed_characters: int  # Caractères réellement envoyés à l'API
+    seconds: float
+
+
+class ChunkedTTS:
+    """Synthèse ElevenLabs par morceaux parallèles, avec cache"""
+
+    def __init__(
+        self,
+        api_key: str,
+        model_id: str = None,
+        voice_settings: dict = None,
+        output_format: str = None,
+        max_workers: int = None,
+        timeout: int = None,
+    ):
+        self.api_key = api_key
+        self.model_id = model_id or DEFAULT_MODEL
+        self.voice_settings = voice_settings or {}
+        self.output_format = output_format or DEFAULT_OUTPUT_FORMAT
+        self.max_workers = max(1, max_workers or getattr(settings, 'MARKETING_TTS_CONCURRENCY', 3))
+        self.timeout = timeout or getattr(settings, 'MARKETING_TTS_TIMEOUT', 60)
+        self.cache = get_media_cache()
+        self.session = requests.Session()
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _cache_params(self, voice_id: str) -> dict:
+        return {
+            'kind': 'tts',
+            'voice_id': voice_id,
+            'model': self.model_id,
+            'format': self.output_format,
+            'voice_settings': self.voice_settings,
+        }
+
+    @staticmethod
+    def _text_digest(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def cached_chunk(self, text: str, voice_id: str) -> Optional[str]:
+        """Chemin du morceau en cache, ou None"""
+        return self.cache.get_derived(self._text_digest(text), self._cache_params(voice_id), '.mp3')
+
+    # ------------------------------------------------------------------
+    # Synthèse
+    # ------------------------------------------------------------------
+
+    def synthesize(self, text: str, voice_id: str, output_path: str) -> TTSResult:
+        """
+        Synthétise le texte complet dans output_path (MP3).
+
+        Raises:
+            TTSError: un morceau n'a pas pu être synthétisé
+        """
+        start = time.perf_counter()
+        chunks = split_sentences(text)
+        if not chunks:
+            raise TTSError("Texte vide")
+
+        cached = [self.cached_chunk(chunk, voice_id) for chunk in chunks]
+        missing = [i for i, path in enumerate(cached) if path is None]
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                futures = {i: pool.submit(self._synthesize_chunk, chunks, i, voice_id) for i in missing}
+                for i, future in futures.items():
+                    cached[i] = future.result()
+
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        if len(cached) == 1:
+            self.cache.link_into(cached[0], output_path)
+        else:
+            self._concat(cached, output_path)
+
+        result = TTSResult(
+            path=output_path,
+            chunks=len(chunks),
+            cached_chunks=len(chunks) - len(missing),
+            characters=sum(len(c) for c in chunks),
+            billed_characters=sum(len(chunks[i]) for i in missing),
+            seconds=time.perf_counter() - start,
+        )
+        logger.info(
+            f"TTS {voice_id}: {result.chunks} morceaux ({result.cached_chunks} en cache), "
+            f"{result.billed_characters}/{result.characters} caractères facturés, {result.seconds:.1f}s"
+        )
+        return result
+
+    def _synthesize_chunk(self, chunks: List[str], index: int, voice_id: str) -> str:
+        """Synthétise un morceau dans le cache et retourne son chemin"""
+        text = chunks[index]
+
+        def build(tmp_path):
+            self._stream_to_file(
+                text,
+                voice_id,
+                tmp_path,
+                # Contexte des morceaux voisins : intonation continue entre morceaux
+                previous_text=chunks[index - 1] if index > 0 else None,
+                next_text=chunks[index + 1] if index + 1 < len(chunks) else None,
+            )
+            return True
+
+        path = self.cache.get_or_create_derived(
+            self._text_digest(text), self._cache_params(voice_id), '.mp3', build
+        )
+        if not path:
+            raise TTSError(f"Morceau {index + 1}/{len(chunks)} vide")
+        return path
+
+    def _stream_to_file(self, text: str, voice_id: str, path: str, previous_text=None, next_text=None):
+        """Appel streaming ElevenLabs, écrit au fil de l'eau (429 : backoff partagé)"""
+        payload = {'text': text, 'model_id': self.model_id}
+        if self.voice_settings:
+            payload['voice_settings'] = self.voice_settings
+        if previous_text:
+            payload['previous_text'] = previous_text
+        if next_text:
+            payload['next_text'] = next_text
+
+        governor = get_governor('elevenlabs')
+        for attempt in range(governor.max_retries + 1):
+            with governor.slot():
+                with self.session.post(
+                    API_URL.format(voice_id=voice_id),
+                    params={'output_format': self.output_format},
+                    headers={'xi-api-key': self.api_key, 'Content-Type': 'application/json'},
+                    json=payload,
+                    stream=True,
+                    timeout=self.timeout,
+                ) as response:
+                    if response.status_code == 429 and attempt < governor.max_retries:
+                        delay = governor.backoff(attempt)
+                        logger.warning(f"ElevenLabs: 429, nouvel essai dans {delay:.1f}s")
+                        continue
+                    if not response.ok:
+                        raise TTSError(f"ElevenLabs HTTP {response.status_code}: {response.text[:200]}")
+
+                    with open(path, 'wb') as f:
+                        for data in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                            if data:
+                                f.write(data)
+                    return
+
+    @staticmethod
+    def _concat(paths: List[str], output_path: str):
+        """
+        Recolle les MP3 sans réencodage (FFmpeg concat demuxer).
+
+        Écrit dans un fichier temporaire puis le renomme : output_path peut
+        être un hard link vers un morceau du cache (synthèse précédente à un
+        seul morceau), qu'un `ffmpeg -y` tronquerait sur place.
+        """
+        fd, list_path = tempfile.mkstemp(suffix='.txt')
+        out_fd, tmp_path = tempfile.mkstemp(
+            suffix='.mp3', dir=os.path.dirname(output_path) or '.'
+        )
+        os.close(out_fd)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                for path in paths:
+                    f.write(f"file '{path}'\n")
+
+            result = subprocess.run(
+                [
+                    'ffmpeg', '-y', '-f', 'concat', '-safe', '0',
+                    '-i', list_path, '-c', 'copy', tmp_path,
+                ],
+                capture_output=True, text=True, timeout=120,
+            )
+            if result.returncode != 0:
+                raise TTSError(f"Concat audio échoué: {result.stderr[-300:]}")
+            os.replace(tmp_path, output_path)
+        finally:
+            os.remove(list_path)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
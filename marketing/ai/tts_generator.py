@@ -1,8 +1,14 @@
 """
 Générateur de voix-off avec ElevenLabs TTS
+
+La synthèse passe par ChunkedTTS : découpage par phrases, morceaux en
+parallèle via l'endpoint streaming, cache par (voix, modèle, texte).
 """
 import os
-from elevenlabs import generate, set_api_key, voices, Voice
+import tempfile
+from elevenlabs import set_api_key, voices, Voice
+
+from .tts_chunked import ChunkedTTS
 
 
 class TTSGenerator:
@@ -15,6 +21,7 @@ class TTSGenerator:
             raise ValueError("ELEVENLABS_API_KEY non configurée")
         
         set_api_key(api_key)
+        self.api_key = api_key
         
         # Voix par défaut (multilingue, supporte français)
         self.default_voice = "Adam"  # Voix masculine, claire
@@ -22,6 +29,24 @@ class TTSGenerator:
         
         self.default_model = "eleven_multilingual_v2"  # Supporte français
     
+    # Noms de voix déjà résolus en voice_id (partagé entre instances)
+    _voice_ids = {}
+    
+    def _voice_id(self, voice: str) -> str:
+        """Résout un nom de voix ("Adam") en voice_id ; un voice_id est retourné tel quel"""
+        if voice in self._voice_ids:
+            return self._voice_ids[voice]
+        if len(voice) >= 20 and voice.isalnum():
+            return voice
+        voice_id = self.get_voice_by_name(voice).voice_id
+        self._voice_ids[voice] = voice_id
+        return voice_id
+    
+    def _synthesize(self, text: str, file_path: str, voice: str = None, model: str = None):
+        """Synthèse par morceaux directement dans file_path"""
+        tts = ChunkedTTS(self.api_key, model_id=model or self.default_model)
+        return tts.synthesize(text, self._voice_id(voice or self.default_voice), file_path)
+    
     def generate(
         self,
         text: str,
@@ -39,22 +64,23 @@ class TTSGenerator:
         Returns:
             Audio en bytes (MP3)
         """
-        voice = voice or self.default_voice
-        model = model or self.default_model
+        fd, tmp_path = tempfile.mkstemp(suffix='.mp3')
+        os.close(fd)
         
         try:
-            audio_bytes = generate(
-                text=text,
-                voice=voice,
-                model=model
-            )
+            result = self._synthesize(text, tmp_path, voice, model)
+            with open(tmp_path, 'rb') as f:
+                audio_bytes = f.read()
             
-            print(f"✅ Audio généré : {len(text)} caractères")
+            print(f"✅ Audio généré : {len(text)} caractères ({result.cached_chunks}/{result.chunks} morceaux en cache)")
             return audio_bytes
         
         except Exception as e:
             print(f"❌ Erreur génération audio : {e}")
             raise
+        
+        finally:
+            os.remove(tmp_path)
     
     def save_audio(
         self,
@@ -72,12 +98,14 @@ class TTSGenerator:
             voice: Nom de la voix
             model: Modèle TTS
         """
-        audio_bytes = self.generate(text, voice, model)
-        
-        with open(file_path, 'wb') as f:
-            f.write(audio_bytes)
+        # Écrit directement sur disque, sans passer l'audio complet en mémoire
+        try:
+            result = self._synthesize(text, file_path, voice, model)
+        except Exception as e:
+            print(f"❌ Erreur génération audio : {e}")
+            raise
         
-        print(f"✅ Audio sauvegardé : {file_path}")
+        print(f"✅ Audio sauvegardé : {file_path} ({result.cached_chunks}/{result.chunks} morceaux en cache)")
     
     def list_voices(self) -> list:
         """
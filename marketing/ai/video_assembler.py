@@ -11,12 +11,32 @@ import json
 from pathlib import Path
 from django.conf import settings
 
+from .media_cache import get_media_cache, file_digest, params_key
+from .downloader import get_download_manager, DownloadItem
+from .ffmpeg_editor import _escape_filter_path
+from .media_probe import matches_target, probe_file
+from .subtitles import ASS_STYLE, SUBTITLE_PARAMS, SegmentText, SubtitleTrack, write_ass
+
 
 # Dimensions TikTok
 TARGET_WIDTH = 1080
 TARGET_HEIGHT = 1920
 TARGET_FPS = 30
 
+# Paramètres de normalisation (font partie de la clé de cache :
+# toute modification invalide automatiquement les segments normalisés)
+NORMALIZE_PARAMS = {
+    'width': TARGET_WIDTH,
+    'height': TARGET_HEIGHT,
+    'fps': TARGET_FPS,
+    'vcodec': 'libx264',
+    'preset': 'fast',
+    'crf': 23,
+    'acodec': 'aac',
+    'ar': 44100,
+    'ac': 2,
+}
+
 
 class VideoAssembler:
     """
@@ -28,6 +48,12 @@ class VideoAssembler:
         self.job = job
         self.output_dir = os.path.join(settings.MEDIA_ROOT, 'marketing', 'output', str(job.pk))
         os.makedirs(self.output_dir, exist_ok=True)
+        self.cache = get_media_cache()
+        self.downloader = get_download_manager()
+        # Empreintes déjà calculées (évite de re-hasher un fichier téléchargé)
+        self._digests = {}
+        # (fichier normalisé, empreinte) de chaque segment (durée réelle des sous-titres)
+        self._normalized = {}
     
     def assemble(self, add_subtitles=True, music_path=None):
         """
@@ -46,6 +72,9 @@ class VideoAssembler:
             raise ValueError("Aucun segment à assembler")
         
         # 1. Préparer les fichiers de chaque segment
+        # (téléchargements IA lancés en parallèle avant la normalisation)
+        self._prefetch_downloads(segments)
+        
         segment_files = []
         for seg in segments:
             file_path = self._get_segment_file(seg)
@@ -62,9 +91,9 @@ class VideoAssembler:
         
         # 3. Ajouter sous-titres
         if add_subtitles:
-            srt_path = self._generate_srt()
-            if srt_path:
-                concat_path = self._burn_subtitles(concat_path, srt_path)
+            ass_path = self._generate_subtitles(segments)
+            if ass_path:
+                concat_path = self._burn_subtitles(concat_path, ass_path)
         
         # 4. Ajouter musique de fond
         if music_path and os.path.exists(music_path):
@@ -98,36 +127,103 @@ class VideoAssembler:
         
         return None
     
+    def _prefetch_downloads(self, segments):
+        """
+        Télécharge en parallèle toutes les vidéos IA du job absentes du cache.
+        Les fichiers sont ensuite servis par _download_video depuis le cache.
+        """
+        items = []
+        seen = set()
+        for seg in segments:
+            if seg.source_type == 'uploaded_clip' and seg.uploaded_clip:
+                continue
+            url = seg.video_url
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            digest = self.cache.lookup_url(url)
+            if digest and self.cache.get_object(digest, '.mp4'):
+                continue
+            items.append(DownloadItem(url=url, dest_path=self.cache.temp_path(suffix='.mp4')))
+        
+        if not items:
+            return
+        
+        paths = self.downloader.download_many(items)
+        
+        for item in items:
+            path = paths.get(item.url)
+            if path:
+                digest = self.cache.put_file(path, move=True)
+                self.cache.remember_url(item.url, digest)
+            elif os.path.exists(item.dest_path):
+                os.remove(item.dest_path)
+    
     def _download_video(self, url, index):
-        """Télécharge une vidéo depuis une URL"""
-        import requests
-        
+        """
+        Télécharge une vidéo depuis une URL via le cache média.
+        Une URL déjà téléchargée (même job ou autre) n'est pas re-téléchargée.
+        """
         output_path = os.path.join(self.output_dir, f"segment_{index}_raw.mp4")
         
-        if os.path.exists(output_path):
-            return output_path
-        
-        response = requests.get(url, stream=True, timeout=60)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        digest = self.cache.lookup_url(url)
+        cached = self.cache.get_object(digest, '.mp4') if digest else None
+        
+        if not cached:
+            tmp_path = self.cache.temp_path(suffix='.mp4')
+            try:
+                self.downloader.download(url, tmp_path)
+                digest = self.cache.put_file(tmp_path, move=True)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            
+            self.cache.remember_url(url, digest)
+            cached = self.cache.get_object(digest, '.mp4')
         
-        return output_path
+        self._digests[output_path] = digest
+        return self.cache.link_into(cached, output_path)
     
     def _normalize_segment(self, input_path, index):
         """
         Normalise un segment : résolution 1080x1920, 30fps, même codec.
         Gère les clips filmés (potentiellement différentes résolutions).
+        
+        Le résultat est mis en cache par (empreinte source + paramètres) :
+        un segment inchangé n'est jamais ré-encodé, un segment régénéré l'est.
+        Un clip déjà au format cible (analyse ffprobe en base) est concaténé
+        tel quel.
         """
         output_path = os.path.join(self.output_dir, f"segment_{index}_norm.mp4")
         
-        if os.path.exists(output_path):
-            return output_path
+        digest = self._digests.get(input_path) or file_digest(input_path)
+        probe = probe_file(input_path, digest)
         
-        cmd = [
-            'ffmpeg', '-y', '-i', input_path,
+        if probe and matches_target(probe):
+            self._normalized[index] = (input_path, digest)
+            return input_path
+        
+        def build(tmp_path):
+            return self._encode_segment(input_path, tmp_path, probe)
+        
+        cached = self.cache.get_or_create_derived(
+            digest, NORMALIZE_PARAMS, '.mp4', build
+        )
+        
+        if not cached:
+            raise RuntimeError(f"Échec normalisation segment {index}")
+        
+        self._normalized[index] = (cached, params_key(digest, NORMALIZE_PARAMS))
+        return self.cache.link_into(cached, output_path)
+    
+    @staticmethod
+    def _encode_command(input_path, output_path, silent=False):
+        """Commande FFmpeg de normalisation (silent : source sans audio)"""
+        cmd = ['ffmpeg', '-y', '-i', input_path]
+        if silent:
+            # Pas d'audio dans le source : piste silencieuse
+            cmd += ['-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo']
+        cmd += [
             # Scale + pad pour forcer 9:16 sans déformer
             '-vf', (
                 f'scale={TARGET_WIDTH}:{TARGET_HEIGHT}:'
@@ -137,32 +233,32 @@ class VideoAssembler:
             '-r', str(TARGET_FPS),
             '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
             '-c:a', 'aac', '-ar', '44100', '-ac', '2',
-            '-movflags', '+faststart',
-            output_path
         ]
+        if silent:
+            cmd += ['-shortest']
+        cmd += ['-movflags', '+faststart', output_path]
+        return cmd
+    
+    def _encode_segment(self, input_path, output_path, probe=None):
+        """
+        Encode un segment aux paramètres cibles (FFmpeg).
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+        Avec une analyse, la bonne commande est choisie d'emblée ; sans
+        (ffprobe indisponible), essai avec l'audio source puis avec silence.
+        """
+        silent = probe is not None and not probe.has_audio
+        result = subprocess.run(
+            self._encode_command(input_path, output_path, silent=silent),
+            capture_output=True, text=True, timeout=120
+        )
         
-        if result.returncode != 0:
-            # Si pas d'audio dans le source, ajouter silence
-            cmd_no_audio = [
-                'ffmpeg', '-y', '-i', input_path,
-                '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo',
-                '-vf', (
-                    f'scale={TARGET_WIDTH}:{TARGET_HEIGHT}:'
-                    f'force_original_aspect_ratio=decrease,'
-                    f'pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2:black'
-                ),
-                '-r', str(TARGET_FPS),
-                '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
-                '-c:a', 'aac', '-ar', '44100', '-ac', '2',
-                '-shortest',
-                '-movflags', '+faststart',
-                output_path
-            ]
-            subprocess.run(cmd_no_audio, capture_output=True, text=True, timeout=120)
+        if result.returncode != 0 and probe is None:
+            result = subprocess.run(
+                self._encode_command(input_path, output_path, silent=True),
+                capture_output=True, text=True, timeout=120
+            )
         
-        return output_path
+        return result.returncode == 0
     
     def _concat_segments(self, segment_files):
         """Concatène tous les segments normalisés"""
@@ -182,76 +278,84 @@ class VideoAssembler:
             concat_path
         ]
         
-        subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        
+        if result.returncode != 0 or not os.path.exists(concat_path):
+            raise RuntimeError(f"Échec concaténation des segments: {result.stderr[-500:]}")
         
         return concat_path
     
-    def _generate_srt(self):
+    def _generate_subtitles(self, segments):
         """
-        Génère un fichier SRT depuis les prompts/scripts des segments.
-        Style TikTok : texte court par segment.
-        """
-        srt_path = os.path.join(self.output_dir, f"subtitles_{self.job.pk}.srt")
+        Génère le fichier ASS depuis les textes des segments.
         
-        segments = self.job.generations.order_by('segment_index')
-        
-        current_time = 0.0
-        srt_entries = []
-        
-        for i, seg in enumerate(segments, 1):
-            start = current_time
-            end = current_time + seg.duration
-            
-            # Texte du sous-titre (prompt = texte du script)
-            text = seg.prompt.strip()
-            # Limiter à 2 lignes de ~40 chars
-            if len(text) > 80:
-                mid = len(text) // 2
-                # Trouver l'espace le plus proche du milieu
-                space = text.rfind(' ', 0, mid + 10)
-                if space > 0:
-                    text = text[:space] + '\n' + text[space+1:]
-            
-            srt_entries.append(
-                f"{i}\n"
-                f"{self._format_srt_time(start)} --> {self._format_srt_time(end)}\n"
-                f"{text}\n"
-            )
-            
-            current_time = end
-        
-        with open(srt_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(srt_entries))
-        
-        return srt_path
+        Chaque segment est calé sur la durée réelle de son fichier normalisé
+        (analyse ffprobe en base), ou sur les horodatages de mots fournis dans
+        job.config['subtitle_words'] ({index: [{'word', 'start', 'end'}]}).
+        Les répliques d'un segment inchangé viennent du cache.
+        """
+        words = self.job.get_config('subtitle_words') or {}
+        parts = []
+        for seg in segments:
+            normalized = self._normalized.get(seg.segment_index)
+            if not normalized:
+                continue
+            path, key = normalized
+            probe = probe_file(path, key)
+            duration = probe.duration if probe and probe.duration else float(seg.duration)
+            parts.append(SegmentText(
+                key=key,
+                text=seg.prompt.strip(),
+                duration=duration,
+                words=words.get(str(seg.segment_index)),
+            ))
+        
+        track = SubtitleTrack(cache=self.cache)
+        cues = track.build(parts)
+        if not cues:
+            return None
+        
+        ass_path = os.path.join(self.output_dir, f"subtitles_{self.job.pk}.ass")
+        write_ass(cues, ass_path, TARGET_WIDTH, TARGET_HEIGHT)
+        return ass_path
     
-    def _burn_subtitles(self, video_path, srt_path):
-        """Brûle les sous-titres dans la vidéo (style TikTok)"""
-        output_path = os.path.join(self.output_dir, f"subtitled_{self.job.pk}.mp4")
+    def _burn_subtitles(self, video_path, ass_path):
+        """
+        Brûle les sous-titres dans la vidéo (libass, style TikTok).
         
-        # Style TikTok : blanc, gras, ombre, centré en bas
-        subtitle_style = (
-            "FontName=Arial,FontSize=22,PrimaryColour=&H00FFFFFF,"
-            "OutlineColour=&H00000000,BackColour=&H80000000,"
-            "Bold=1,Outline=2,Shadow=1,Alignment=2,MarginV=80"
-        )
+        Mis en cache par (vidéo, sous-titres) : un assemblage identique
+        n'est pas ré-encodé.
+        """
+        output_path = os.path.join(self.output_dir, f"subtitled_{self.job.pk}.mp4")
         
-        cmd = [
-            'ffmpeg', '-y', '-i', video_path,
-            '-vf', f"subtitles={srt_path}:force_style='{subtitle_style}'",
-            '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
-            '-c:a', 'copy',
-            '-movflags', '+faststart',
-            output_path
-        ]
+        params = {
+            'subtitles': file_digest(ass_path),
+            'style': ASS_STYLE,
+            'layout': SUBTITLE_PARAMS,
+            'vcodec': 'libx264',
+            'preset': 'fast',
+            'crf': 23,
+        }
+        
+        def build(tmp_path):
+            cmd = [
+                'ffmpeg', '-y', '-i', video_path,
+                '-vf', f"ass={_escape_filter_path(ass_path)}",
+                '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
+                '-c:a', 'copy',
+                '-movflags', '+faststart',
+                tmp_path
+            ]
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            return result.returncode == 0
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        cached = self.cache.get_or_create_derived(file_digest(video_path), params, '.mp4', build)
         
-        if result.returncode != 0:
+        if not cached:
             # Si erreur sous-titres, retourner vidéo sans
             return video_path
         
-        return output_path
+        return self.cache.link_into(cached, output_path)
     
     def _add_music(self, video_path, music_path, volume=0.15):
         """Ajoute musique de fond avec volume réduit"""
@@ -278,12 +382,3 @@ class VideoAssembler:
             return video_path
         
         return output_path
-    
-    @staticmethod
-    def _format_srt_time(seconds):
-        """Convertit secondes en format SRT (HH:MM:SS,mmm)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
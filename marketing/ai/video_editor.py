@@ -309,12 +309,34 @@ def transcribe_audio_api(audio_path: str) -> list:
         return []
 
 
+def get_video_editor(backend: str = None):
+    """
+    Retourne l'éditeur vidéo selon le backend.
+    
+    Args:
+        backend: 'moviepy' (défaut) ou 'ffmpeg' (rapide, faible mémoire)
+                 Si None, utilise MARKETING_VIDEO_EDITOR_BACKEND depuis settings
+    """
+    from django.conf import settings
+    
+    backend = (backend or getattr(settings, 'MARKETING_VIDEO_EDITOR_BACKEND', 'moviepy')).lower()
+    
+    if backend == 'ffmpeg':
+        from .ffmpeg_editor import FFmpegVideoEditor
+        return FFmpegVideoEditor()
+    if backend == 'moviepy':
+        return VideoEditor()
+    
+    raise ValueError(f"Backend de montage inconnu: {backend} (ffmpeg|moviepy)")
+
+
 # Fonctions helpers pour usage rapide
 def create_video(
     image_paths: list,
     audio_path: str,
     output_path: str,
-    with_subtitles: bool = False
+    with_subtitles: bool = False,
+    backend: str = None
 ) -> dict:
     """
     Fonction rapide pour créer une vidéo
@@ -324,6 +346,7 @@ def create_video(
         audio_path: Chemin du fichier audio
         output_path: Chemin de sauvegarde
         with_subtitles: Activer les sous-titres automatiques (Whisper)
+        backend: 'ffmpeg' ou 'moviepy' (défaut: settings)
     
     Returns:
         {'duration': ..., 'file_size_mb': ..., 'resolution': ..., 'fps': ...}
@@ -337,7 +360,7 @@ def create_video(
         metadata = create_video(images, audio, '/tmp/final.mp4', with_subtitles=True)
         print(f"✅ Vidéo : {metadata['duration']}s, {metadata['file_size_mb']}MB")
     """
-    editor = VideoEditor()
+    editor = get_video_editor(backend)
     
     subtitles = None
     if with_subtitles:
@@ -3,6 +3,7 @@ Factory pour les providers de génération vidéo.
 Permet de switcher facilement entre providers via configuration.
 """
 
+import os
 from django.conf import settings
 from typing import Optional
 from .base import VideoProvider, VideoGenerationResult
@@ -11,6 +12,7 @@ from .runway import RunwayProvider
 from .pika import PikaProvider
 from .stability import StabilityProvider
 from .minimax import MiniMaxProvider
+from .mock import MockProvider
 
 
 # Registry des providers disponibles
@@ -20,6 +22,7 @@ PROVIDERS = {
     'pika': PikaProvider,
     'stability': StabilityProvider,
     'minimax': MiniMaxProvider,
+    'mock': MockProvider,  # Simulé (benchmarks), jamais choisi en mode 'auto'
 }
 
 
@@ -59,19 +62,20 @@ def get_provider(provider_name: Optional[str] = None) -> VideoProvider:
             f"Disponibles: {available}"
         )
     
-    # Récupère l'API key correspondante
+    provider_class = PROVIDERS[provider_name]
+    
+    # Récupère l'API key correspondante (settings, sinon environnement)
     api_key_var = f"{provider_name.upper()}_API_KEY"
-    api_key = getattr(settings, api_key_var, None)
+    api_key = getattr(settings, api_key_var, None) or os.environ.get(api_key_var)
     
-    if not api_key:
+    if not api_key and provider_class.requires_api_key:
         raise ValueError(
             f"API key manquante: {api_key_var} "
             f"Configurez-la dans .env.production"
         )
     
     # Instancie le provider
-    provider_class = PROVIDERS[provider_name]
-    return provider_class(api_key)
+    return provider_class(api_key or '')
 
 
 def get_fallback_provider() -> Optional[VideoProvider]:
@@ -97,23 +101,31 @@ def list_available_providers() -> dict:
     Liste tous les providers disponibles avec leur statut.
     
     Returns:
-        Dict {provider_name: {available: bool, api_key_configured: bool}}
+        Dict {provider_name: {available: bool, api_key_configured: bool, throttle: dict}}
     """
+    from ..rate_governor import governor_stats
+    
+    throttle = governor_stats()
     result = {}
     
     for name in PROVIDERS.keys():
         api_key_var = f"{name.upper()}_API_KEY"
-        api_key = getattr(settings, api_key_var, None)
+        api_key = getattr(settings, api_key_var, None) or os.environ.get(api_key_var)
         
         result[name] = {
             'available': True,
-            'api_key_configured': bool(api_key),
-            'class': PROVIDERS[name].__name__
+            'api_key_configured': bool(api_key) or not PROVIDERS[name].requires_api_key,
+            'class': PROVIDERS[name].__name__,
+            'throttle': throttle.get(name, {}),
         }
     
     return result
 
 
+# Routage multi-provider (importé après PROVIDERS/get_provider qu'il utilise)
+from .router import ProviderRouter, BudgetExceeded  # noqa: E402
+
+
 # Expose les classes principales
 __all__ = [
     'VideoProvider',
@@ -123,7 +135,10 @@ __all__ = [
     'PikaProvider',
     'StabilityProvider',
     'MiniMaxProvider',
+    'MockProvider',
     'get_provider',
     'get_fallback_provider',
     'list_available_providers',
+    'ProviderRouter',
+    'BudgetExceeded',
 ]
@@ -4,9 +4,12 @@ Permet de switcher facilement entre Luma, Runway, Pika, etc.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 
+from ..rate_governor import governed
+
 
 @dataclass
 class VideoGenerationResult:
@@ -24,8 +27,33 @@ class VideoProvider(ABC):
     Classe abstraite pour tous les providers de génération vidéo.
     
     Chaque provider doit implémenter ces méthodes.
+    
+    generate_clip et get_status sont automatiquement passés par le
+    gouverneur du provider (débit/concurrence, attente sur 429).
     """
     
+    # Durées de clip acceptées par l'API (vide = toute durée)
+    supported_durations: tuple = ()
+    
+    # Clé API obligatoire (False pour le provider simulé)
+    requires_api_key = True
+    
+    # Provider simulé : exclu du routage 'auto'
+    offline = False
+    
+    # Méthodes soumises au gouverneur de débit
+    GOVERNED_METHODS = ('generate_clip', 'get_status')
+    
+    # Appels get_status simultanés dans get_status_many (par défaut)
+    STATUS_CONCURRENCY = 8
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for method in cls.GOVERNED_METHODS:
+            func = cls.__dict__.get(method)
+            if func is not None and not getattr(func, '_governed', False):
+                setattr(cls, method, governed()(func))
+    
     def __init__(self, api_key: str, **kwargs):
         self.api_key = api_key
         self.config = kwargs
@@ -65,6 +93,29 @@ class VideoProvider(ABC):
         """
         pass
     
+    def get_status_many(self, job_ids: List[str]) -> Dict[str, VideoGenerationResult]:
+        """
+        Récupère le statut de plusieurs générations.
+        
+        Implémentation par défaut : get_status en parallèle (chaque appel
+        reste soumis au gouverneur). Les providers dont l'API permet de
+        lister les générations la surchargent avec un appel groupé.
+        
+        Args:
+            job_ids: IDs des jobs de génération
+        
+        Returns:
+            Dict {job_id: VideoGenerationResult}
+        """
+        job_ids = list(dict.fromkeys(j for j in job_ids if j))
+        if not job_ids:
+            return {}
+        if len(job_ids) == 1:
+            return {job_ids[0]: self.get_status(job_ids[0])}
+        
+        with ThreadPoolExecutor(max_workers=min(len(job_ids), self.STATUS_CONCURRENCY)) as pool:
+            return dict(zip(job_ids, pool.map(self.get_status, job_ids)))
+    
     @abstractmethod
     def estimate_cost(self, duration: int) -> float:
         """
@@ -83,6 +134,32 @@ class VideoProvider(ABC):
         """Retourne le nom du provider"""
         pass
     
+    def snap_duration(self, duration: int) -> Optional[int]:
+        """
+        Durée réellement générée pour une durée demandée : la plus courte
+        durée supportée qui couvre la demande (le clip sera coupé au montage).
+        
+        Returns:
+            Durée en secondes, ou None si le provider ne peut pas la couvrir
+        """
+        if not self.supported_durations:
+            return duration
+        candidates = [d for d in self.supported_durations if d >= duration]
+        return min(candidates) if candidates else None
+    
+    def generation_params(self, **kwargs) -> Dict[str, str]:
+        """
+        Modèle et résolution effectivement utilisés pour une génération
+        (font partie de la clé du cache de génération).
+        
+        Args:
+            **kwargs: Paramètres passés à generate_clip
+        """
+        return {
+            'model': str(kwargs.get('model') or self.config.get('model', '')),
+            'resolution': str(kwargs.get('resolution') or self.config.get('resolution', '')),
+        }
+    
     def cancel_job(self, job_id: str) -> bool:
         """
         Annule un job en cours (optionnel).
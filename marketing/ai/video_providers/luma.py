@@ -7,6 +7,7 @@ import requests
 import time
 from typing import Optional
 from .base import VideoProvider, VideoGenerationResult
+from ..rate_governor import governed
 
 
 class LumaProvider(VideoProvider):
@@ -18,6 +19,11 @@ class LumaProvider(VideoProvider):
     """
     
     BASE_URL = "https://api.lumalabs.ai/dream-machine/v1"
+    supported_durations = (5,)
+    
+    # Listing des générations (get_status_many)
+    LIST_PAGE_SIZE = 100
+    LIST_MAX_PAGES = 3
     
     def __init__(self, api_key: str, **kwargs):
         super().__init__(api_key, **kwargs)
@@ -76,27 +82,7 @@ class LumaProvider(VideoProvider):
                 timeout=10
             )
             response.raise_for_status()
-            data = response.json()
-            
-            # Mapping status Luma → notre format
-            status_map = {
-                "pending": "pending",
-                "processing": "processing",
-                "completed": "completed",
-                "failed": "failed"
-            }
-            
-            status = status_map.get(data.get("state"), "pending")
-            video_url = data.get("assets", {}).get("video") if status == "completed" else None
-            
-            return VideoGenerationResult(
-                job_id=job_id,
-                status=status,
-                video_url=video_url,
-                progress=self._calculate_progress(data.get("state")),
-                error_message=data.get("failure_reason") if status == "failed" else None,
-                metadata=data
-            )
+            return self._to_result(job_id, response.json())
             
         except requests.exceptions.RequestException as e:
             return VideoGenerationResult(
@@ -105,6 +91,71 @@ class LumaProvider(VideoProvider):
                 error_message=f"Status check error: {str(e)}"
             )
     
+    def get_status_many(self, job_ids):
+        """
+        Statut groupé : parcourt la liste des générations récentes
+        (100 par page) au lieu d'un GET par job. Les jobs absents des
+        pages parcourues sont vérifiés individuellement.
+        """
+        wanted = set(j for j in job_ids if j)
+        results = {}
+        
+        try:
+            for page in range(self.LIST_MAX_PAGES):
+                data = self._list_generations(limit=self.LIST_PAGE_SIZE, offset=page * self.LIST_PAGE_SIZE)
+                for generation in data.get("generations", []):
+                    gen_id = generation.get("id")
+                    if gen_id in wanted:
+                        results[gen_id] = self._to_result(gen_id, generation)
+                
+                if wanted <= set(results) or not data.get("has_more"):
+                    break
+        except requests.exceptions.RequestException:
+            pass  # Repli sur les appels individuels
+        
+        missing = [j for j in wanted if j not in results]
+        if missing:
+            results.update(super().get_status_many(missing))
+        
+        return results
+    
+    @governed()
+    def _list_generations(self, limit: int, offset: int) -> dict:
+        response = requests.get(
+            f"{self.BASE_URL}/generations",
+            headers=self.headers,
+            params={"limit": limit, "offset": offset},
+            timeout=15
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def _to_result(self, job_id: str, data: dict) -> VideoGenerationResult:
+        """Convertit une génération Luma en VideoGenerationResult"""
+        # Mapping status Luma → notre format
+        status_map = {
+            "pending": "pending",
+            "processing": "processing",
+            "completed": "completed",
+            "failed": "failed"
+        }
+        
+        status = status_map.get(data.get("state"), "pending")
+        video_url = data.get("assets", {}).get("video") if status == "completed" else None
+        
+        return VideoGenerationResult(
+            job_id=job_id,
+            status=status,
+            video_url=video_url,
+            progress=self._calculate_progress(data.get("state")),
+            error_message=data.get("failure_reason") if status == "failed" else None,
+            metadata=data
+        )
+    
+    def generation_params(self, **kwargs):
+        # Modèle fixe (voir generate_clip)
+        return {'model': 'ray-2', 'resolution': ''}
+    
     def estimate_cost(self, duration: int) -> float:
         """Estime le coût (Luma: ~$0.03/sec)"""
         return duration * 0.03
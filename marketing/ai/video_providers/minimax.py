@@ -29,6 +29,7 @@ class MiniMaxProvider(VideoProvider):
     """
     
     BASE_URL = "https://api.minimax.io/v1"
+    supported_durations = (6, 10)
     
     # Modèles disponibles
     MODELS = {
@@ -234,6 +235,20 @@ class MiniMaxProvider(VideoProvider):
         except Exception:
             return None
     
+    def snap_duration(self, duration: int):
+        """6s ou 10s selon le modèle/résolution (pas de 10s en 1080P)."""
+        pricing = self.PRICING.get(self.default_model, {}).get(self.default_resolution)
+        durations = tuple(pricing) if pricing else self.supported_durations
+        candidates = [d for d in durations if d >= duration]
+        return min(candidates) if candidates else None
+    
+    def generation_params(self, **kwargs):
+        model = kwargs.get('model', self.default_model)
+        return {
+            'model': self.MODELS.get(model, model),
+            'resolution': kwargs.get('resolution', self.default_resolution),
+        }
+    
     def estimate_cost(self, duration: int) -> float:
         """
         Estime le coût pour une durée donnée.
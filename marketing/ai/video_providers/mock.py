@@ -0,0 +1,253 @@
+"""
+Provider simulé, pour exercer le pipeline sans API payante.
+
+- Latences configurables (lancement, génération, polling) selon une
+  distribution : fixed, uniform, normal ou lognormal
+- Taux d'échec au lancement, en fin de génération et de réponses 429
+- Clips synthétiques générés localement par FFmpeg (mire testsrc2),
+  servis en file:// et mis en cache sur disque
+
+Sans état : l'échéance et l'issue de chaque génération sont encodées dans
+le job_id, le polling fonctionne donc depuis n'importe quel process.
+
+Configuration (settings) :
+    MARKETING_MOCK_PROVIDER = {
+        'generation_latency': {'dist': 'lognormal', 'median': 5.0, 'sigma': 0.5},
+        'failure_rate': 0.05,
+    }
+"""
+
+import logging
+import math
+import os
+import random
+import subprocess
+import threading
+import time
+import uuid
+from typing import Optional
+
+from django.conf import settings
+
+from .base import VideoProvider, VideoGenerationResult
+
+logger = logging.getLogger(__name__)
+
+# Dimensions des clips synthétiques par ratio
+CLIP_SIZES = {
+    '9:16': (720, 1280),
+    '16:9': (1280, 720),
+    '1:1': (720, 720),
+}
+
+DEFAULT_CONFIG = {
+    'launch_latency': {'dist': 'fixed', 'value': 0.05},
+    'generation_latency': {'dist': 'lognormal', 'median': 5.0, 'sigma': 0.5},
+    'status_latency': {'dist': 'fixed', 'value': 0.02},
+    'launch_failure_rate': 0.0,
+    'failure_rate': 0.0,
+    'rate_limit_rate': 0.0,
+    'cost_per_second': 0.0,
+    'clips': True,
+    'clip_variants': 4,
+}
+
+_clips_lock = threading.Lock()
+
+
+def mock_clips_dir() -> str:
+    """Dossier des clips synthétiques (seul dossier servi en file://)"""
+    return getattr(settings, 'MARKETING_MOCK_PROVIDER', {}).get('clips_dir') or os.path.join(
+        settings.MEDIA_ROOT, 'marketing', 'mock_clips'
+    )
+
+
+def sample_latency(spec, rng=random) -> float:
+    """
+    Tire une latence (secondes) selon une spécification.
+
+    Args:
+        spec: Nombre (latence fixe) ou dict :
+            {'dist': 'fixed', 'value': 2}
+            {'dist': 'uniform', 'min': 1, 'max': 5}
+            {'dist': 'normal', 'mean': 3, 'stddev': 1}
+            {'dist': 'lognormal', 'median': 3, 'sigma': 0.5}
+    """
+    if spec is None:
+        return 0.0
+    if isinstance(spec, (int, float)):
+        return max(0.0, float(spec))
+
+    dist = spec.get('dist', 'fixed')
+    if dist == 'fixed':
+        value = spec.get('value', 0)
+    elif dist == 'uniform':
+        value = rng.uniform(spec.get('min', 0), spec.get('max', 1))
+    elif dist == 'normal':
+        value = rng.gauss(spec.get('mean', 1), spec.get('stddev', 0))
+    elif dist == 'lognormal':
+        value = rng.lognormvariate(math.log(max(spec.get('median', 1), 1e-6)), spec.get('sigma', 0.5))
+    else:
+        raise ValueError(f"Distribution de latence inconnue: {dist}")
+    return max(0.0, float(value))
+
+
+class MockProvider(VideoProvider):
+    """
+    Provider simulé (benchmarks, tests de charge, démos hors ligne).
+
+    Non retenu par le routage 'auto' : il faut le demander explicitement
+    (job.config['provider'] = 'mock').
+    """
+
+    requires_api_key = False
+    offline = True
+
+    def __init__(self, api_key: str = '', **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.options = {
+            **DEFAULT_CONFIG,
+            **getattr(settings, 'MARKETING_MOCK_PROVIDER', {}),
+            **kwargs,
+        }
+        self.supported_durations = tuple(self.options.get('supported_durations', ()))
+        self.clips_dir = self.options.get('clips_dir') or mock_clips_dir()
+
+    def generate_clip(
+        self,
+        prompt: str,
+        duration: int = 5,
+        aspect_ratio: str = "9:16",
+        **kwargs
+    ) -> VideoGenerationResult:
+        """Simule le lancement d'une génération"""
+        time.sleep(sample_latency(self.options['launch_latency']))
+
+        if random.random() < self.options['rate_limit_rate']:
+            return VideoGenerationResult(
+                job_id="", status="failed", error_message="429 Too Many Requests (mock)"
+            )
+
+        if random.random() < self.options['launch_failure_rate']:
+            return VideoGenerationResult(
+                job_id="", status="failed", error_message="Mock API error: lancement refusé"
+            )
+
+        ready_at = time.time() + sample_latency(self.options['generation_latency'])
+        failed = random.random() < self.options['failure_rate']
+        variant = random.randrange(max(1, self.options['clip_variants']))
+
+        # mock-<id>-<échéance ms>-<échec>-<durée>-<ratio>-<variante>
+        job_id = "mock-{}-{}-{}-{}-{}-{}".format(
+            uuid.uuid4().hex[:8],
+            int(ready_at * 1000),
+            int(failed),
+            int(duration),
+            aspect_ratio.replace(':', 'x'),
+            variant,
+        )
+
+        return VideoGenerationResult(
+            job_id=job_id,
+            status="pending",
+            metadata={"provider": "mock", "prompt": prompt}
+        )
+
+    def get_status(self, job_id: str) -> VideoGenerationResult:
+        """Statut déduit du job_id (échéance, issue)"""
+        time.sleep(sample_latency(self.options['status_latency']))
+
+        try:
+            _prefix, _uid, ready_ms, failed, duration, aspect, variant = job_id.split('-')
+            ready_at = int(ready_ms) / 1000
+        except ValueError:
+            return VideoGenerationResult(
+                job_id=job_id, status="failed", error_message=f"Job mock inconnu: {job_id}"
+            )
+
+        if random.random() < self.options['rate_limit_rate']:
+            return VideoGenerationResult(
+                job_id=job_id, status="failed", error_message="429 Too Many Requests (mock)"
+            )
+
+        remaining = ready_at - time.time()
+        if remaining > 0:
+            return VideoGenerationResult(
+                job_id=job_id,
+                status="processing",
+                progress=max(0, min(99, int(100 - remaining * 10))),
+            )
+
+        if failed == '1':
+            return VideoGenerationResult(
+                job_id=job_id, status="failed", error_message="Mock: génération échouée"
+            )
+
+        video_url = self._clip_url(int(duration), aspect.replace('x', ':'), int(variant))
+        if video_url is None:
+            return VideoGenerationResult(
+                job_id=job_id, status="failed", error_message="Mock: clip synthétique indisponible (ffmpeg)"
+            )
+
+        return VideoGenerationResult(
+            job_id=job_id,
+            status="completed",
+            video_url=video_url,
+            progress=100,
+        )
+
+    def _clip_url(self, duration: int, aspect_ratio: str, variant: int) -> Optional[str]:
+        """URL file:// d'un clip synthétique (généré au premier usage)"""
+        if not self.options['clips']:
+            return f"file://{os.devnull}"
+
+        width, height = CLIP_SIZES.get(aspect_ratio, CLIP_SIZES['9:16'])
+        path = os.path.join(self.clips_dir, f"testsrc_{width}x{height}_{duration}s_v{variant}.mp4")
+
+        with _clips_lock:
+            if not os.path.exists(path):
+                os.makedirs(self.clips_dir, exist_ok=True)
+                if not self._render_clip(path, width, height, duration, variant):
+                    return None
+
+        return f"file://{path}"
+
+    @staticmethod
+    def _render_clip(path: str, width: int, height: int, duration: int, variant: int) -> bool:
+        """Mire testsrc2 + bip, teinte différente par variante"""
+        tmp_path = f"{path}.tmp.mp4"
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate=24:duration={duration}',
+            '-f', 'lavfi', '-i', f'sine=frequency={440 + 110 * variant}:duration={duration}',
+            '-vf', f'hue=h={variant * 90}',
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-shortest',
+            tmp_path,
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.error(f"Mock: rendu du clip impossible ({e})")
+            return False
+
+        if result.returncode != 0:
+            logger.error(f"Mock: ffmpeg a échoué: {result.stderr[-300:]}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        os.replace(tmp_path, path)
+        return True
+
+    def estimate_cost(self, duration: int) -> float:
+        return duration * self.options['cost_per_second']
+
+    def get_provider_name(self) -> str:
+        return "mock"
+
+    def generation_params(self, **kwargs):
+        return {'model': 'mock', 'resolution': ''}
+
+    def validate_config(self) -> bool:
+        return True
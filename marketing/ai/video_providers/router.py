@@ -0,0 +1,395 @@
+"""
+Routage multi-provider pour la génération de segments vidéo.
+
+Pour chaque segment, le router classe les providers configurés selon :
+- le coût (estimate_cost sur la durée réellement générée)
+- la latence de file observée (EWMA lancement → vidéo prête)
+- le taux d'échec observé (EWMA)
+- la charge en cours (segments 'processing' par provider)
+- le support de la durée demandée (ex: MiniMax 6s/10s, Luma 5s)
+
+puis lance sur le meilleur, et bascule automatiquement sur le suivant en
+cas d'erreur. Un budget par job exclut les providers trop chers pour le
+reste à dépenser.
+
+Modes (job.config['provider']) :
+- 'auto'      : tous les providers configurés, classés par score
+- 'minimax'   : ce provider, puis VIDEO_PROVIDER_FALLBACK en secours
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .base import VideoGenerationResult
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetExceeded(ValueError):
+    """Aucun provider ne tient dans le budget restant du job"""
+    pass
+
+
+@dataclass
+class ProviderHealth:
+    """Santé observée d'un provider (moyennes mobiles exponentielles)"""
+    latency: float          # Secondes entre lancement et vidéo prête
+    failure_rate: float     # 0..1
+    samples: int = 0
+
+    def record(self, failed: bool, latency: float = None, alpha: float = 0.2):
+        self.failure_rate = (1 - alpha) * self.failure_rate + alpha * (1.0 if failed else 0.0)
+        if latency is not None and not failed:
+            self.latency = (1 - alpha) * self.latency + alpha * latency
+        self.samples += 1
+
+
+@dataclass
+class RoutedLaunch:
+    """Résultat d'un lancement routé"""
+    provider_name: str
+    result: VideoGenerationResult
+    cost: float
+    duration: int
+    attempts: List[str]
+
+
+# Santé partagée par tout le process (amorcée depuis l'historique en base)
+_health: Dict[str, ProviderHealth] = {}
+_health_lock = threading.Lock()
+
+
+def _ewma_alpha() -> float:
+    return getattr(settings, 'MARKETING_ROUTER_EWMA_ALPHA', 0.2)
+
+
+def get_health(provider_name: str) -> ProviderHealth:
+    """Santé d'un provider, amorcée depuis les derniers segments en base"""
+    with _health_lock:
+        health = _health.get(provider_name)
+        if health is None:
+            health = _seed_health(provider_name)
+            _health[provider_name] = health
+        return health
+
+
+def _seed_health(provider_name: str) -> ProviderHealth:
+    from marketing.models_extended import VideoSegmentGeneration
+
+    health = ProviderHealth(
+        latency=getattr(settings, 'MARKETING_ROUTER_DEFAULT_LATENCY', 120.0),
+        failure_rate=0.0,
+    )
+
+    window = getattr(settings, 'MARKETING_ROUTER_HISTORY', 50)
+    recent = list(
+        VideoSegmentGeneration.objects
+        .filter(
+            provider=provider_name,
+            status__in=[
+                VideoSegmentGeneration.Status.COMPLETED,
+                VideoSegmentGeneration.Status.FAILED,
+            ],
+            started_at__isnull=False,
+        )
+        .order_by('-started_at')
+        .values_list('status', 'started_at', 'completed_at')[:window]
+    )
+
+    # Du plus ancien au plus récent : les derniers pèsent le plus
+    for status, started_at, completed_at in reversed(recent):
+        failed = status == VideoSegmentGeneration.Status.FAILED
+        latency = (completed_at - started_at).total_seconds() if completed_at else None
+        health.record(failed, latency, _ewma_alpha())
+
+    return health
+
+
+def record_outcome(provider_name: str, failed: bool, latency: float = None):
+    """
+    Met à jour la santé d'un provider.
+
+    Args:
+        failed: Lancement refusé ou génération échouée (un lancement accepté
+                n'est compté qu'à la fin de sa génération)
+        latency: Durée lancement → vidéo prête (secondes), si terminé
+    """
+    health = get_health(provider_name)
+    with _health_lock:
+        health.record(failed, latency, _ewma_alpha())
+
+
+class ProviderRouter:
+    """
+    Choisit le provider de chaque segment et bascule en cas d'erreur.
+
+    Usage:
+        router = ProviderRouter(job=job)
+        launch = router.launch(prompt, duration=6)
+        segment.provider = launch.provider_name
+    """
+
+    def __init__(
+        self,
+        job=None,
+        candidates: List[str] = None,
+        budget: float = None,
+        default_provider: str = None,
+    ):
+        """
+        Args:
+            job: VideoProductionJob (config provider, budget, dépense déjà engagée)
+            candidates: Providers autorisés (défaut: selon job.config['provider'])
+            budget: Budget max du job en USD (défaut: job.config['budget_usd']
+                puis MARKETING_ROUTER_JOB_BUDGET ; None = illimité)
+            default_provider: Provider si le job n'en précise pas (défaut: VIDEO_PROVIDER)
+        """
+        from . import get_provider
+
+        self.job = job
+        self.default_provider = default_provider or getattr(settings, 'VIDEO_PROVIDER', 'luma')
+        names = candidates or self._default_candidates()
+        self.auto = candidates is None and self._requested_provider() == 'auto'
+
+        self.providers = {}
+        for name in names:
+            try:
+                self.providers[name] = get_provider(name)
+            except ValueError:
+                continue
+
+        if not self.providers:
+            raise ValueError(
+                f"Aucun provider vidéo configuré parmi: {', '.join(names)}"
+            )
+
+        if budget is None and job is not None:
+            budget = job.get_config('budget_usd')
+        if budget is None:
+            budget = getattr(settings, 'MARKETING_ROUTER_JOB_BUDGET', None)
+        self.budget = float(budget) if budget is not None else None
+
+        self.spent = self._committed_spend()
+        self.in_flight = self._in_flight()
+
+        weights = getattr(settings, 'MARKETING_ROUTER_WEIGHTS', {})
+        self.cost_weight = weights.get('cost', 1.0)
+        self.latency_weight = weights.get('latency', 1.0)
+
+    # ------------------------------------------------------------------
+    # État
+    # ------------------------------------------------------------------
+
+    def _requested_provider(self) -> str:
+        default = self.default_provider
+        if self.job is None:
+            return default
+        return (self.job.get_config('provider', default) or default).lower()
+
+    def _default_candidates(self) -> List[str]:
+        from . import PROVIDERS
+
+        name = self._requested_provider()
+        if name == 'auto':
+            return [n for n, cls in PROVIDERS.items() if not cls.offline]
+
+        fallback = getattr(settings, 'VIDEO_PROVIDER_FALLBACK', None)
+        names = [name]
+        if fallback and fallback != name:
+            names.append(fallback)
+        return names
+
+    def _committed_spend(self) -> float:
+        """Coût déjà engagé sur le job (segments lancés ou terminés)"""
+        if self.job is None or self.job.pk is None:
+            return 0.0
+
+        from django.db.models import Sum
+        from marketing.models_extended import VideoSegmentGeneration
+
+        total = self.job.generations.filter(
+            status__in=[
+                VideoSegmentGeneration.Status.PROCESSING,
+                VideoSegmentGeneration.Status.COMPLETED,
+            ]
+        ).aggregate(total=Sum('cost'))['total']
+        return float(total or 0)
+
+    def _in_flight(self) -> Dict[str, int]:
+        """Segments en cours par provider (tous jobs confondus)"""
+        from django.db.models import Count
+        from marketing.models_extended import VideoSegmentGeneration
+
+        rows = (
+            VideoSegmentGeneration.objects
+            .filter(status=VideoSegmentGeneration.Status.PROCESSING, provider__in=list(self.providers))
+            .values('provider')
+            .annotate(count=Count('id'))
+        )
+        return {row['provider']: row['count'] for row in rows}
+
+    def capacity(self, provider_name: str) -> int:
+        """Nombre de générations simultanées qu'un provider absorbe sans file"""
+        limits = getattr(settings, 'MARKETING_VIDEO_PROVIDER_LIMITS', {})
+        return limits.get(provider_name, {}).get('capacity', 4)
+
+    @property
+    def remaining_budget(self) -> Optional[float]:
+        if self.budget is None:
+            return None
+        return max(0.0, self.budget - self.spent)
+
+    # ------------------------------------------------------------------
+    # Classement
+    # ------------------------------------------------------------------
+
+    def rank(self, duration: int, exclude=()) -> List[dict]:
+        """
+        Classe les providers capables de générer `duration` secondes
+        dans le budget restant, du meilleur au moins bon.
+
+        Returns:
+            Liste de dicts {name, provider, duration, cost, score}
+        """
+        options = []
+        for index, (name, provider) in enumerate(self.providers.items()):
+            if name in exclude:
+                continue
+
+            snapped = provider.snap_duration(duration)
+            if snapped is None:
+                continue
+
+            cost = provider.estimate_cost(snapped)
+            if self.budget is not None and self.spent + cost > self.budget + 1e-9:
+                continue
+
+            health = get_health(name)
+            success = max(0.05, 1.0 - health.failure_rate)
+            load = 1.0 + self.in_flight.get(name, 0) / max(1, self.capacity(name))
+
+            # Coût et latence espérés en tenant compte des échecs (relances)
+            expected_cost = cost / success
+            expected_latency = health.latency * load / success
+
+            options.append({
+                'name': name,
+                'provider': provider,
+                'duration': snapped,
+                'cost': cost,
+                'expected_cost': expected_cost,
+                'expected_latency': expected_latency,
+                'order': index,
+            })
+
+        if not options:
+            return []
+
+        if self.auto:
+            # Normalisation par la meilleure option pour rendre coût et latence comparables
+            min_cost = min(o['expected_cost'] for o in options) or 1e-6
+            min_latency = min(o['expected_latency'] for o in options) or 1e-6
+            for option in options:
+                option['score'] = (
+                    self.cost_weight * option['expected_cost'] / min_cost
+                    + self.latency_weight * option['expected_latency'] / min_latency
+                )
+            options.sort(key=lambda o: o['score'])
+        else:
+            # Provider demandé d'abord, fallback ensuite
+            for option in options:
+                option['score'] = option['order']
+            options.sort(key=lambda o: o['order'])
+
+        return options
+
+    # ------------------------------------------------------------------
+    # Lancement
+    # ------------------------------------------------------------------
+
+    def launch(
+        self,
+        prompt: str,
+        duration: int,
+        aspect_ratio: str = "9:16",
+        provider_kwargs: Dict[str, dict] = None,
+    ) -> RoutedLaunch:
+        """
+        Lance la génération sur le meilleur provider, avec bascule automatique.
+
+        Args:
+            prompt: Prompt du clip
+            duration: Durée demandée (secondes)
+            aspect_ratio: Ratio du clip
+            provider_kwargs: Paramètres spécifiques par provider ({'minimax': {...}})
+
+        Returns:
+            RoutedLaunch (result.status == 'failed' si tous ont échoué)
+
+        Raises:
+            BudgetExceeded: aucun provider ne tient dans le budget restant
+            ValueError: aucun provider ne supporte cette durée
+        """
+        provider_kwargs = provider_kwargs or {}
+        options = self.rank(duration)
+
+        if not options:
+            if self.budget is not None and any(
+                p.snap_duration(duration) is not None for p in self.providers.values()
+            ):
+                raise BudgetExceeded(
+                    f"Budget du job épuisé (${self.spent:.2f}/${self.budget:.2f})"
+                )
+            raise ValueError(f"Aucun provider ne supporte un clip de {duration}s")
+
+        attempts = []
+        errors = []
+
+        for option in options:
+            name = option['name']
+            attempts.append(name)
+
+            try:
+                result = option['provider'].generate_clip(
+                    prompt=prompt,
+                    duration=option['duration'],
+                    aspect_ratio=aspect_ratio,
+                    **provider_kwargs.get(name, {})
+                )
+            except Exception as e:
+                result = VideoGenerationResult(job_id="", status="failed", error_message=str(e))
+
+            if result.status != "failed":
+                # Issue enregistrée à la fin de la génération (poll), pas au
+                # lancement : un segment = un seul échantillon
+                self.spent += option['cost']
+                self.in_flight[name] = self.in_flight.get(name, 0) + 1
+                if len(attempts) > 1:
+                    logger.warning(f"Bascule provider: {' → '.join(attempts)}")
+                return RoutedLaunch(
+                    provider_name=name,
+                    result=result,
+                    cost=option['cost'],
+                    duration=option['duration'],
+                    attempts=attempts,
+                )
+
+            record_outcome(name, failed=True)
+            errors.append(f"{name}: {result.error_message}")
+            logger.warning(f"Provider {name} en échec: {result.error_message}")
+
+        return RoutedLaunch(
+            provider_name=attempts[-1],
+            result=VideoGenerationResult(
+                job_id="",
+                status="failed",
+                error_message=" | ".join(errors),
+            ),
+            cost=0.0,
+            duration=duration,
+            attempts=attempts,
+        )
@@ -16,6 +16,7 @@ class RunwayProvider(VideoProvider):
     """
     
     BASE_URL = "https://api.runwayml.com/v1"
+    supported_durations = (5, 10)
     
     def __init__(self, api_key: str, **kwargs):
         super().__init__(api_key, **kwargs)
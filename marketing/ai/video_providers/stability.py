@@ -17,6 +17,7 @@ class StabilityProvider(VideoProvider):
     """
     
     BASE_URL = "https://api.stability.ai/v2beta"
+    supported_durations = (4,)
     
     def __init__(self, api_key: str, **kwargs):
         super().__init__(api_key, **kwargs)
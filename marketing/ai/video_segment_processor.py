@@ -10,6 +10,7 @@ from django.conf import settings
 
 from marketing.models import VideoSegment, VideoProject
 from marketing.ai.video_providers import get_provider, VideoGenerationResult
+from marketing.ai import generation_cache
 
 logger = logging.getLogger(__name__)
 
@@ -76,8 +77,9 @@ class VideoSegmentProcessor:
                 logger.error(f"Échec segment {segment.order}: {result.error_message}")
                 continue
             
-            # Attend la complétion
-            final_result = self._wait_for_completion(segment, result.job_id)
+            # Attend la complétion (sauf clip servi par le cache)
+            if result.status != 'completed':
+                self._wait_for_completion(segment, result.job_id)
             
             results.append(segment)
         
@@ -108,18 +110,21 @@ class VideoSegmentProcessor:
         start_time = time.time()
         
         while time.time() - start_time < max_wait:
-            # Check tous les segments
+            # Check tous les segments en un appel groupé
             all_done = True
             
-            for segment in segments:
-                if segment.id not in job_ids:
-                    continue
-                
-                if segment.status in ['completed', 'failed']:
+            pending = [
+                segment for segment in segments
+                if segment.id in job_ids and segment.status not in ['completed', 'failed']
+            ]
+            results = self.provider.get_status_many([job_ids[s.id] for s in pending])
+            
+            for segment in pending:
+                result = results.get(job_ids[segment.id])
+                if result is None:
+                    all_done = False
                     continue
                 
-                # Check status
-                result = self.provider.get_status(job_ids[segment.id])
                 self._update_segment_from_result(segment, result)
                 
                 if result.status not in ['completed', 'failed']:
@@ -148,6 +153,12 @@ class VideoSegmentProcessor:
         segment.provider = self.provider_name
         segment.save()
         
+        # Clip identique déjà généré : pas de nouvel appel provider
+        cached = self._reuse_cached_clip(segment)
+        if cached:
+            return cached
+        (segment.metadata or {}).pop('cache_hit', None)
+        
         # Génère la vidéo
         result = self.provider.generate_clip(
             prompt=segment.prompt,
@@ -206,14 +217,68 @@ class VideoSegmentProcessor:
             segment.video_url = result.video_url
             # TODO: Download et upload sur MinIO
         
-        if result.metadata:
-            segment.metadata = result.metadata
+        if result.metadata and segment.status in ('completed', 'failed'):
+            # Réponse brute archivée à part (metadata ne garde que cache_hit)
+            from marketing.models_extended import ProviderPayload
+            from marketing.payloads import store_payload
+
+            store_payload(result.metadata, self.provider_name, ProviderPayload.Kind.STATUS, video_segment=segment)
         
         # Calcul du coût
         if segment.status == 'completed':
             segment.cost_usd = self.provider.estimate_cost(segment.duration)
         
         segment.save()
+        
+        if segment.status == 'completed' and segment.video_url:
+            self._store_in_cache(segment)
+    
+    def _cache_key(self, segment: VideoSegment) -> str:
+        return generation_cache.get_generation_cache().key_for(
+            self.provider, segment.prompt, segment.duration, "9:16"
+        )
+    
+    def _reuse_cached_clip(self, segment: VideoSegment) -> Optional[VideoGenerationResult]:
+        """Sert le segment depuis le cache de génération si un clip identique existe"""
+        if not generation_cache.is_enabled():
+            return None
+        
+        cache = generation_cache.get_generation_cache()
+        key = self._cache_key(segment)
+        entry = cache.lookup(key)
+        if entry is None:
+            return None
+        
+        saved = cache.record_hit(entry)
+        segment.job_id = ''
+        segment.status = 'completed'
+        segment.progress = 100
+        segment.video_url = entry.url
+        segment.cost_usd = 0
+        segment.error_message = ''
+        segment.metadata = {**(segment.metadata or {}), 'cache_hit': {'key': key, 'saved_cost': float(saved)}}
+        segment.save()
+        
+        logger.info(f"Segment {segment.order} servi par le cache (${saved} évités)")
+        return VideoGenerationResult(job_id='', status='completed', video_url=entry.url, progress=100)
+    
+    def _store_in_cache(self, segment: VideoSegment):
+        """Copie un clip terminé dans le cache de génération (si activé)"""
+        if not generation_cache.is_enabled() or (segment.metadata or {}).get('cache_hit'):
+            return
+        
+        params = self.provider.generation_params()
+        generation_cache.get_generation_cache().store(
+            self._cache_key(segment),
+            segment.video_url,
+            provider=self.provider_name,
+            prompt=segment.prompt,
+            duration=segment.duration,
+            aspect_ratio="9:16",
+            model=params['model'],
+            resolution=params['resolution'],
+            cost=segment.cost_usd,
+        )
     
     def estimate_total_cost(self) -> float:
         """Estime le coût total de génération"""
@@ -259,7 +324,8 @@ def regenerate_segment(segment: VideoSegment, new_prompt: Optional[str] = None)
         segment.save()
     
     processor = VideoSegmentProcessor(segment.project)
-    processor._start_segment_generation(segment)
-    result = processor._wait_for_completion(segment, segment.job_id)
+    result = processor._start_segment_generation(segment)
+    if result.status not in ('completed', 'failed'):
+        processor._wait_for_completion(segment, segment.job_id)
     
     return segment
@@ -5,3 +5,10 @@ class MarketingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'marketing'
     verbose_name = 'Marketing IA'
+
+    def ready(self):
+        from . import signals
+        signals.connect(self)
+        # Enregistre les tâches (@task) dans tous les process : enqueue()
+        # lit leurs priorité et max_attempts, pas seulement run_workers
+        from . import tasks  # noqa: F401
@@ -0,0 +1,171 @@
+"""
+Registre des coûts de production.
+
+Chaque appel provider/agent facturé écrit une ligne CostEntry au moment où
+il se termine (segment vidéo terminé, script généré, voix-off synthétisée,
+vidéo avatar téléchargée). Dans la même transaction :
+
+- VideoProductionJob.actual_cost est incrémenté par F() (pas de relecture,
+  pas d'agrégat sur les segments à l'affichage)
+- le cumul CostDailyRollup (jour, provider, type) est incrémenté par F() :
+  le dashboard lit quelques lignes au lieu de parcourir le registre
+
+Les estimations (calculate_estimated_cost) utilisent les mêmes tarifs que
+les providers (estimate_cost) et les agents.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models_extended import CostDailyRollup, CostEntry, VideoProductionJob
+
+logger = logging.getLogger(__name__)
+
+# Tarifs des agents (mêmes valeurs que ScriptWriterAgent / VoiceAgent)
+SCRIPT_ESTIMATE = Decimal('0.01')
+VOICE_COST_PER_CHAR = 0.0003  # ElevenLabs Multilingual v2
+VOICE_CHARS_PER_SECOND = 15   # Débit moyen d'une voix-off
+
+QUANTUM = Decimal('0.0001')
+
+
+def _amount(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(QUANTUM)
+
+
+def _bump_rollup(day, provider: str, kind: str, amount: Decimal):
+    """Incrémente le cumul du jour (créé au premier coût, course gérée)"""
+    rollup = CostDailyRollup.objects.filter(day=day, provider=provider, kind=kind)
+    changes = {'amount': F('amount') + amount, 'entries': F('entries') + 1}
+    if rollup.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            CostDailyRollup.objects.create(day=day, provider=provider, kind=kind, amount=amount, entries=1)
+    except IntegrityError:
+        # Créé entre-temps par un autre worker
+        rollup.update(**changes)
+
+
+def record_cost(job, amount, provider: str, kind: str, segment=None) -> Optional[CostEntry]:
+    """
+    Enregistre un coût et met à jour les totaux.
+
+    Args:
+        job: VideoProductionJob (l'instance est aussi mise à jour en mémoire,
+             pour que ses save() complets suivants n'écrasent pas le total)
+        amount: Montant ($) ; rien n'est écrit s'il est nul
+        provider: luma, minimax, heygen, elevenlabs, anthropic...
+        kind: CostEntry.Kind
+        segment: VideoSegmentGeneration concerné (optionnel)
+
+    Returns:
+        La ligne créée, ou None
+    """
+    amount = _amount(amount)
+    if amount <= 0 or job is None or job.pk is None:
+        return None
+
+    now = timezone.now()
+    with transaction.atomic():
+        entry = CostEntry.objects.create(
+            job_id=job.pk,
+            segment=segment,
+            provider=provider or 'unknown',
+            kind=kind,
+            amount=amount,
+            created_at=now,
+        )
+        VideoProductionJob.objects.filter(pk=job.pk).update(
+            actual_cost=F('actual_cost') + amount,
+            updated_at=now,
+        )
+        _bump_rollup(timezone.localdate(now), entry.provider, kind, amount)
+
+    job.actual_cost = (job.actual_cost or Decimal('0')) + amount
+    logger.debug(f"Coût job #{job.pk}: {entry.provider}/{kind} ${amount}")
+    return entry
+
+
+def record_segment_cost(segment, job=None) -> Optional[CostEntry]:
+    """Coût d'un segment vidéo terminé (segment.cost, fixé au lancement)"""
+    return record_cost(
+        job or segment.job,
+        segment.cost,
+        segment.provider,
+        CostEntry.Kind.VIDEO,
+        segment=segment,
+    )
+
+
+# =============================================================================
+# LECTURES
+# =============================================================================
+
+def provider_daily_costs(days: int = 30) -> list:
+    """
+    Coûts par jour et provider sur les `days` derniers jours (cumuls).
+
+    Returns:
+        [{'day': date, 'provider': 'luma', 'amount': Decimal, 'entries': int}, ...]
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        CostDailyRollup.objects
+        .filter(day__gte=since)
+        .values('day', 'provider')
+        .annotate(amount=Sum('amount'), entries=Sum('entries'))
+        .order_by('-day', 'provider')
+    )
+
+
+def provider_cost_totals(days: int = 30) -> list:
+    """Total par provider sur les `days` derniers jours, du plus coûteux au moins coûteux"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        CostDailyRollup.objects
+        .filter(day__gte=since)
+        .values('provider')
+        .annotate(amount=Sum('amount'), entries=Sum('entries'))
+        .order_by('-amount')
+    )
+
+
+# =============================================================================
+# ESTIMATION
+# =============================================================================
+
+def estimate_job_cost(job) -> Decimal:
+    """
+    Coût estimé d'un job avec les tarifs des providers.
+
+    - vidéo : estimate_cost du provider configuré, par segment (ou HeyGen
+      sur la durée totale en mode avatar)
+    - script : forfait ScriptWriterAgent
+    - voix-off : tarif ElevenLabs au caractère, débit moyen
+    """
+    segments = job.get_config('segments_count', 6)
+    duration = job.get_config('segment_duration', 5)
+    total_seconds = segments * duration
+
+    if job.get_config('video_mode', 'ai_segments') == 'avatar':
+        from marketing.ai.heygen import HeyGenProvider
+
+        total_seconds = job.get_config('duration_max', total_seconds)
+        video_cost = HeyGenProvider(api_key='').estimate_cost(total_seconds)
+    else:
+        from marketing.ai.video_providers import PROVIDERS
+        from marketing.ai.video_providers.luma import LumaProvider
+
+        provider_class = PROVIDERS.get(job.get_config('provider', 'luma'), LumaProvider)
+        provider = provider_class('', **(job.get_config('provider_config') or {}))
+        video_cost = segments * provider.estimate_cost(duration)
+
+    voice_cost = total_seconds * VOICE_CHARS_PER_SECOND * VOICE_COST_PER_CHAR
+    return (_amount(video_cost) + SCRIPT_ESTIMATE + _amount(voice_cost)).quantize(Decimal('0.01'))
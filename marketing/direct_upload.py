@@ -0,0 +1,297 @@
+"""
+Upload direct navigateur → bucket (S3/MinIO) par multipart présigné.
+
+Les clips filmés au téléphone (plusieurs centaines de MB) ne transitent
+plus par Django/gunicorn :
+
+1. create   : Django valide (taille, type), démarre l'upload multipart et
+              renvoie le découpage en parts
+2. parts    : Django renvoie les URLs présignées des parts demandées ;
+              le navigateur envoie chaque part en PUT directement au bucket
+3. complete : le navigateur renvoie les ETag des parts, Django finalise
+              l'objet et n'enregistre que ses métadonnées
+
+L'upload terminé est ensuite rattaché à un SegmentAsset ou au clip d'un
+VideoSegmentGeneration (attach_asset / attach_clip).
+
+Le bucket doit autoriser le navigateur en CORS (PUT, en-tête ETag exposé).
+"""
+
+import math
+import os
+import uuid
+from datetime import timedelta
+from typing import Dict, Iterable, List
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models_extended import DirectUpload, SegmentAsset, VideoSegmentGeneration
+from .storage import MB, MIN_PART_SIZE, get_storage
+
+# Nombre max de parts d'un upload multipart (limite S3)
+MAX_PARTS = 10000
+
+# Types MIME acceptés par destination
+ALLOWED_TYPES = {
+    DirectUpload.Kind.CLIP: ('video/',),
+    DirectUpload.Kind.ASSET: ('video/', 'image/'),
+}
+
+
+def part_layout(size: int) -> tuple:
+    """
+    Découpage d'un fichier en parts (taille configurée, agrandie si le
+    fichier dépasserait MAX_PARTS parts).
+
+    Returns:
+        (taille des parts, nombre de parts)
+    """
+    part_size = max(MIN_PART_SIZE, getattr(settings, 'MARKETING_DIRECT_UPLOAD_PART_SIZE', 16 * MB))
+    if size > part_size * MAX_PARTS:
+        part_size = math.ceil(size / MAX_PARTS)
+    return part_size, max(1, math.ceil(size / part_size))
+
+
+def create_upload(user, kind: str, filename: str, size: int, content_type: str, job=None) -> DirectUpload:
+    """
+    Valide la demande et démarre l'upload multipart.
+
+    Raises:
+        ValueError: type, taille ou destination invalide
+    """
+    if kind not in ALLOWED_TYPES:
+        raise ValueError(f"Destination inconnue: {kind}")
+
+    if not content_type or not content_type.startswith(ALLOWED_TYPES[kind]):
+        raise ValueError(f"Type de fichier non accepté: {content_type or 'inconnu'}")
+
+    max_bytes = getattr(settings, 'MARKETING_DIRECT_UPLOAD_MAX_BYTES', 2 * 1024 * MB)
+    if size <= 0 or size > max_bytes:
+        raise ValueError(f"Taille invalide ({size} octets, max {max_bytes // MB} MB)")
+
+    storage = get_storage()
+    name, ext = os.path.splitext(get_valid_filename(os.path.basename(filename)) or 'upload')
+    object_name = f"uploads/{kind}s/{user.pk}/{uuid.uuid4().hex}/{name[:60]}{ext[:10].lower()}"
+    part_size, part_count = part_layout(size)
+
+    upload_id = storage.create_multipart_upload(object_name, content_type)
+
+    return DirectUpload.objects.create(
+        user=user,
+        job=job,
+        kind=kind,
+        filename=filename[:255],
+        content_type=content_type,
+        size=size,
+        bucket=storage.bucket_videos,
+        object_name=object_name,
+        upload_id=upload_id,
+        part_size=part_size,
+        part_count=part_count,
+    )
+
+
+def presign_parts(upload: DirectUpload, part_numbers: Iterable[int] = None) -> Dict[int, str]:
+    """
+    URLs présignées des parts demandées (toutes par défaut).
+
+    Raises:
+        ValueError: upload terminé, liste vide ou numéro de part hors limites
+    """
+    if upload.status != DirectUpload.Status.INITIATED:
+        raise ValueError("Upload déjà terminé")
+
+    if part_numbers is None:
+        part_numbers = range(1, upload.part_count + 1)
+    numbers = sorted(set(part_numbers))
+    if not numbers:
+        raise ValueError("Aucune part demandée")
+    if numbers[0] < 1 or numbers[-1] > upload.part_count:
+        raise ValueError(f"Parts valides : 1 à {upload.part_count}")
+
+    return get_storage().presign_upload_parts(
+        upload.object_name,
+        upload.upload_id,
+        numbers,
+        expires_in=getattr(settings, 'MARKETING_DIRECT_UPLOAD_URL_EXPIRY', 3600),
+        bucket=upload.bucket,
+    )
+
+
+def complete_upload(upload: DirectUpload, parts: List[dict]) -> DirectUpload:
+    """
+    Finalise l'objet à partir des ETag renvoyés par le navigateur.
+
+    Args:
+        parts: [{'part_number': 1, 'etag': '"..."'}, ...]
+
+    Raises:
+        ValueError: parts invalides ou manquantes, ETag refusé par le
+                    bucket, taille finale incohérente
+    """
+    if upload.status == DirectUpload.Status.COMPLETED:
+        return upload
+    if upload.status != DirectUpload.Status.INITIATED:
+        raise ValueError("Upload déjà rattaché ou abandonné")
+
+    etags = {}
+    for part in parts if isinstance(parts, list) else [None]:
+        try:
+            number = int(part['part_number'])
+            etag = str(part['etag'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Part invalide : {part_number, etag} attendus")
+        if not 1 <= number <= upload.part_count:
+            raise ValueError(f"Parts valides : 1 à {upload.part_count}")
+        if etag:
+            etags[number] = etag
+    missing = set(range(1, upload.part_count + 1)) - set(etags)
+    if missing:
+        raise ValueError(f"Parts manquantes : {sorted(missing)[:10]}")
+
+    storage = get_storage()
+    try:
+        size = storage.complete_multipart_upload(
+            upload.object_name,
+            upload.upload_id,
+            [{'PartNumber': number, 'ETag': etag} for number, etag in sorted(etags.items())],
+            bucket=upload.bucket,
+        )
+    except ClientError as e:
+        # ETag ne correspondant à aucune part reçue, part trop petite...
+        raise ValueError(f"Finalisation refusée par le stockage : {getattr(e, 'response', {}).get('Error', {}).get('Code', e)}")
+
+    if size != upload.size:
+        storage.delete_file(upload.object_name, bucket=upload.bucket)
+        upload.status = DirectUpload.Status.ABORTED
+        upload.save(update_fields=['status'])
+        raise ValueError(f"Taille reçue incohérente ({size} ≠ {upload.size} octets)")
+
+    upload.status = DirectUpload.Status.COMPLETED
+    upload.url = f"{storage.public_endpoint}/{upload.bucket}/{upload.object_name}"
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['status', 'url', 'completed_at'])
+    return upload
+
+
+def abort_upload(upload: DirectUpload):
+    """Abandonne un upload en cours (les parts envoyées sont libérées)"""
+    if upload.status != DirectUpload.Status.INITIATED:
+        return
+    try:
+        get_storage().abort_multipart_upload(upload.object_name, upload.upload_id, bucket=upload.bucket)
+    finally:
+        upload.status = DirectUpload.Status.ABORTED
+        upload.save(update_fields=['status'])
+
+
+def get_completed_upload(user, upload_pk, kind: str) -> DirectUpload:
+    """
+    Upload terminé de cet utilisateur, prêt à être rattaché.
+
+    Raises:
+        ValueError: introuvable ou pas encore terminé
+    """
+    upload = DirectUpload.objects.filter(
+        pk=upload_pk, user=user, kind=kind, status=DirectUpload.Status.COMPLETED
+    ).first()
+    if upload is None:
+        raise ValueError(f"Upload #{upload_pk} introuvable ou incomplet")
+    return upload
+
+
+@transaction.atomic
+def attach_clip(upload: DirectUpload, generation: VideoSegmentGeneration) -> VideoSegmentGeneration:
+    """Fait de l'objet uploadé le clip filmé d'un segment"""
+    generation.source_type = 'uploaded_clip'
+    generation.video_url = upload.url
+    generation.local_path = ''
+    generation.status = VideoSegmentGeneration.Status.COMPLETED
+    generation.provider_metadata = {
+        **(generation.provider_metadata or {}),
+        'direct_upload': {
+            'id': upload.pk,
+            'object_name': upload.object_name,
+            'filename': upload.filename,
+            'size': upload.size,
+        },
+    }
+    generation.save()
+
+    upload.job_id = generation.job_id
+    upload.status = DirectUpload.Status.ATTACHED
+    upload.save(update_fields=['job', 'status'])
+    return generation
+
+
+@transaction.atomic
+def attach_asset(upload: DirectUpload, job, segment_index: int, animation_prompt: str = '') -> SegmentAsset:
+    """Crée (ou remplace) l'asset d'un segment à partir de l'objet uploadé"""
+    asset_type = (
+        SegmentAsset.AssetType.VIDEO
+        if upload.content_type.startswith('video/')
+        else SegmentAsset.AssetType.IMAGE
+    )
+    asset, _created = SegmentAsset.objects.update_or_create(
+        job=job,
+        segment_index=segment_index,
+        defaults={
+            'asset_type': asset_type,
+            'file': None,
+            'url': upload.url,
+            'animation_prompt': animation_prompt,
+            'metadata': {
+                'direct_upload': upload.pk,
+                'object_name': upload.object_name,
+                'filename': upload.filename,
+                'size': upload.size,
+                'content_type': upload.content_type,
+            },
+        },
+    )
+
+    # Segment pas encore lancé : il part de cette référence (image-to-video)
+    VideoSegmentGeneration.objects.filter(
+        job=job, segment_index=segment_index, status=VideoSegmentGeneration.Status.PENDING
+    ).update(reference_asset=asset, generation_mode='image_to_video', updated_at=timezone.now())
+
+    upload.job = job
+    upload.status = DirectUpload.Status.ATTACHED
+    upload.save(update_fields=['job', 'status'])
+    return asset
+
+
+def abort_stale_uploads(max_age_hours: int = 24) -> int:
+    """
+    Abandonne les uploads jamais finalisés et supprime les objets
+    terminés mais jamais rattachés.
+
+    Returns:
+        Nombre d'uploads nettoyés
+    """
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    storage = get_storage()
+    count = 0
+
+    for upload in DirectUpload.objects.filter(status=DirectUpload.Status.INITIATED, created_at__lt=cutoff):
+        try:
+            abort_upload(upload)
+        except Exception:
+            upload.status = DirectUpload.Status.ABORTED
+            upload.save(update_fields=['status'])
+        count += 1
+
+    for upload in DirectUpload.objects.filter(status=DirectUpload.Status.COMPLETED, completed_at__lt=cutoff):
+        try:
+            storage.delete_file(upload.object_name, bucket=upload.bucket)
+        except Exception:
+            pass
+        upload.status = DirectUpload.Status.ABORTED
+        upload.save(update_fields=['status'])
+        count += 1
+
+    return count
@@ -0,0 +1,277 @@
+"""
+Banc de charge du pipeline de génération, sans API payante.
+
+Crée N jobs × M segments sur le provider simulé 'mock', puis les pilote de
+bout en bout (GenerationOrchestrator : lancement, polling, puis
+VideoAssembler en option) en parallèle. Rapporte le débit, les latences
+p50/p95 par étape et le nombre de requêtes SQL par étape.
+
+Usage:
+    python manage.py benchmark_pipeline
+    python manage.py benchmark_pipeline --jobs 20 --segments 6 --latency-median 3
+    python manage.py benchmark_pipeline --failure-rate 0.1 --rate-limit-rate 0.05
+    python manage.py benchmark_pipeline --jobs 4 --assemble       # FFmpeg requis
+"""
+
+import contextlib
+import io
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from marketing.ai.generation_orchestrator import GenerationOrchestrator
+from marketing.ai.rate_governor import governor_stats
+from marketing.models_extended import VideoProductionJob, VideoSegmentGeneration
+
+
+def percentile(values, pct):
+    """Percentile par rang (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class StageMetrics:
+    """Durées et requêtes SQL par étape (partagé entre threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.queries = defaultdict(int)
+
+    def add_duration(self, stage, seconds):
+        with self._lock:
+            self.durations[stage].append(seconds)
+
+    def add_queries(self, stage, count):
+        with self._lock:
+            self.queries[stage] += count
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        """Chronomètre un bloc et compte ses requêtes SQL (connexion du thread)"""
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            yield
+        self.add_duration(stage, time.perf_counter() - start)
+        self.add_queries(stage, count[0])
+
+
+class Command(BaseCommand):
+    help = 'Banc de charge du pipeline vidéo sur le provider simulé (débit, latences, requêtes SQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=5, help='Nombre de jobs')
+        parser.add_argument('--segments', type=int, default=6, help='Segments par job')
+        parser.add_argument('--duration', type=int, default=6, help='Durée des segments (secondes)')
+        parser.add_argument('--workers', type=int, help='Jobs pilotés en parallèle (défaut: tous)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Intervalle de polling (secondes)')
+        parser.add_argument('--timeout', type=int, default=600, help='Temps max par job (secondes)')
+
+        # Provider simulé
+        parser.add_argument('--latency-median', type=float, default=5.0, help='Latence médiane de génération (s)')
+        parser.add_argument('--latency-sigma', type=float, default=0.5, help='Dispersion lognormale de la latence')
+        parser.add_argument('--launch-latency', type=float, default=0.05, help="Latence de l'appel de lancement (s)")
+        parser.add_argument('--status-latency', type=float, default=0.02, help="Latence d'un appel de statut (s)")
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Taux de générations échouées')
+        parser.add_argument('--launch-failure-rate', type=float, default=0.0, help='Taux de lancements refusés')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Taux de réponses 429')
+        parser.add_argument('--rpm', type=int, default=0, help='Limite requêtes/min du gouverneur (0 = aucune)')
+        parser.add_argument('--no-clips', action='store_true', help='Ne pas générer de clips FFmpeg')
+        parser.add_argument('--seed', type=int, help='Graine aléatoire (runs reproductibles)')
+
+        parser.add_argument('--assemble', action='store_true', help='Assembler la vidéo finale (FFmpeg requis)')
+        parser.add_argument('--keep', action='store_true', help='Conserver les jobs de benchmark')
+
+    def handle(self, *args, **options):
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+
+        mock_config = {
+            **getattr(settings, 'MARKETING_MOCK_PROVIDER', {}),
+            'launch_latency': options['launch_latency'],
+            'status_latency': options['status_latency'],
+            'generation_latency': {
+                'dist': 'lognormal',
+                'median': options['latency_median'],
+                'sigma': options['latency_sigma'],
+            },
+            'failure_rate': options['failure_rate'],
+            'launch_failure_rate': options['launch_failure_rate'],
+            'rate_limit_rate': options['rate_limit_rate'],
+            'clips': not options['no_clips'] or options['assemble'],
+        }
+        limits = {
+            **getattr(settings, 'MARKETING_VIDEO_PROVIDER_LIMITS', {}),
+            'mock': {'requests_per_minute': options['rpm'], 'max_in_flight': 0, 'capacity': 1000},
+        }
+
+        with override_settings(MARKETING_MOCK_PROVIDER=mock_config, MARKETING_VIDEO_PROVIDER_LIMITS=limits):
+            job_ids = self._create_jobs(options)
+            try:
+                self._run(job_ids, options)
+            finally:
+                if not options['keep']:
+                    VideoProductionJob.objects.filter(pk__in=job_ids).delete()
+
+    # ------------------------------------------------------------------
+    # Préparation
+    # ------------------------------------------------------------------
+
+    def _create_jobs(self, options):
+        job_ids = []
+        generations = []
+        for i in range(options['jobs']):
+            job = VideoProductionJob.objects.create(
+                title=f"[benchmark] job {i + 1}",
+                theme='benchmark',
+                config={'provider': 'mock', 'generation_cache': False},
+            )
+            job_ids.append(job.pk)
+            generations.extend(
+                VideoSegmentGeneration(
+                    job=job,
+                    segment_index=index,
+                    prompt=f"Benchmark scene {index + 1}",
+                    provider='mock',
+                    duration=options['duration'],
+                )
+                for index in range(options['segments'])
+            )
+        VideoSegmentGeneration.objects.bulk_create(generations)
+        return job_ids
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def _run(self, job_ids, options):
+        metrics = StageMetrics()
+        workers = max(1, options['workers'] or len(job_ids))
+        total_segments = len(job_ids) * options['segments']
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🏁 {len(job_ids)} job(s) × {options['segments']} segments, {workers} en parallèle"
+        ))
+
+        # Les logs par segment de l'orchestrateur masqueraient le rapport
+        quiet = options['verbosity'] < 2
+        output = io.StringIO() if quiet else None
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(
+                    lambda job_id: self._drive_job(job_id, metrics, options), job_ids
+                ))
+        wall = time.perf_counter() - start
+
+        self._report(metrics, outcomes, wall, total_segments, options)
+
+    def _drive_job(self, job_id, metrics, options):
+        """Pilote un job : lancement, polling jusqu'à la fin, assemblage"""
+        outcome = {'job_id': job_id, 'timed_out': False, 'error': None}
+        try:
+            job = VideoProductionJob.objects.get(pk=job_id)
+            launched = time.perf_counter()
+
+            with metrics.measure('launch'):
+                orchestrator = GenerationOrchestrator(job)
+                orchestrator.start_generation()
+
+            deadline = time.monotonic() + options['timeout']
+            while True:
+                with metrics.measure('poll'):
+                    stats = orchestrator.poll_status()
+                if stats['total'] == 0:
+                    break
+                if time.monotonic() > deadline:
+                    outcome['timed_out'] = True
+                    break
+                time.sleep(options['poll_interval'])
+
+            metrics.add_duration('generation', time.perf_counter() - launched)
+
+            if options['assemble'] and not outcome['timed_out']:
+                from marketing.ai.video_assembler import VideoAssembler
+
+                job.refresh_from_db()
+                if not job.generations.exclude(status=VideoSegmentGeneration.Status.COMPLETED).exists():
+                    with metrics.measure('assembly'):
+                        VideoAssembler(job).assemble(add_subtitles=False)
+                    metrics.add_duration('job', time.perf_counter() - launched)
+
+        except Exception as e:
+            outcome['error'] = str(e)
+        finally:
+            connection.close()
+
+        return outcome
+
+    # ------------------------------------------------------------------
+    # Rapport
+    # ------------------------------------------------------------------
+
+    def _report(self, metrics, outcomes, wall, total_segments, options):
+        job_ids = [o['job_id'] for o in outcomes]
+        statuses = dict.fromkeys(VideoSegmentGeneration.Status.values, 0)
+        for status in (
+            VideoSegmentGeneration.objects
+            .filter(job_id__in=job_ids)
+            .values_list('status', flat=True)
+        ):
+            statuses[status] += 1
+
+        completed = statuses[VideoSegmentGeneration.Status.COMPLETED]
+
+        self.stdout.write(f"\n📊 Résultats ({wall:.1f}s)")
+        self.stdout.write(
+            f"   Segments : {completed}/{total_segments} terminés, "
+            f"{statuses[VideoSegmentGeneration.Status.FAILED]} en échec"
+        )
+        self.stdout.write(
+            f"   Débit    : {completed / wall:.2f} segments/s, "
+            f"{len(job_ids) / wall * 60:.1f} jobs/min"
+        )
+
+        timed_out = sum(1 for o in outcomes if o['timed_out'])
+        errors = [o for o in outcomes if o['error']]
+        if timed_out:
+            self.stdout.write(self.style.WARNING(f"   ⏱️ {timed_out} job(s) hors délai"))
+        for outcome in errors:
+            self.stdout.write(self.style.ERROR(f"   ❌ Job #{outcome['job_id']}: {outcome['error']}"))
+
+        self.stdout.write(f"\n   {'Étape':<12}{'n':>6}{'p50':>10}{'p95':>10}{'max':>10}{'SQL':>8}{'SQL/job':>9}")
+        for stage in ('launch', 'poll', 'generation', 'assembly', 'job'):
+            values = metrics.durations.get(stage)
+            if not values:
+                continue
+            queries = metrics.queries.get(stage)
+            self.stdout.write(
+                f"   {stage:<12}{len(values):>6}"
+                f"{percentile(values, 50):>9.2f}s{percentile(values, 95):>9.2f}s{max(values):>9.2f}s"
+                + (f"{queries:>8}{queries / len(job_ids):>9.1f}" if queries is not None else '')
+            )
+
+        throttle = governor_stats().get('mock')
+        if throttle and (throttle['throttled_calls'] or throttle['rate_limited']):
+            self.stdout.write(
+                f"\n   🚦 Gouverneur : {throttle['calls']} appels, "
+                f"{throttle['throttled_calls']} ralentis ({throttle['throttled_seconds']}s), "
+                f"{throttle['rate_limited']} 429"
+            )
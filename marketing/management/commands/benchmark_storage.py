@@ -0,0 +1,110 @@
+"""
+Benchmark du débit d'upload vers MinIO (compatible S3).
+
+Compare sur un même fichier synthétique :
+- baseline : put_object en un seul PUT (comportement boto3 non réglé)
+- file     : upload_file avec le TransferConfig du projet (multipart parallèle)
+- fileobj  : upload_fileobj depuis un fichier ouvert (streaming)
+- stream   : upload_stream depuis un générateur de chunks de 1 MB
+
+Usage:
+    python manage.py benchmark_storage
+    python manage.py benchmark_storage --size 500 --runs 3
+    python manage.py benchmark_storage --chunksize 32 --concurrency 16
+"""
+
+import os
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from marketing.storage import MB, MinIOStorage, get_transfer_config
+
+MODES = ('baseline', 'file', 'fileobj', 'stream')
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit d'upload vers MinIO selon le mode (PUT simple, multipart, streaming)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=200, help='Taille du fichier de test (MB)')
+        parser.add_argument('--runs', type=int, default=2, help='Uploads par mode')
+        parser.add_argument('--modes', type=str, default=','.join(MODES), help='Modes à mesurer')
+        parser.add_argument('--chunksize', type=int, help='Taille des parts multipart (MB)')
+        parser.add_argument('--concurrency', type=int, help='Parts envoyées en parallèle')
+        parser.add_argument('--bucket', type=str, help='Bucket de test (défaut: MINIO_BUCKET_VIDEOS)')
+
+    def handle(self, *args, **options):
+        config = get_transfer_config()
+        if options['chunksize']:
+            config.multipart_chunksize = options['chunksize'] * MB
+        if options['concurrency']:
+            config.max_concurrency = options['concurrency']
+
+        storage = MinIOStorage(transfer_config=config)
+        bucket = options['bucket'] or storage.bucket_videos
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip() in MODES]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📦 {storage.endpoint}/{bucket} — {options['size']} MB, "
+            f"parts de {config.multipart_chunksize // MB} MB × {config.max_concurrency}"
+        ))
+
+        fd, path = tempfile.mkstemp(suffix='.bin')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for _ in range(options['size']):
+                    f.write(os.urandom(MB))
+
+            results = {}
+            for mode in modes:
+                timings = []
+                for _ in range(options['runs']):
+                    key = f"benchmark/{uuid.uuid4().hex}.bin"
+                    start = time.perf_counter()
+                    try:
+                        self._upload(storage, mode, path, key, bucket)
+                        # Mesure avant le nettoyage : seul l'upload compte
+                        timings.append(time.perf_counter() - start)
+                    except Exception as e:
+                        self.stderr.write(f"❌ {mode}: {e}")
+                        break
+                    finally:
+                        try:
+                            storage.client.delete_object(Bucket=bucket, Key=key)
+                        except Exception:
+                            pass
+                if timings:
+                    results[mode] = min(timings)
+        finally:
+            os.remove(path)
+
+        self._report(results, options['size'])
+
+    @staticmethod
+    def _upload(storage, mode, path, key, bucket):
+        if mode == 'baseline':
+            with open(path, 'rb') as f:
+                storage.client.put_object(Bucket=bucket, Key=key, Body=f)
+        elif mode == 'file':
+            storage.upload_file(path, key, bucket=bucket)
+        elif mode == 'fileobj':
+            with open(path, 'rb') as f:
+                storage.upload_fileobj(f, key, bucket=bucket)
+        elif mode == 'stream':
+            with open(path, 'rb') as f:
+                storage.upload_stream(iter(lambda: f.read(MB), b''), key, bucket=bucket)
+
+    def _report(self, results, size_mb):
+        if not results:
+            return
+
+        self.stdout.write(f"\n📊 Meilleur temps par mode ({size_mb} MB)")
+        baseline = results.get('baseline')
+        for mode, elapsed in results.items():
+            line = f"   {mode:<10}{elapsed:>8.2f}s {size_mb / elapsed:>9.1f} MB/s"
+            if baseline and mode != 'baseline':
+                line += f"   ×{baseline / elapsed:.2f}"
+            self.stdout.write(line)
@@ -0,0 +1,167 @@
+"""
+Benchmark des backends de montage diaporama (FFmpeg vs MoviePy).
+
+Chaque backend rend la même vidéo (images + audio synthétiques) dans un
+process isolé ; on mesure le temps de rendu et le pic de mémoire (RSS),
+FFmpeg compris.
+
+Usage:
+    python manage.py benchmark_video_editor
+    python manage.py benchmark_video_editor --images 8 --duration 30 --subtitles
+    python manage.py benchmark_video_editor --backends ffmpeg --runs 3
+"""
+
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+
+def _render_worker(backend, image_paths, audio_path, output_path, subtitles, queue):
+    """Rend la vidéo dans un process séparé et renvoie (temps, pic RSS en MB)"""
+    import django
+    django.setup()
+
+    from marketing.ai.video_editor import get_video_editor
+
+    editor = get_video_editor(backend)
+    start = time.perf_counter()
+    try:
+        editor.create_video_from_images(
+            image_paths, audio_path, output_path, subtitles=subtitles
+        )
+        error = None
+    except Exception as e:
+        error = str(e)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss est en KB sous Linux ; les enfants incluent FFmpeg
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    queue.put({
+        'elapsed': elapsed,
+        'python_rss_mb': self_rss / 1024,
+        'ffmpeg_rss_mb': children_rss / 1024,
+        'error': error,
+    })
+
+
+class Command(BaseCommand):
+    help = 'Compare le temps de rendu et la mémoire des backends de montage (ffmpeg, moviepy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=6, help="Nombre d'images")
+        parser.add_argument('--duration', type=int, default=30, help='Durée audio (secondes)')
+        parser.add_argument('--runs', type=int, default=1, help='Nombre de rendus par backend')
+        parser.add_argument(
+            '--backends', type=str, default='ffmpeg,moviepy',
+            help='Backends à comparer (séparés par des virgules)'
+        )
+        parser.add_argument('--subtitles', action='store_true', help='Inclure des sous-titres')
+        parser.add_argument('--keep', action='store_true', help='Conserver les fichiers générés')
+
+    def handle(self, *args, **options):
+        work_dir = tempfile.mkdtemp(prefix='bench_editor_')
+        backends = [b.strip() for b in options['backends'].split(',') if b.strip()]
+
+        try:
+            image_paths = self._make_images(work_dir, options['images'])
+            audio_path = self._make_audio(work_dir, options['duration'])
+            subtitles = self._make_subtitles(options['duration']) if options['subtitles'] else None
+
+            self.stdout.write(self.style.SUCCESS(
+                f"\n🎬 Benchmark montage : {len(image_paths)} images, "
+                f"{options['duration']}s audio, sous-titres: {'oui' if subtitles else 'non'}"
+            ))
+
+            ctx = multiprocessing.get_context('spawn')
+            results = {}
+
+            for backend in backends:
+                runs = []
+                for run in range(options['runs']):
+                    output_path = os.path.join(work_dir, f"{backend}_{run}.mp4")
+                    queue = ctx.Queue()
+                    proc = ctx.Process(
+                        target=_render_worker,
+                        args=(backend, image_paths, audio_path, output_path, subtitles, queue),
+                    )
+                    proc.start()
+                    proc.join()
+                    data = queue.get() if not queue.empty() else {'error': 'process crashed'}
+
+                    if data.get('error'):
+                        self.stdout.write(self.style.ERROR(f"  ❌ {backend}: {data['error']}"))
+                        break
+                    runs.append(data)
+
+                if runs:
+                    results[backend] = runs
+
+            self._report(results)
+
+        finally:
+            if options['keep']:
+                self.stdout.write(f"\n📁 Fichiers conservés : {work_dir}")
+            else:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _report(self, results):
+        if not results:
+            return
+
+        self.stdout.write('')
+        self.stdout.write(f"{'Backend':<10} {'Temps (s)':>10} {'RSS Python (MB)':>16} {'RSS FFmpeg (MB)':>16}")
+        self.stdout.write('-' * 55)
+
+        summary = {}
+        for backend, runs in results.items():
+            elapsed = min(r['elapsed'] for r in runs)
+            python_rss = max(r['python_rss_mb'] for r in runs)
+            ffmpeg_rss = max(r['ffmpeg_rss_mb'] for r in runs)
+            summary[backend] = elapsed
+            self.stdout.write(f"{backend:<10} {elapsed:>10.2f} {python_rss:>16.1f} {ffmpeg_rss:>16.1f}")
+
+        if 'ffmpeg' in summary and 'moviepy' in summary and summary['ffmpeg']:
+            speedup = summary['moviepy'] / summary['ffmpeg']
+            self.stdout.write(self.style.SUCCESS(f"\n⚡ ffmpeg est {speedup:.1f}x plus rapide que moviepy"))
+
+    def _make_images(self, work_dir, count):
+        """Images synthétiques au format DALL-E portrait (1024x1792)"""
+        from PIL import Image, ImageDraw
+
+        paths = []
+        for i in range(count):
+            img = Image.new('RGB', (1024, 1792), ((i * 40) % 255, 80, 160))
+            draw = ImageDraw.Draw(img)
+            for y in range(0, 1792, 64):
+                draw.line([(0, y), (1024, y + 200)], fill=(255, 255, 255), width=3)
+            path = os.path.join(work_dir, f"img_{i}.png")
+            img.save(path)
+            paths.append(path)
+        return paths
+
+    def _make_audio(self, work_dir, duration):
+        """Voix-off synthétique (sinusoïde) via FFmpeg"""
+        path = os.path.join(work_dir, 'voiceover.mp3')
+        subprocess.run(
+            [
+                'ffmpeg', '-y', '-f', 'lavfi',
+                '-i', f'sine=frequency=440:duration={duration}',
+                '-c:a', 'libmp3lame', path
+            ],
+            capture_output=True, check=True
+        )
+        return path
+
+    def _make_subtitles(self, duration):
+        """Un sous-titre toutes les 3 secondes"""
+        return [
+            {'text': f"Sous-titre de test numéro {i + 1}", 'start': start, 'duration': 3}
+            for i, start in enumerate(range(0, duration, 3))
+        ]
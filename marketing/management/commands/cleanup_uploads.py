@@ -0,0 +1,26 @@
+"""
+Nettoyage des uploads directs abandonnés.
+
+Abandonne les uploads multipart jamais finalisés (les parts déjà envoyées
+occupent le bucket tant que l'upload reste ouvert) et supprime les objets
+terminés mais jamais rattachés à un segment.
+
+Usage:
+    python manage.py cleanup_uploads
+    python manage.py cleanup_uploads --max-age 6
+"""
+
+from django.core.management.base import BaseCommand
+
+from marketing.direct_upload import abort_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Abandonne les uploads directs non finalisés ou jamais rattachés'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=24, help='Âge minimum (heures)')
+
+    def handle(self, *args, **options):
+        count = abort_stale_uploads(max_age_hours=options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f"🧹 {count} upload(s) nettoyé(s)"))
@@ -7,17 +7,17 @@ Usage:
 """
 import os
 import tempfile
+import time
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from marketing.models import ContentScript, VideoProject
 from marketing.ai import (
     generate_script,
-    generate_images_for_script,
     generate_voiceover_from_script,
     create_video
 )
-from marketing.ai.image_generator import download_and_save_images
+from marketing.ai.image_generator import generate_and_save_images
 from marketing.storage import upload_video, upload_image, upload_audio
 
 
@@ -60,6 +60,12 @@ class Command(BaseCommand):
             default=None,
             help='Dossier de sortie local (défaut: /tmp/video_<id>)'
         )
+        parser.add_argument(
+            '--image-workers',
+            type=int,
+            default=None,
+            help='Images générées en parallèle (défaut: MARKETING_IMAGE_CONCURRENCY)'
+        )
     
     def handle(self, *args, **options):
         pillar = options['pillar']
@@ -68,6 +74,7 @@ class Command(BaseCommand):
         with_subtitles = options['subtitles']
         no_upload = options['no_upload']
         output_dir = options['output_dir']
+        started = time.perf_counter()
         
         self.stdout.write(self.style.SUCCESS(f'\n🎬 Génération vidéo : {theme}'))
         self.stdout.write(f'   Pilier : {pillar}')
@@ -112,14 +119,26 @@ class Command(BaseCommand):
             
             # 2. Générer les images
             self.stdout.write('🎨 Étape 2/5 : Génération des images (DALL-E 3)...')
-            image_results = generate_images_for_script(script_data)
-            
-            self.stdout.write(self.style.SUCCESS(f'   ✅ {len(image_results)} images générées'))
+            prompts = script_data.get('image_prompts', [])
+            if not prompts:
+                raise ValueError("Le script ne contient pas de 'image_prompts'")
             
-            # Télécharger et sauvegarder les images
-            image_paths = download_and_save_images(image_results, output_dir, project.id)
+            # Génération, téléchargement et redimensionnement en parallèle
+            images = generate_and_save_images(
+                prompts,
+                output_dir,
+                video_id=project.id,
+                workers=options['image_workers'],
+            )
+            image_paths = images.paths
             
+            generated = sum(1 for image in images.images if image.get('url'))
+            self.stdout.write(self.style.SUCCESS(f'   ✅ {generated}/{len(prompts)} images générées'))
             self.stdout.write(self.style.SUCCESS(f'   ✅ {len(image_paths)} images sauvegardées'))
+            self.stdout.write(
+                f'   ⏱️ {images.wall_seconds:.1f}s '
+                f'(séquentiel estimé : {images.serial_seconds:.1f}s, ×{images.speedup:.1f})'
+            )
             
             # Upload vers MinIO
             image_urls = []
@@ -157,7 +176,7 @@ class Command(BaseCommand):
             self.stdout.write('')
             
             # 4. Montage vidéo
-            self.stdout.write('🎬 Étape 4/5 : Montage vidéo (MoviePy)...')
+            self.stdout.write('🎬 Étape 4/5 : Montage vidéo...')
             
             video_path = os.path.join(output_dir, 'final.mp4')
             
@@ -198,6 +217,14 @@ class Command(BaseCommand):
             self.stdout.write(f'📝 Script : #{script.id} - {theme}')
             self.stdout.write(f'📁 Fichiers locaux : {output_dir}')
             
+            # Temps total vs même production avec des images séquentielles
+            wall = time.perf_counter() - started
+            serial = wall - images.wall_seconds + images.serial_seconds
+            self.stdout.write(
+                f'⏱️ Durée totale : {wall:.1f}s (images séquentielles : ~{serial:.1f}s, '
+                f'gain {serial - wall:.1f}s)'
+            )
+            
             if not no_upload:
                 self.stdout.write('')
                 self.stdout.write('🌐 URLs MinIO :')
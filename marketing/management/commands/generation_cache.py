@@ -0,0 +1,94 @@
+"""
+Management command : cache des clips générés.
+
+Usage:
+    python manage.py generation_cache stats
+    python manage.py generation_cache invalidate --provider minimax
+    python manage.py generation_cache invalidate --job-id 12      # Clips produits par un job
+    python manage.py generation_cache invalidate --all --purge    # Supprime aussi les objets MinIO
+    python manage.py generation_cache purge                       # Supprime expirés/invalidés
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from marketing.ai.generation_cache import get_generation_cache
+from marketing.models_extended import GeneratedClip
+
+
+class Command(BaseCommand):
+    help = 'Statistiques et invalidation du cache de génération vidéo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['stats', 'invalidate', 'purge'])
+        parser.add_argument('--provider', type=str, help='Limiter à un provider')
+        parser.add_argument('--key', type=str, action='append', help='Clé(s) de cache précise(s)')
+        parser.add_argument('--job-id', type=int, help='Clips produits par ce job')
+        parser.add_argument('--older-than', type=int, help='Clips créés il y a plus de N jours')
+        parser.add_argument('--all', action='store_true', help='Invalider tout le cache')
+        parser.add_argument('--purge', action='store_true', help='Supprimer aussi les objets MinIO')
+
+    def handle(self, *args, **options):
+        cache = get_generation_cache()
+        action = options['action']
+
+        if action == 'stats':
+            self._stats()
+            return
+
+        if action == 'purge':
+            count = cache.invalidate(cache.expired(), purge=True)
+            self.stdout.write(self.style.SUCCESS(f"🗑️ {count} clip(s) expiré(s)/invalidé(s) supprimé(s)"))
+            return
+
+        queryset = GeneratedClip.objects.all()
+        filtered = False
+
+        if options['provider']:
+            queryset = queryset.filter(provider=options['provider'])
+            filtered = True
+        if options['key']:
+            queryset = queryset.filter(cache_key__in=options['key'])
+            filtered = True
+        if options['job_id']:
+            queryset = queryset.filter(source_generation__job_id=options['job_id'])
+            filtered = True
+        if options['older_than'] is not None:
+            queryset = queryset.filter(created_at__lt=timezone.now() - timedelta(days=options['older_than']))
+            filtered = True
+
+        if not filtered and not options['all']:
+            raise CommandError("Préciser un filtre (--provider, --key, --job-id, --older-than) ou --all")
+
+        count = cache.invalidate(queryset, purge=options['purge'])
+        verb = 'supprimé(s)' if options['purge'] else 'invalidé(s)'
+        self.stdout.write(self.style.SUCCESS(f"✅ {count} clip(s) {verb}"))
+
+    def _stats(self):
+        now = timezone.now()
+        totals = GeneratedClip.objects.aggregate(
+            entries=Count('id'),
+            hits=Sum('hits'),
+            saved=Sum('saved_cost'),
+        )
+        valid = GeneratedClip.objects.filter(invalidated=False).exclude(expires_at__lte=now).count()
+
+        self.stdout.write(self.style.SUCCESS("♻️ Cache de génération"))
+        self.stdout.write(f"   Entrées : {totals['entries']} ({valid} valides)")
+        self.stdout.write(f"   Réutilisations : {totals['hits'] or 0}")
+        self.stdout.write(f"   Coût évité : ${totals['saved'] or 0:.2f}")
+
+        rows = (
+            GeneratedClip.objects
+            .values('provider')
+            .annotate(entries=Count('id'), hits=Sum('hits'), saved=Sum('saved_cost'))
+            .order_by('provider')
+        )
+        for row in rows:
+            self.stdout.write(
+                f"   - {row['provider']}: {row['entries']} clip(s), "
+                f"{row['hits'] or 0} réutilisation(s), ${row['saved'] or 0:.2f}"
+            )
@@ -1,13 +1,74 @@
 """
 Management command pour importer les scripts vidéo depuis VIDEOS_RESEAUX_SOCIAUX.html
-Usage: python manage.py import_video_scripts
+Usage:
+    python manage.py import_video_scripts
+    python manage.py import_video_scripts --dry-run   # diff sans écrire
+
+Parsing lxml en flux (iterparse : chaque <details> vidéo est traité puis
+libéré), diff contre la base en une requête, puis un seul
+bulk_create(update_conflicts=True) dans une transaction pour les scripts
+nouveaux ou modifiés.
 """
 
-from django.core.management.base import BaseCommand
-from marketing.models_extended import VideoScript, VideoTheme, ClientLevel, Platform
-from bs4 import BeautifulSoup
-import re
 import os
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from marketing.models_extended import VideoScript, VideoTheme, ClientLevel, Platform
+
+# Mapping thèmes (id de la section <details> → thème)
+THEME_MAPPING = {
+    'theme-argent': VideoTheme.ARGENT,
+    'theme-temps': VideoTheme.TEMPS,
+    'theme-tranquillite': VideoTheme.TRANQUILLITE,
+    'theme-croissance': VideoTheme.CROISSANCE,
+    'theme-ia': VideoTheme.IA,
+    'theme-fidelite': VideoTheme.FIDELITE,
+    'theme-mobile': VideoTheme.MOBILE,
+    'theme-impression': VideoTheme.IMPRESSION,
+}
+
+# Format du résumé : "Video A1 - Titre"
+TITLE_PATTERN = re.compile(r'Video\s+([A-Z]+\d+)\s*-\s*"?([^"]+)"?')
+
+# Champs écrits par l'import (usage_count, alternatives... sont conservés)
+IMPORTED_FIELDS = [
+    'title', 'theme', 'client_level', 'platform', 'duration_min', 'duration_max',
+    'hook', 'hook_timing', 'problem', 'problem_timing',
+    'micro_revelation', 'micro_revelation_timing',
+    'solution', 'solution_timing', 'solution_hint',
+    'proof', 'proof_timing', 'cta', 'cta_timing', 'tags',
+]
+
+
+def _classes(element):
+    return (element.get('class') or '').split()
+
+
+def _text(element):
+    """Texte concaténé sans espaces de bord (équivalent get_text(strip=True))"""
+    return ''.join(part.strip() for part in element.itertext())
+
+
+def _summary(video):
+    for child in video:
+        if child.tag == 'summary':
+            return child
+    return None
+
+
+def _theme_of(video):
+    """Thème d'un <details> vidéo : enfant direct de div.details-inner d'une section thème"""
+    inner = video.getparent()
+    if inner is None or inner.tag != 'div' or 'details-inner' not in _classes(inner):
+        return None
+    section = inner.getparent()
+    while section is not None and section.tag != 'details':
+        section = section.getparent()
+    return THEME_MAPPING.get(section.get('id')) if section is not None else None
 
 
 class Command(BaseCommand):
@@ -25,135 +86,166 @@ class Command(BaseCommand):
             action='store_true',
             help='Supprimer tous les scripts existants avant import'
         )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Afficher le diff (créés / modifiés) sans rien écrire"
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
-        
+
         if not os.path.exists(file_path):
             self.stdout.write(self.style.ERROR(f"Fichier non trouvé : {file_path}"))
             return
-        
-        if options['clear']:
-            count = VideoScript.objects.count()
-            VideoScript.objects.all().delete()
-            self.stdout.write(self.style.WARNING(f"✓ {count} scripts supprimés"))
-        
+
         self.stdout.write(self.style.SUCCESS(f"Lecture de {file_path}..."))
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Mapping thèmes
-        theme_mapping = {
-            'theme-argent': VideoTheme.ARGENT,
-            'theme-temps': VideoTheme.TEMPS,
-            'theme-tranquillite': VideoTheme.TRANQUILLITE,
-            'theme-croissance': VideoTheme.CROISSANCE,
-            'theme-ia': VideoTheme.IA,
-            'theme-fidelite': VideoTheme.FIDELITE,
-            'theme-mobile': VideoTheme.MOBILE,
-            'theme-impression': VideoTheme.IMPRESSION,
-        }
-        
-        imported = 0
-        skipped = 0
-        
-        for theme_id, theme_value in theme_mapping.items():
-            theme_section = soup.find('details', id=theme_id)
-            if not theme_section:
+
+        start = time.perf_counter()
+        scripts, skipped = self.parse(file_path)
+        parse_seconds = time.perf_counter() - start
+
+        # Diff contre la base : une requête
+        start = time.perf_counter()
+        existing = {} if options['clear'] else VideoScript.objects.in_bulk(list(scripts), field_name='code')
+        created, updated, unchanged = [], [], 0
+        for code, data in scripts.items():
+            current = existing.get(code)
+            if current is None:
+                created.append(code)
+                self.stdout.write(self.style.SUCCESS(f"+ {code} - {data['title']}"))
                 continue
-            
-            # Trouver le container .details-inner
-            details_inner = theme_section.find('div', class_='details-inner')
-            if not details_inner:
+            changed = [field for field in IMPORTED_FIELDS if getattr(current, field) != data[field]]
+            if changed:
+                updated.append(code)
+                self.stdout.write(self.style.WARNING(f"~ {code} - {data['title']} ({', '.join(changed)})"))
+            else:
+                unchanged += 1
+        diff_seconds = time.perf_counter() - start
+
+        summary = (
+            f"{len(created)} nouveaux, {len(updated)} modifiés, {unchanged} inchangés, {skipped} ignorés"
+        )
+        timings = f"parse {parse_seconds:.2f}s, diff {diff_seconds:.2f}s"
+
+        if options['dry_run']:
+            if options['clear']:
+                self.stdout.write(self.style.WARNING(f"- {VideoScript.objects.count()} scripts seraient supprimés"))
+            self.stdout.write(self.style.SUCCESS(f"\n🔎 Dry-run : {summary} ({timings})"))
+            return
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            if options['clear']:
+                count, _ = VideoScript.objects.all().delete()
+                self.stdout.write(self.style.WARNING(f"✓ {count} scripts supprimés"))
+
+            to_write = [VideoScript(code=code, **scripts[code]) for code in created + updated]
+            if to_write:
+                VideoScript.objects.bulk_create(
+                    to_write,
+                    update_conflicts=True,
+                    unique_fields=['code'],
+                    update_fields=IMPORTED_FIELDS + ['updated_at'],
+                )
+        write_seconds = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ Import terminé : {summary} ({timings}, écriture {write_seconds:.2f}s)"
+        ))
+
+    def parse(self, file_path):
+        """
+        Parse le fichier en flux.
+
+        Returns:
+            ({code: champs du script}, nombre de scripts ignorés)
+        """
+        try:
+            from lxml import etree
+        except ImportError:
+            raise CommandError("lxml requis : pip install lxml")
+
+        scripts = {}
+        skipped = 0
+
+        for _event, video in etree.iterparse(
+            file_path, events=('end',), tag='details', html=True, encoding='utf-8'
+        ):
+            theme = _theme_of(video)
+            if theme is None:
+                # Section thème (ou <details> hors sections) : ses vidéos sont déjà traitées
                 continue
-            
-            # Trouver tous les <details> enfants directs (scripts vidéo)
-            video_details = details_inner.find_all('details', recursive=False)
-            
-            for video in video_details:
-                summary = video.find('summary')
-                if not summary:
-                    continue
-                
-                # Extraire le titre
-                title_text = summary.get_text(strip=True)
-                # Format: "Video A1 - Titre"
-                match = re.match(r'Video\s+([A-Z]+\d+)\s*-\s*"?([^"]+)"?', title_text)
-                if not match:
-                    continue
-                
-                code = match.group(1)
-                title = match.group(2).strip('"')
-                
-                # Extraire les segments
-                script_blocks = video.find_all('div', class_='script-block')
-                
-                if len(script_blocks) < 6:
-                    self.stdout.write(self.style.WARNING(f"⚠ {code} : structure incomplète"))
+
+            summary = _summary(video)
+            match = TITLE_PATTERN.match(_text(summary)) if summary is not None else None
+            if match:
+                data = self.extract_script(video, match, theme)
+                if data is None:
+                    self.stdout.write(self.style.WARNING(f"⚠ {match.group(1)} : structure incomplète"))
                     skipped += 1
-                    continue
-                
-                def extract_text(block):
-                    """Extrait le texte d'un script-block"""
-                    paragraphs = block.find_all('p')
-                    # Ignorer les paragraphes avec class="hint"
-                    texts = [p.get_text(strip=True) for p in paragraphs if 'hint' not in p.get('class', [])]
-                    return ' '.join(texts)
-                
-                def extract_hint(block):
-                    """Extrait le hint d'un script-block"""
-                    hint = block.find('p', class_='hint')
-                    return hint.get_text(strip=True) if hint else ''
-                
-                hook = extract_text(script_blocks[0])
-                problem = extract_text(script_blocks[1])
-                micro_revelation = extract_text(script_blocks[2])
-                solution = extract_text(script_blocks[3])
-                solution_hint = extract_hint(script_blocks[3])
-                proof = extract_text(script_blocks[4])
-                cta = extract_text(script_blocks[5])
-                
-                # Créer ou mettre à jour le script
-                script, created = VideoScript.objects.update_or_create(
-                    code=code,
-                    defaults={
-                        'title': title,
-                        'theme': theme_value,
-                        'client_level': ClientLevel.TOUS,
-                        'platform': Platform.ALL,
-                        'duration_min': 30,
-                        'duration_max': 60,
-                        'hook': hook,
-                        'hook_timing': '0-3s',
-                        'problem': problem,
-                        'problem_timing': '3-8s',
-                        'micro_revelation': micro_revelation,
-                        'micro_revelation_timing': '8-12s',
-                        'solution': solution,
-                        'solution_timing': '12-25s',
-                        'solution_hint': solution_hint,
-                        'proof': proof,
-                        'proof_timing': '25-35s',
-                        'cta': cta,
-                        'cta_timing': '35-40s',
-                        'tags': self.extract_tags(title, solution),
-                    }
-                )
-                
-                action = "créé" if created else "mis à jour"
-                self.stdout.write(self.style.SUCCESS(f"✓ {code} - {title} ({action})"))
-                imported += 1
-        
-        self.stdout.write(self.style.SUCCESS(f"\n✅ Import terminé : {imported} scripts importés, {skipped} ignorés"))
-    
+                else:
+                    code, fields = data
+                    if code in scripts:
+                        self.stdout.write(self.style.WARNING(f"⚠ {code} : en double, dernière version gardée"))
+                    scripts[code] = fields
+
+            # Libérer le sous-arbre traité (et les vidéos précédentes)
+            video.clear()
+            while video.getprevious() is not None:
+                del video.getparent()[0]
+
+        return scripts, skipped
+
+    def extract_script(self, video, match, theme):
+        """Champs d'un script depuis son <details>, ou None si incomplet"""
+        code = match.group(1)
+        title = match.group(2).strip('"')
+
+        script_blocks = [
+            div for div in video.iter('div') if 'script-block' in _classes(div)
+        ]
+        if len(script_blocks) < 6:
+            return None
+
+        def extract_text(block):
+            """Extrait le texte d'un script-block (sans les paragraphes hint)"""
+            return ' '.join(_text(p) for p in block.iter('p') if 'hint' not in _classes(p))
+
+        def extract_hint(block):
+            """Extrait le hint d'un script-block"""
+            hint = next((p for p in block.iter('p') if 'hint' in _classes(p)), None)
+            return _text(hint) if hint is not None else ''
+
+        solution = extract_text(script_blocks[3])
+        return code, {
+            'title': title,
+            'theme': theme,
+            'client_level': ClientLevel.TOUS,
+            'platform': Platform.ALL,
+            'duration_min': 30,
+            'duration_max': 60,
+            'hook': extract_text(script_blocks[0]),
+            'hook_timing': '0-3s',
+            'problem': extract_text(script_blocks[1]),
+            'problem_timing': '3-8s',
+            'micro_revelation': extract_text(script_blocks[2]),
+            'micro_revelation_timing': '8-12s',
+            'solution': solution,
+            'solution_timing': '12-25s',
+            'solution_hint': extract_hint(script_blocks[3]),
+            'proof': extract_text(script_blocks[4]),
+            'proof_timing': '25-35s',
+            'cta': extract_text(script_blocks[5]),
+            'cta_timing': '35-40s',
+            'tags': self.extract_tags(title, solution),
+        }
+
     def extract_tags(self, title, solution):
         """Extrait des tags depuis le titre et la solution"""
         tags = []
         text = f"{title} {solution}".lower()
-        
+
         # Tags courants
         tag_keywords = {
             'scanner': ['scan', 'code-barr', 'barcode'],
@@ -166,9 +258,9 @@ class Command(BaseCommand):
             'rapport': ['rapport', 'dashboard', 'statistique'],
             'multi-site': ['boutique', 'site', 'multi'],
         }
-        
+
         for tag, keywords in tag_keywords.items():
             if any(kw in text for kw in keywords):
                 tags.append(tag)
-        
+
         return tags
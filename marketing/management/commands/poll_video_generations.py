@@ -8,6 +8,8 @@ Usage: python manage.py poll_video_generations
 from django.core.management.base import BaseCommand
 from marketing.models_extended import VideoProductionJob, VideoSegmentGeneration
 from marketing.ai.generation_orchestrator import GenerationOrchestrator
+from marketing.ai.heygen_tracker import HeyGenTracker
+from marketing.ai.rate_governor import governor_stats
 
 
 class Command(BaseCommand):
@@ -49,9 +51,22 @@ class Command(BaseCommand):
             'segments_completed': 0,
             'segments_failed': 0,
             'segments_processing': 0,
+            'avatars': 0,
         }
         
         for job in jobs:
+            if job.get_config('heygen_video_id'):
+                # Vidéo avatar HeyGen : pas de segments, suivi par le tracker
+                # (ne poll que si l'échéance de backoff est passée)
+                try:
+                    status = HeyGenTracker(job).poll(force=bool(job_id))
+                    total_stats['avatars'] += 1
+                    if verbose:
+                        self.stdout.write(f"  Job #{job.pk} ({job.title}): avatar HeyGen {status}")
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"  Error polling HeyGen job #{job.pk}: {e}"))
+                continue
+            
             try:
                 orchestrator = GenerationOrchestrator(job)
                 stats = orchestrator.poll_status()
@@ -81,5 +96,14 @@ class Command(BaseCommand):
                 f"{total_stats['segments_completed']} completed, "
                 f"{total_stats['segments_failed']} failed, "
                 f"{total_stats['segments_processing']} processing"
+                + (f", {total_stats['avatars']} avatar(s) HeyGen" if total_stats['avatars'] else '')
             )
         )
+        
+        if verbose:
+            for name, counters in governor_stats().items():
+                self.stdout.write(
+                    f"  ⏱️ {name}: {counters['calls']} appels, "
+                    f"{counters['throttled_calls']} ralentis ({counters['throttled_seconds']}s), "
+                    f"{counters['rate_limited']} x 429"
+                )
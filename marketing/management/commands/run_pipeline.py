@@ -11,8 +11,12 @@ Usage:
     # Créer des jobs depuis la bibliothèque et lancer
     python manage.py run_pipeline --intake --count 3
     
-    # Lancer tous les jobs en attente
-    python manage.py run_pipeline --pending
+    # Lancer tous les jobs en attente (DAG, en parallèle entre jobs)
+    python manage.py run_pipeline --pending --workers 8
+
+Sans --agent, les étapes sont exécutées par le PipelineExecutor : les étapes
+indépendantes (voix, vidéo IA) tournent en parallèle et la progression est
+persistée, un run interrompu reprend là où il s'était arrêté.
 """
 
 from django.core.management.base import BaseCommand
@@ -22,11 +26,13 @@ from marketing.agents import (
     VoiceAgent,
     VideoAgent,
     QAAgent,
+    PipelineExecutor,
 )
+from marketing.agents.executor import INACTIVE_STATUSES
 from marketing.models_extended import VideoProductionJob
 
 
-# Pipeline ordonné
+# Pipeline ordonné (les dépendances réelles sont déclarées par les agents)
 PIPELINE = [
     ('idea_intake', IdeaIntakeAgent, ['draft']),
     ('script_writer', ScriptWriterAgent, ['draft', 'script_pending']),
@@ -46,6 +52,7 @@ class Command(BaseCommand):
         parser.add_argument('--count', type=int, default=3, help='Nombre de jobs à créer (avec --intake)')
         parser.add_argument('--pending', action='store_true', help='Traiter tous les jobs en attente')
         parser.add_argument('--dry-run', action='store_true', help='Simulation sans exécution')
+        parser.add_argument('--workers', type=int, help='Taille du pool de workers (exécuteur DAG)')
     
     def handle(self, *args, **options):
         if options['intake']:
@@ -57,7 +64,10 @@ class Command(BaseCommand):
             return
         
         if options['job_id']:
-            self._handle_job(options['job_id'], options.get('agent'), options.get('dry_run', False))
+            self._handle_job(
+                options['job_id'], options.get('agent'),
+                options.get('dry_run', False), options.get('workers')
+            )
             return
         
         self.stderr.write("Spécifiez --job-id, --intake, ou --pending")
@@ -70,9 +80,18 @@ class Command(BaseCommand):
     
     def _handle_pending(self, options):
         """Traite tous les jobs en attente."""
-        # Trouver les jobs à chaque étape du pipeline
+        if not options.get('agent'):
+            job_ids = list(
+                VideoProductionJob.objects
+                .exclude(status__in=INACTIVE_STATUSES)
+                .values_list('id', flat=True)
+            )
+            self._run_dag(job_ids, options.get('workers'), options.get('dry_run', False))
+            return
+        
+        # Agent spécifique : trouver les jobs à son étape
         for agent_name, agent_class, valid_statuses in PIPELINE:
-            if options.get('agent') and options['agent'] != agent_name:
+            if options['agent'] != agent_name:
                 continue
             
             jobs = VideoProductionJob.objects.filter(status__in=valid_statuses)
@@ -83,7 +102,7 @@ class Command(BaseCommand):
                 for job in jobs:
                     self._run_agent(agent_class, job, options.get('dry_run', False))
     
-    def _handle_job(self, job_id, agent_name, dry_run):
+    def _handle_job(self, job_id, agent_name, dry_run, workers=None):
         """Traite un job spécifique."""
         try:
             job = VideoProductionJob.objects.get(id=job_id)
@@ -103,12 +122,44 @@ class Command(BaseCommand):
             self._run_agent(agent_map[agent_name], job, dry_run)
         else:
             # Pipeline complet
-            for name, agent_class, valid_statuses in PIPELINE:
-                if job.status in valid_statuses:
-                    result = self._run_agent(agent_class, job, dry_run)
-                    if not result or not result.success:
-                        break
-                    job.refresh_from_db()
+            self._run_dag([job.id], workers, dry_run)
+    
+    def _run_dag(self, job_ids, workers=None, dry_run=False):
+        """Exécute le pipeline en DAG sur plusieurs jobs."""
+        if not job_ids:
+            self.stdout.write("Aucun job en attente")
+            return
+        
+        executor = PipelineExecutor(
+            [(name, agent_class) for name, agent_class, _ in PIPELINE],
+            max_workers=workers,
+        )
+        
+        if dry_run:
+            for job, name, resource in executor.ready_stages(job_ids):
+                self.stdout.write(
+                    f"  🔍 {name}: [DRY RUN] would run on job #{job.id} ({resource or 'local'})"
+                )
+            return
+        
+        self.stdout.write(
+            f"\n🔄 {len(job_ids)} job(s), {executor.max_workers} workers"
+        )
+        
+        def report(job_id, name, result):
+            if result.success:
+                self.stdout.write(self.style.SUCCESS(f"  ✅ Job #{job_id} {result}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  ❌ Job #{job_id} {result}"))
+        
+        stats = executor.run(job_ids, on_result=report)
+        
+        self.stdout.write(
+            f"\n📊 {stats['completed']} étapes OK, {stats['failed']} en erreur, "
+            f"{stats['skipped']} ignorées"
+        )
+        if stats['cost_usd'] > 0:
+            self.stdout.write(f"     💰 Coût: ${stats['cost_usd']:.4f}")
     
     def _run_agent(self, agent_class, job, dry_run=False):
         """Exécute un agent sur un job."""
@@ -0,0 +1,80 @@
+"""
+Management command : workers de la file de tâches persistée.
+
+Usage:
+    python manage.py run_workers
+    python manage.py run_workers --concurrency 4
+    python manage.py run_workers --once          # Vide la file puis s'arrête
+"""
+
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from marketing import tasks  # noqa: F401  (enregistre les tâches)
+from marketing.task_queue import Worker
+
+
+class Command(BaseCommand):
+    help = 'Exécute les tâches de fond (file persistée en base)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Nombre de workers (threads)')
+        parser.add_argument('--once', action='store_true', help="S'arrêter quand la file est vide")
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=getattr(settings, 'MARKETING_TASK_POLL_INTERVAL', 2),
+            help='Attente entre deux polls quand la file est vide (secondes)'
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write(self.style.WARNING("\n⏹️ Arrêt demandé, fin des tâches en cours..."))
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(self.style.SUCCESS(f"👷 {concurrency} worker(s) démarré(s)"))
+
+        threads = [
+            threading.Thread(
+                target=self._loop,
+                args=(stop, options['once'], options['poll_interval']),
+                daemon=True,
+            )
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS("✅ Workers arrêtés"))
+
+    def _loop(self, stop, once, poll_interval):
+        worker = Worker()
+        try:
+            while not stop.is_set():
+                try:
+                    processed = worker.run_once()
+                except Exception as e:
+                    # Erreur DB transitoire : on attend avant de réessayer
+                    self.stderr.write(f"⚠️ {worker.worker_id}: {e}")
+                    connection.close()
+                    processed = False
+
+                if not processed:
+                    if once:
+                        break
+                    stop.wait(poll_interval)
+        finally:
+            connection.close()
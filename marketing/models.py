@@ -65,7 +65,7 @@ class VideoSegment(models.Model):
     cost_usd = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
     generation_time_sec = models.IntegerField(null=True, blank=True)
     error_message = models.TextField(blank=True)
-    metadata = models.JSONField(default=dict, blank=True, help_text="Données API brutes")
+    metadata = models.JSONField(default=dict, blank=True, help_text="Suivi interne (cache) ; réponses API dans ProviderPayload")
     
     # Édition
     selected = models.BooleanField(default=True, verbose_name="Sélectionné pour vidéo finale")
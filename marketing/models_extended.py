@@ -4,11 +4,19 @@ Architecture scalable, agnostique provider/mode.
 """
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+import hashlib
 import json
 
 
+def theme_hash(theme: str) -> str:
+    """Empreinte du thème normalisé (casse et espaces ignorés) pour la déduplication"""
+    normalized = ' '.join((theme or '').split()).lower()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
 class VideoGenerationMode(models.TextChoices):
     """Modes de génération vidéo (extensible)"""
     TEXT_TO_VIDEO = 'text_to_video', 'Text to Video'
@@ -159,6 +167,14 @@ class VideoScript(models.Model):
         ordering = ['theme', 'code']
         verbose_name = "Script Vidéo"
         verbose_name_plural = "Scripts Vidéo"
+        # Colonnes de tri de la bibliothèque (plein texte / tags : voir search.py)
+        indexes = [
+            models.Index(fields=['-created_at']),
+            # Tri « plus utilisé » (parcours inverse) et sélection des moins utilisés
+            models.Index(fields=['usage_count', 'code']),
+            models.Index(fields=['theme', 'usage_count', 'code']),
+            models.Index(fields=['title', 'code']),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.title}"
@@ -175,9 +191,12 @@ class VideoScript(models.Model):
         }
     
     def increment_usage(self):
-        """Incrémente le compteur d'utilisation"""
-        self.usage_count += 1
-        self.save(update_fields=['usage_count'])
+        """Incrémente le compteur d'utilisation (atomique, F())"""
+        VideoScript.objects.filter(pk=self.pk).update(
+            usage_count=models.F('usage_count') + 1,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['usage_count', 'updated_at'])
 
 
 class VideoProjectTemplate(models.Model):
@@ -245,6 +264,10 @@ class VideoProductionJob(models.Model):
     # Identité
     title = models.CharField(max_length=300)
     theme = models.CharField(max_length=500, help_text="Sujet/thème de la vidéo")
+    theme_hash = models.CharField(
+        max_length=40, blank=True, editable=False,
+        help_text="Empreinte du thème normalisé (déduplication)"
+    )
     template = models.ForeignKey(
         VideoProjectTemplate,
         on_delete=models.SET_NULL,
@@ -299,9 +322,15 @@ class VideoProductionJob(models.Model):
     )
     actual_cost = models.DecimalField(
         max_digits=10,
-        decimal_places=2,
+        decimal_places=4,
         default=0,
-        help_text="Coût réel ($)"
+        help_text="Coût réel ($), cumul du registre des coûts"
+    )
+    cache_savings = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        default=0,
+        help_text="Coût évité grâce au cache de génération ($)"
     )
     
     # Logs
@@ -334,11 +363,28 @@ class VideoProductionJob(models.Model):
         indexes = [
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['created_by', '-created_at']),
+            models.Index(fields=['theme_hash', '-created_at']),
         ]
     
     def __str__(self):
         return f"{self.title} [{self.get_status_display()}]"
     
+    def save(self, *args, **kwargs):
+        self.theme_hash = theme_hash(self.theme)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'theme' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'theme_hash'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def backfill_theme_hashes(cls, using: str = 'default', batch_size: int = 500) -> int:
+        """Calcule theme_hash des jobs qui n'en ont pas (jobs antérieurs au champ)"""
+        jobs = list(cls.objects.using(using).filter(theme_hash='').only('pk', 'theme'))
+        for job in jobs:
+            job.theme_hash = theme_hash(job.theme)
+        cls.objects.using(using).bulk_update(jobs, ['theme_hash'], batch_size=batch_size)
+        return len(jobs)
+    
     def get_config(self, key, default=None):
         """Récupère config avec fallback template"""
         # 1. Job config
@@ -351,26 +397,10 @@ class VideoProductionJob(models.Model):
         return default
     
     def calculate_estimated_cost(self):
-        """Calcule coût estimé selon provider/durée"""
-        provider = self.get_config('provider', 'luma')
-        segments = self.get_config('segments_count', 6)
-        duration = self.get_config('segment_duration', 5)
-        
-        # Pricing par provider ($/sec)
-        pricing = {
-            'luma': 0.03,
-            'runway': 0.05,
-            'pika': 0.03,
-            'stability': 0.015,
-        }
-        
-        rate = pricing.get(provider, 0.03)
-        video_cost = segments * duration * rate
-        script_cost = 0.01
-        voice_cost = (segments * duration / 30) * 0.02
+        """Calcule coût estimé selon provider/durée (tarifs des providers)"""
+        from marketing.cost_ledger import estimate_job_cost
         
-        total = video_cost + script_cost + voice_cost
-        self.estimated_cost = round(total, 2)
+        self.estimated_cost = estimate_job_cost(self)
         return self.estimated_cost
 
 
@@ -526,7 +556,7 @@ class VideoSegmentGeneration(models.Model):
     video_url = models.URLField(blank=True)
     local_path = models.CharField(max_length=500, blank=True)
     
-    # Metadata
+    # Metadata légère (routage, cache) ; réponses brutes : ProviderPayload
     provider_metadata = models.JSONField(default=dict)
     error_message = models.TextField(blank=True)
     
@@ -537,11 +567,13 @@ class VideoSegmentGeneration(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Génération Segment"
         verbose_name_plural = "Générations Segments"
         ordering = ['job', 'segment_index']
+        unique_together = [['job', 'segment_index']]
         indexes = [
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['provider', 'provider_job_id']),
@@ -579,3 +611,398 @@ class VideoSegmentGeneration(models.Model):
         parts.append("Vertical video 9:16, cinematic, smooth camera movement.")
         
         return " ".join(parts)
+
+
+class PipelineStageRun(models.Model):
+    """
+    Progression persistée d'une étape du pipeline d'agents pour un job.
+    Permet à l'exécuteur DAG de reprendre après un crash sans
+    relancer les étapes déjà terminées.
+    """
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'En attente'
+        RUNNING = 'running', 'En cours'
+        COMPLETED = 'completed', 'Terminé'
+        FAILED = 'failed', 'Échec'
+    
+    job = models.ForeignKey(
+        VideoProductionJob,
+        on_delete=models.CASCADE,
+        related_name='stage_runs'
+    )
+    stage = models.CharField(max_length=50, help_text="Nom de l'étape (voice, video, ...)")
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.IntegerField(default=0)
+    
+    # Résultat de l'agent
+    message = models.TextField(blank=True)
+    data = models.JSONField(default=dict)
+    cost = models.DecimalField(max_digits=8, decimal_places=4, default=0)
+    
+    # Timestamps
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Étape Pipeline"
+        verbose_name_plural = "Étapes Pipeline"
+        ordering = ['job', 'started_at']
+        unique_together = [['job', 'stage']]
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"Job {self.job_id} - {self.stage} ({self.status})"
+
+
+class BackgroundTask(models.Model):
+    """
+    Tâche de fond persistée (file d'attente en base, sans broker).
+    Consommée par `python manage.py run_workers`.
+    """
+    
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'En file'
+        RUNNING = 'running', 'En cours'
+        SUCCEEDED = 'succeeded', 'Terminée'
+        FAILED = 'failed', 'Échec définitif'
+    
+    name = models.CharField(max_length=100, help_text="Nom de la tâche enregistrée")
+    payload = models.JSONField(default=dict)
+    
+    # Déduplication : une seule tâche active par clé
+    unique_key = models.CharField(max_length=200, blank=True, db_index=True)
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED
+    )
+    priority = models.IntegerField(default=0, help_text="Plus haut = traité en premier")
+    
+    # Retries
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Pas exécutée avant cette date")
+    last_error = models.TextField(blank=True)
+    
+    # Visibilité : une tâche 'running' dont le verrou expire redevient disponible
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Tâche de fond"
+        verbose_name_plural = "Tâches de fond"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at']),
+            models.Index(fields=['status', 'locked_until']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class GeneratedClip(models.Model):
+    """
+    Cache des clips générés par les providers vidéo.
+    
+    Clé = empreinte de (provider, modèle, prompt enrichi, durée, ratio,
+    résolution). Le clip est copié dans MinIO à la fin de la génération,
+    puis réutilisé au lieu de rappeler generate_clip (job relancé,
+    segment régénéré avec le même prompt).
+    """
+    
+    cache_key = models.CharField(max_length=64, unique=True)
+    
+    # Paramètres de génération (pour l'admin et l'invalidation ciblée)
+    provider = models.CharField(max_length=30)
+    model = models.CharField(max_length=100, blank=True)
+    resolution = models.CharField(max_length=20, blank=True)
+    duration = models.IntegerField()
+    aspect_ratio = models.CharField(max_length=10, default='9:16')
+    prompt = models.TextField()
+    
+    # Clip stocké
+    object_name = models.CharField(max_length=300, help_text="Objet MinIO")
+    url = models.URLField(max_length=500)
+    source_generation = models.ForeignKey(
+        VideoSegmentGeneration,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='cached_clips'
+    )
+    
+    # Économies
+    cost = models.DecimalField(max_digits=6, decimal_places=3, default=0, help_text="Coût de la génération ($)")
+    hits = models.IntegerField(default=0)
+    saved_cost = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    
+    # Validité
+    invalidated = models.BooleanField(default=False)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Clip en cache"
+        verbose_name_plural = "Clips en cache"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['provider', '-created_at']),
+            models.Index(fields=['invalidated', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.provider} {self.duration}s [{self.cache_key[:12]}]"
+    
+    @property
+    def is_valid(self):
+        if self.invalidated:
+            return False
+        return self.expires_at is None or self.expires_at > timezone.now()
+
+
+class DirectUpload(models.Model):
+    """
+    Upload multipart envoyé directement du navigateur vers le bucket
+    (URLs présignées). Django n'enregistre que les métadonnées, puis
+    rattache l'objet à un SegmentAsset ou à un clip de segment.
+    """
+    
+    class Kind(models.TextChoices):
+        ASSET = 'asset', 'Asset de segment'
+        CLIP = 'clip', 'Clip filmé'
+    
+    class Status(models.TextChoices):
+        INITIATED = 'initiated', 'En cours'
+        COMPLETED = 'completed', 'Terminé'
+        ATTACHED = 'attached', 'Rattaché'
+        ABORTED = 'aborted', 'Abandonné'
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='direct_uploads'
+    )
+    job = models.ForeignKey(
+        VideoProductionJob,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='direct_uploads',
+        help_text="Job cible (peut être créé après l'upload)"
+    )
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    
+    # Fichier
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    
+    # Objet S3/MinIO
+    bucket = models.CharField(max_length=100)
+    object_name = models.CharField(max_length=300)
+    upload_id = models.CharField(max_length=300, help_text="UploadId multipart S3")
+    part_size = models.BigIntegerField()
+    part_count = models.IntegerField()
+    url = models.URLField(max_length=500, blank=True)
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.INITIATED
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Upload direct"
+        verbose_name_plural = "Uploads directs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.filename} ({self.get_status_display()})"
+
+
+class CostEntry(models.Model):
+    """
+    Registre des coûts : une ligne par appel provider/agent facturé.
+    Écrit par marketing.cost_ledger.record_cost, qui tient aussi à jour
+    VideoProductionJob.actual_cost et les cumuls journaliers.
+    """
+    
+    class Kind(models.TextChoices):
+        SCRIPT = 'script', 'Script'
+        VOICE = 'voice', 'Voix-off'
+        VIDEO = 'video', 'Segment vidéo'
+        AVATAR = 'avatar', 'Vidéo avatar'
+        IMAGE = 'image', 'Image'
+        OTHER = 'other', 'Autre'
+    
+    job = models.ForeignKey(
+        VideoProductionJob,
+        on_delete=models.CASCADE,
+        related_name='cost_entries'
+    )
+    segment = models.ForeignKey(
+        VideoSegmentGeneration,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='cost_entries'
+    )
+    provider = models.CharField(max_length=30)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    amount = models.DecimalField(max_digits=10, decimal_places=4)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Coût"
+        verbose_name_plural = "Registre des coûts"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['job', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Job {self.job_id} - {self.provider}/{self.kind} ${self.amount}"
+
+
+class CostDailyRollup(models.Model):
+    """
+    Cumul journalier des coûts par provider et type, incrémenté à chaque
+    écriture du registre : le dashboard lit quelques lignes au lieu de
+    parcourir CostEntry.
+    """
+    
+    day = models.DateField()
+    provider = models.CharField(max_length=30)
+    kind = models.CharField(max_length=20, choices=CostEntry.Kind.choices)
+    amount = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    entries = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Coût journalier"
+        verbose_name_plural = "Coûts journaliers"
+        ordering = ['-day', 'provider', 'kind']
+        unique_together = [['day', 'provider', 'kind']]
+    
+    def __str__(self):
+        return f"{self.day} {self.provider}/{self.kind} ${self.amount}"
+
+
+class ProviderPayload(models.Model):
+    """
+    Réponse brute d'un provider (lancement, statut, webhook), hors des
+    lignes consultées en liste : JSON compressé (zlib), chargé seulement à
+    la demande (voir marketing.payloads).
+    """
+    
+    class Kind(models.TextChoices):
+        LAUNCH = 'launch', 'Lancement'
+        STATUS = 'status', 'Statut'
+        WEBHOOK = 'webhook', 'Webhook'
+    
+    job = models.ForeignKey(
+        VideoProductionJob,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='payloads'
+    )
+    generation = models.ForeignKey(
+        VideoSegmentGeneration,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='payloads'
+    )
+    video_segment = models.ForeignKey(
+        'marketing.VideoSegment',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='payloads'
+    )
+    provider = models.CharField(max_length=30)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    data = models.BinaryField(help_text="JSON compressé (zlib)")
+    size = models.IntegerField(default=0, help_text="Taille du JSON non compressé (octets)")
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Réponse provider"
+        verbose_name_plural = "Réponses providers"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['generation', '-created_at']),
+            models.Index(fields=['job', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.provider}/{self.kind} ({self.size} o)"
+
+
+class MediaProbe(models.Model):
+    """
+    Métadonnées ffprobe d'un fichier média (clip uploadé, segment généré,
+    segment normalisé, vidéo finale). Une ligne par empreinte de contenu :
+    un fichier n'est sondé qu'une fois, quel que soit le job qui l'utilise
+    (voir marketing.ai.media_probe).
+    """
+    
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 du contenu (ou clé de fichier dérivé du cache média)"
+    )
+    duration = models.FloatField(default=0)
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+    fps = models.FloatField(null=True, blank=True)
+    video_codec = models.CharField(max_length=30, blank=True)
+    pix_fmt = models.CharField(max_length=30, blank=True)
+    time_base = models.CharField(max_length=30, blank=True, help_text="Base de temps du flux vidéo (ex: 1/15360)")
+    sample_aspect_ratio = models.CharField(max_length=30, blank=True)
+    profile = models.CharField(max_length=30, blank=True, help_text="Profil H.264 (ex: High)")
+    level = models.IntegerField(null=True, blank=True)
+    variable_frame_rate = models.BooleanField(
+        default=False,
+        help_text="Cadence variable (r_frame_rate ≠ avg_frame_rate)"
+    )
+    has_audio = models.BooleanField(default=False)
+    audio_codec = models.CharField(max_length=30, blank=True)
+    sample_rate = models.IntegerField(null=True, blank=True)
+    channels = models.IntegerField(null=True, blank=True)
+    size = models.BigIntegerField(default=0, help_text="Taille du fichier (octets)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Analyse média"
+        verbose_name_plural = "Analyses média"
+    
+    def __str__(self):
+        return f"{self.digest[:12]} {self.width}x{self.height} {self.duration:.2f}s"
@@ -0,0 +1,71 @@
+"""
+Réponses brutes des providers, stockées à part et compressées.
+
+Les JSON renvoyés par les APIs (lancement, statut, webhook) ne vont plus
+dans provider_metadata / VideoSegment.metadata / job.config : ces colonnes
+sont lues à chaque liste et à chaque poll de statut. Ils sont écrits dans
+ProviderPayload (zlib) et relus seulement quand on les demande (admin,
+debug).
+
+Usage:
+    store_payload(result.metadata, 'luma', ProviderPayload.Kind.STATUS, generation=segment)
+    latest_payload(generation=segment)  # → dict ou None
+"""
+
+import json
+import logging
+import zlib
+from typing import Optional
+
+from .models_extended import ProviderPayload
+
+logger = logging.getLogger(__name__)
+
+
+def compress(data) -> tuple:
+    """(JSON compressé, taille non compressée)"""
+    raw = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    return zlib.compress(raw, 6), len(raw)
+
+
+def decompress(blob) -> dict:
+    return json.loads(zlib.decompress(bytes(blob)).decode('utf-8'))
+
+
+def store_payload(data, provider: str, kind: str, job=None, generation=None, video_segment=None) -> Optional[ProviderPayload]:
+    """
+    Archive une réponse brute (rien si vide). Un échec d'archivage ne doit
+    pas faire échouer l'appel provider : il est seulement journalisé.
+    """
+    if not data:
+        return None
+    try:
+        blob, size = compress(data)
+        return ProviderPayload.objects.create(
+            job_id=getattr(job, 'pk', None) or getattr(generation, 'job_id', None),
+            generation=generation,
+            video_segment=video_segment,
+            provider=provider or 'unknown',
+            kind=kind,
+            data=blob,
+            size=size,
+        )
+    except Exception as e:
+        logger.warning(f"Réponse {provider}/{kind} non archivée: {e}")
+        return None
+
+
+def load_payload(payload: ProviderPayload) -> dict:
+    return decompress(payload.data)
+
+
+def latest_payload(kind: str = None, **owner) -> Optional[dict]:
+    """
+    Dernière réponse archivée pour un propriétaire (job=, generation= ou
+    video_segment=), éventuellement d'un type donné.
+    """
+    qs = ProviderPayload.objects.filter(**owner)
+    if kind:
+        qs = qs.filter(kind=kind)
+    payload = qs.order_by('-created_at').first()
+    return load_payload(payload) if payload else None
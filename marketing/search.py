@@ -0,0 +1,281 @@
+"""
+Recherche plein texte des jobs de production et des scripts vidéo.
+
+Jobs :
+- PostgreSQL : index trigram (pg_trgm, GIN) sur UPPER(title) et UPPER(theme),
+  exactement les expressions produites par `icontains` : la recherche
+  existante devient indexée sans changer de requête.
+- SQLite (dev) : même requête, en parcours de table.
+
+Scripts (bibliothèque) :
+- PostgreSQL : colonne générée `search_vector` (tsvector, config french,
+  pondérée code/titre > hook > solution) indexée GIN, résultats classés par
+  ts_rank ; index GIN jsonb_path_ops sur les tags (`tags @> '["x"]'`).
+- SQLite (dev) : index inversé construit en mémoire dans le process,
+  reconstruit quand la table change (nombre de lignes / dernier updated_at).
+
+Les index sont créés après `migrate` (signal post_migrate), de façon
+idempotente et uniquement sous PostgreSQL.
+"""
+
+import bisect
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.db import connections
+from django.db.models import BooleanField, Case, Count, FloatField, Max, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_TABLE = 'marketing_videoscript'
+SEARCH_CONFIG = 'french'
+
+# Colonnes plein texte des scripts et leur poids (tsvector A > B > C)
+SCRIPT_SEARCH_FIELDS = (
+    ('code', 'A'),
+    ('title', 'A'),
+    ('hook', 'B'),
+    ('solution', 'C'),
+)
+FALLBACK_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+# Tris autorisés (colonnes indexées) ; 'rank' = pertinence de la recherche
+SCRIPT_SORTS = {
+    '-created_at': ('-created_at',),
+    'created_at': ('created_at',),
+    'code': ('code',),
+    '-usage_count': ('-usage_count', '-code'),
+    'title': ('title', 'code'),
+    'rank': ('-search_rank', 'code'),
+}
+DEFAULT_SCRIPT_SORT = '-created_at'
+
+# (nom, SQL) — IF NOT EXISTS : rejouable à chaque migrate
+POSTGRES_SEARCH_INDEXES = [
+    (
+        'marketing_job_title_trgm',
+        'CREATE INDEX IF NOT EXISTS marketing_job_title_trgm '
+        'ON marketing_videoproductionjob USING gin (UPPER(title::text) gin_trgm_ops)',
+    ),
+    (
+        'marketing_job_theme_trgm',
+        'CREATE INDEX IF NOT EXISTS marketing_job_theme_trgm '
+        'ON marketing_videoproductionjob USING gin (UPPER(theme::text) gin_trgm_ops)',
+    ),
+    (
+        'marketing_script_search_vector',
+        f'ALTER TABLE {SCRIPT_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector '
+        'GENERATED ALWAYS AS (' + ' || '.join(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({field}, '')), '{weight}')"
+            for field, weight in SCRIPT_SEARCH_FIELDS
+        ) + ') STORED',
+    ),
+    (
+        'marketing_script_search_gin',
+        'CREATE INDEX IF NOT EXISTS marketing_script_search_gin '
+        f'ON {SCRIPT_TABLE} USING gin (search_vector)',
+    ),
+    (
+        'marketing_script_tags_gin',
+        'CREATE INDEX IF NOT EXISTS marketing_script_tags_gin '
+        f'ON {SCRIPT_TABLE} USING gin (tags jsonb_path_ops)',
+    ),
+]
+
+
+def ensure_search_indexes(using='default', **kwargs):
+    """Crée l'extension pg_trgm et les index de recherche (PostgreSQL uniquement)"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        trgm = True
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except Exception as e:
+            # Droits insuffisants : l'extension doit être créée par un admin
+            logger.warning(f"pg_trgm indisponible, recherche des jobs non indexée: {e}")
+            trgm = False
+
+        for name, sql in POSTGRES_SEARCH_INDEXES:
+            if name.endswith('_trgm') and not trgm:
+                continue
+            try:
+                cursor.execute(sql)
+            except Exception as e:
+                logger.warning(f"Index de recherche {name} non créé: {e}")
+
+    _pg_search_ready.pop(using, None)
+
+
+def search_jobs(queryset, term: str):
+    """Filtre les jobs dont le titre ou le thème contient `term`"""
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    return queryset.filter(Q(title__icontains=term) | Q(theme__icontains=term))
+
+
+# =============================================================================
+# SCRIPTS VIDÉO
+# =============================================================================
+
+# Alias de base → colonne search_vector présente (vérifié une fois par process)
+_pg_search_ready = {}
+
+
+def _uses_search_vector(using: str) -> bool:
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    if using not in _pg_search_ready:
+        with connection.cursor() as cursor:
+            columns = connection.introspection.get_table_description(cursor, SCRIPT_TABLE)
+        _pg_search_ready[using] = any(column.name == 'search_vector' for column in columns)
+        if not _pg_search_ready[using]:
+            logger.warning("search_vector absent : recherche des scripts via l'index en mémoire")
+    return _pg_search_ready[using]
+
+
+def tokenize(text: str, strip_accents: bool = True) -> list:
+    """Mots en minuscules, sans accents par défaut (« Problème » → « probleme »)"""
+    text = text or ''
+    if strip_accents:
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r'\w+', text.lower())
+
+
+class ScriptIndex:
+    """
+    Index inversé des scripts (fallback hors PostgreSQL).
+
+    Un mot de la requête correspond aux mots indexés qui commencent par lui
+    (recherche par préfixe, liste triée + bisect) ; tous les mots de la
+    requête doivent correspondre. Score = somme des poids des champs.
+    """
+
+    def __init__(self, rows):
+        postings = defaultdict(lambda: defaultdict(float))
+        self.tags = defaultdict(set)
+        for row in rows:
+            for field, weight in SCRIPT_SEARCH_FIELDS:
+                for token in tokenize(row[field]):
+                    postings[token][row['pk']] += FALLBACK_WEIGHTS[weight]
+            for tag in row['tags'] or []:
+                self.tags[str(tag)].add(row['pk'])
+        self.postings = {token: dict(scores) for token, scores in postings.items()}
+        self.terms = sorted(self.postings)
+
+    def _prefix_scores(self, prefix: str) -> dict:
+        scores = defaultdict(float)
+        start = bisect.bisect_left(self.terms, prefix)
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            for pk, score in self.postings[term].items():
+                scores[pk] += score
+        return scores
+
+    def search(self, term: str) -> dict:
+        """{pk: score} des scripts contenant tous les mots de `term`"""
+        results = None
+        for token in tokenize(term):
+            scores = self._prefix_scores(token)
+            if results is None:
+                results = dict(scores)
+            else:
+                results = {pk: results[pk] + score for pk, score in scores.items() if pk in results}
+            if not results:
+                return {}
+        return results or {}
+
+
+_index_lock = threading.Lock()
+_script_index = {}
+
+
+def get_script_index(queryset) -> ScriptIndex:
+    """Index en mémoire, reconstruit si la table a changé depuis sa construction"""
+    model = queryset.model
+    version = model._default_manager.using(queryset.db).aggregate(
+        count=Count('pk'), last=Max('updated_at')
+    )
+    key = (queryset.db, version['count'], version['last'])
+    with _index_lock:
+        cached = _script_index.get(queryset.db)
+        if cached is None or cached[0] != key:
+            fields = [field for field, _weight in SCRIPT_SEARCH_FIELDS]
+            rows = model._default_manager.using(queryset.db).values('pk', 'tags', *fields)
+            cached = (key, ScriptIndex(rows))
+            _script_index[queryset.db] = cached
+        return cached[1]
+
+
+def _tsquery(term: str) -> str:
+    """Requête to_tsquery : tous les mots de la recherche, chacun en préfixe"""
+    # Accents conservés : la config french racinise les mots accentués
+    return ' & '.join(f"{token}:*" for token in tokenize(term, strip_accents=False))
+
+
+def search_scripts(queryset, term: str):
+    """
+    Scripts correspondant à `term`, annotés de `search_rank` (pertinence).
+
+    Trier par pertinence : order_scripts(qs, 'rank').
+    """
+    term = (term or '').strip()
+    query = _tsquery(term)
+    if not query:
+        return queryset
+
+    if _uses_search_vector(queryset.db):
+        tsquery = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.alias(
+            search_match=RawSQL(f"{SCRIPT_TABLE}.search_vector @@ {tsquery}", [query], output_field=BooleanField()),
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(f"ts_rank({SCRIPT_TABLE}.search_vector, {tsquery})", [query], output_field=FloatField()),
+        )
+
+    scores = get_script_index(queryset).search(term)
+    return queryset.filter(pk__in=list(scores)).annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+def filter_scripts_by_tag(queryset, tag: str):
+    """Scripts portant le tag `tag` (GIN jsonb sous PostgreSQL)"""
+    tag = (tag or '').strip()
+    if not tag:
+        return queryset
+    if connections[queryset.db].vendor == 'postgresql':
+        return queryset.filter(tags__contains=[tag])
+    return queryset.filter(pk__in=list(get_script_index(queryset).tags.get(tag, ())))
+
+
+def popular_script_tags(queryset, limit: int = 10) -> list:
+    """Tags les plus fréquents"""
+    counts = Counter()
+    for tags in queryset.values_list('tags', flat=True):
+        counts.update(str(tag) for tag in tags or [])
+    return [tag for tag, _count in counts.most_common(limit)]
+
+
+def order_scripts(queryset, sort: str):
+    """
+    Tri whitelisté (colonnes indexées) ; 'rank' n'a de sens qu'après
+    search_scripts, sinon tri par défaut.
+    """
+    ranked = 'search_rank' in queryset.query.annotations
+    if sort not in SCRIPT_SORTS or (sort == 'rank' and not ranked):
+        sort = DEFAULT_SCRIPT_SORT
+    return queryset.order_by(*SCRIPT_SORTS[sort])
@@ -0,0 +1,128 @@
+"""
+Écriture groupée des segments d'un job (générations et assets).
+
+Remplace les update_or_create / create segment par segment (2 à 4 requêtes
+chacun) par un nombre constant de requêtes, quel que soit le nombre de
+segments :
+
+1. une lecture des lignes existantes du job
+2. un diff en mémoire : nouvelles lignes, lignes modifiées, lignes identiques
+3. bulk_create(update_conflicts=True) pour les nouvelles (un insert
+   concurrent sur le même (job, segment_index) devient une mise à jour)
+4. bulk_update pour les modifiées ; les identiques ne sont pas réécrites
+
+Le tout dans une seule transaction.
+
+Usage:
+    write_segments(job, generations=[
+        {'segment_index': 0, 'prompt': '...', 'duration': 3, 'status': 'pending'},
+        ...
+    ])
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List
+
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+
+from .models_extended import SegmentAsset, VideoSegmentGeneration
+
+UNIQUE_FIELDS = ['job', 'segment_index']
+
+
+@dataclass
+class WriteResult:
+    """Bilan d'une écriture groupée"""
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def __add__(self, other):
+        return WriteResult(
+            self.created + other.created,
+            self.updated + other.updated,
+            self.unchanged + other.unchanged,
+        )
+
+
+def _differs(obj, name: str, value) -> bool:
+    current = getattr(obj, name)
+    if isinstance(current, FieldFile):
+        # Nouveau fichier uploadé : toujours à écrire
+        return value is not None and not (isinstance(value, FieldFile) and value == current)
+    return current != value
+
+
+def _write(model, job, rows: Iterable[dict]) -> WriteResult:
+    """
+    Upsert des lignes de `model` d'un job, une ligne par segment_index.
+
+    Seuls les champs présents dans les dicts sont écrits ; les autres gardent
+    leur valeur (ou le défaut du modèle pour une nouvelle ligne).
+    """
+    desired = {row['segment_index']: row for row in rows}
+    if not desired:
+        return WriteResult()
+
+    fields = sorted({name for row in desired.values() for name in row} - {'segment_index'})
+    existing = {
+        obj.segment_index: obj
+        for obj in model.objects.filter(job=job, segment_index__in=list(desired))
+    }
+
+    to_create: List = []
+    to_update: List = []
+    for index, row in desired.items():
+        obj = existing.get(index)
+        if obj is None:
+            to_create.append(model(job=job, **row))
+            continue
+        changed = [name for name in fields if name in row and _differs(obj, name, row[name])]
+        for name in changed:
+            setattr(obj, name, row[name])
+        if changed:
+            to_update.append(obj)
+
+    # Champs auto_now (updated_at) rafraîchis aussi par les écritures groupées
+    auto_now = [
+        f.name for f in model._meta.concrete_fields
+        if getattr(f, 'auto_now', False) and f.name not in fields
+    ]
+
+    if to_create:
+        model.objects.bulk_create(
+            to_create,
+            update_conflicts=True,
+            unique_fields=UNIQUE_FIELDS,
+            update_fields=fields + auto_now,
+        )
+
+    if to_update:
+        concrete = {f.name: f for f in model._meta.concrete_fields}
+        for obj in to_update:
+            # pre_save : fichiers uploadés enregistrés, auto_now mis à jour
+            for name in fields + auto_now:
+                concrete[name].pre_save(obj, add=False)
+        model.objects.bulk_update(to_update, fields + auto_now)
+
+    return WriteResult(
+        created=len(to_create),
+        updated=len(to_update),
+        unchanged=len(desired) - len(to_create) - len(to_update),
+    )
+
+
+def write_segments(job, generations: Iterable[dict] = (), assets: Iterable[dict] = ()) -> WriteResult:
+    """
+    Écrit les VideoSegmentGeneration et SegmentAsset d'un job en une transaction.
+
+    Args:
+        generations: dicts de champs VideoSegmentGeneration (avec segment_index)
+        assets: dicts de champs SegmentAsset (avec segment_index)
+
+    Returns:
+        Bilan cumulé (créées, mises à jour, inchangées)
+    """
+    with transaction.atomic():
+        return _write(SegmentAsset, job, assets) + _write(VideoSegmentGeneration, job, generations)
@@ -0,0 +1,25 @@
+"""
+Signaux de l'app marketing (connectés dans MarketingConfig.ready).
+"""
+
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+from .models_extended import VideoProductionJob
+from .search import ensure_search_indexes
+from .stats import invalidate_dashboard_stats
+
+
+def connect(app_config):
+    # Stats du dashboard : recalcul à la prochaine lecture
+    post_save.connect(invalidate_dashboard_stats, sender=VideoProductionJob, dispatch_uid='marketing_stats_save')
+    post_delete.connect(invalidate_dashboard_stats, sender=VideoProductionJob, dispatch_uid='marketing_stats_delete')
+
+    # Index de recherche PostgreSQL (trigram / plein texte) après migrate
+    post_migrate.connect(ensure_search_indexes, sender=app_config, dispatch_uid='marketing_search_indexes')
+
+    # Empreintes de thème des jobs antérieurs au champ theme_hash
+    post_migrate.connect(_backfill_theme_hashes, sender=app_config, dispatch_uid='marketing_theme_hashes')
+
+
+def _backfill_theme_hashes(using='default', **kwargs):
+    VideoProductionJob.backfill_theme_hashes(using=using)
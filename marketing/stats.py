@@ -0,0 +1,53 @@
+"""
+Statistiques du dashboard de production.
+
+Un seul agrégat conditionnel (COUNT … FILTER / SUM) au lieu de quatre
+parcours de table, plus les coûts par provider lus dans les cumuls
+journaliers (CostDailyRollup), le tout mis en cache quelques secondes. Le cache est invalidé
+par signal à chaque création, suppression ou sauvegarde d'un job ; le TTL
+borne le retard pour les mises à jour en masse (QuerySet.update) qui ne
+déclenchent pas de signal.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .cost_ledger import provider_cost_totals
+from .models_extended import VideoProductionJob
+
+CACHE_KEY = 'marketing:dashboard_stats'
+
+IN_PROGRESS_STATUSES = (
+    VideoProductionJob.Status.SCRIPT_PENDING,
+    VideoProductionJob.Status.VIDEO_PENDING,
+    VideoProductionJob.Status.ASSEMBLY_PENDING,
+)
+
+
+def compute_dashboard_stats() -> dict:
+    """Stats globales en une requête"""
+    stats = VideoProductionJob.objects.aggregate(
+        total_jobs=Count('pk'),
+        completed=Count('pk', filter=Q(status=VideoProductionJob.Status.COMPLETED)),
+        in_progress=Count('pk', filter=Q(status__in=IN_PROGRESS_STATUSES)),
+        total_cost=Sum('actual_cost'),
+    )
+    stats['total_cost'] = stats['total_cost'] or 0
+    # Coûts par provider sur 30 jours (cumuls journaliers, pas le registre)
+    stats['provider_costs'] = provider_cost_totals(days=30)
+    return stats
+
+
+def get_dashboard_stats() -> dict:
+    """Stats globales, depuis le cache si possible"""
+    stats = cache.get(CACHE_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(CACHE_KEY, stats, getattr(settings, 'MARKETING_DASHBOARD_STATS_TTL', 30))
+    return stats
+
+
+def invalidate_dashboard_stats(**kwargs):
+    """Handler de signal : la prochaine lecture recalcule l'agrégat"""
+    cache.delete(CACHE_KEY)
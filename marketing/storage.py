@@ -1,29 +1,74 @@
 """
 Helper pour gérer le stockage MinIO (compatible S3)
+
+- Client boto3 unique par process (thread-safe, pool de connexions dimensionné)
+- TransferConfig réglé : multipart au-delà d'un seuil, parts en parallèle
+- Upload en streaming depuis un fichier ouvert ou un générateur de chunks
+  (jamais tout le contenu en mémoire)
+- Existence des buckets vérifiée une seule fois par process
 """
+import json
+import mimetypes
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import BinaryIO, Iterable, Optional
+
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
+from django.conf import settings
+
+MB = 1024 * 1024
+
+# Taille minimale d'une part multipart imposée par S3 (sauf la dernière)
+MIN_PART_SIZE = 5 * MB
+
+# Buckets dont l'existence a déjà été vérifiée dans ce process
+_checked_buckets = set()
+_buckets_lock = threading.Lock()
+
+
+def get_transfer_config() -> TransferConfig:
+    """TransferConfig selon les settings (seuil multipart, taille des parts, concurrence)"""
+    return TransferConfig(
+        multipart_threshold=getattr(settings, 'MARKETING_STORAGE_MULTIPART_THRESHOLD', 16 * MB),
+        multipart_chunksize=max(MIN_PART_SIZE, getattr(settings, 'MARKETING_STORAGE_MULTIPART_CHUNKSIZE', 16 * MB)),
+        max_concurrency=getattr(settings, 'MARKETING_STORAGE_MAX_CONCURRENCY', 8),
+        use_threads=True,
+    )
 
 
 class MinIOStorage:
     """Client MinIO pour upload/download de fichiers"""
     
-    def __init__(self):
+    def __init__(self, transfer_config: TransferConfig = None):
         """Initialise le client S3 compatible MinIO"""
         self.endpoint = os.getenv('MINIO_ENDPOINT', 'http://minio:9000')
         self.access_key = os.getenv('MINIO_ROOT_USER', 'minioadmin')
         self.secret_key = os.getenv('MINIO_ROOT_PASSWORD', 'minioadmin123')
         self.bucket_videos = os.getenv('MINIO_BUCKET_VIDEOS', 'marketing-videos')
         
-        # Client boto3 configuré pour MinIO
+        # Endpoint vu par le navigateur (URLs présignées), si différent du réseau interne
+        self.public_endpoint = os.getenv('MINIO_PUBLIC_ENDPOINT', self.endpoint)
+        self._presign_client = None
+        
+        self.transfer_config = transfer_config or get_transfer_config()
+        
+        # Client boto3 configuré pour MinIO (un client est thread-safe :
+        # le pool doit couvrir les parts envoyées en parallèle)
         self.client = boto3.client(
             's3',
             endpoint_url=self.endpoint,
             aws_access_key_id=self.access_key,
             aws_secret_access_key=self.secret_key,
-            config=Config(signature_version='s3v4'),
+            config=Config(
+                signature_version='s3v4',
+                max_pool_connections=max(10, self.transfer_config.max_concurrency * 2),
+                retries={'max_attempts': 5, 'mode': 'standard'},
+            ),
             region_name='us-east-1'  # MinIO ignore la région, mais boto3 la requiert
         )
         
@@ -31,10 +76,18 @@ class MinIOStorage:
         self._ensure_bucket_exists(self.bucket_videos)
     
     def _ensure_bucket_exists(self, bucket_name: str):
-        """Crée le bucket s'il n'existe pas"""
-        try:
-            self.client.head_bucket(Bucket=bucket_name)
-        except ClientError:
+        """Crée le bucket s'il n'existe pas (une seule vérification par process)"""
+        with _buckets_lock:
+            if bucket_name in _checked_buckets:
+                return
+            
+            try:
+                self.client.head_bucket(Bucket=bucket_name)
+                _checked_buckets.add(bucket_name)
+                return
+            except ClientError:
+                pass
+            
             # Bucket n'existe pas, le créer
             try:
                 self.client.create_bucket(Bucket=bucket_name)
@@ -52,23 +105,35 @@ class MinIOStorage:
                         }
                     ]
                 }
-                import json
                 self.client.put_bucket_policy(
                     Bucket=bucket_name,
                     Policy=json.dumps(bucket_policy)
                 )
                 print(f"✅ Bucket policy appliquée : {bucket_name} (public read)")
+                _checked_buckets.add(bucket_name)
             except Exception as e:
                 print(f"⚠️ Impossible de créer le bucket {bucket_name}: {e}")
     
-    def upload_file(self, file_path: str, object_name: str = None, bucket: str = None) -> str:
+    def _bucket(self, bucket: Optional[str]) -> str:
+        if bucket is None:
+            return self.bucket_videos
+        self._ensure_bucket_exists(bucket)
+        return bucket
+    
+    @staticmethod
+    def _extra_args(object_name: str, content_type: str = None) -> dict:
+        content_type = content_type or mimetypes.guess_type(object_name)[0]
+        return {'ContentType': content_type} if content_type else {}
+    
+    def upload_file(self, file_path: str, object_name: str = None, bucket: str = None, content_type: str = None) -> str:
         """
-        Upload un fichier vers MinIO
+        Upload un fichier vers MinIO (multipart parallèle au-delà du seuil)
         
         Args:
             file_path: Chemin local du fichier
             object_name: Nom de l'objet dans MinIO (optionnel, utilise le nom du fichier)
             bucket: Nom du bucket (optionnel, utilise bucket_videos par défaut)
+            content_type: Type MIME (optionnel, déduit de l'extension)
         
         Returns:
             URL publique du fichier
@@ -76,11 +141,16 @@ class MinIOStorage:
         if object_name is None:
             object_name = os.path.basename(file_path)
         
-        if bucket is None:
-            bucket = self.bucket_videos
+        bucket = self._bucket(bucket)
         
         try:
-            self.client.upload_file(file_path, bucket, object_name)
+            self.client.upload_file(
+                file_path,
+                bucket,
+                object_name,
+                ExtraArgs=self._extra_args(object_name, content_type),
+                Config=self.transfer_config,
+            )
             url = f"{self.endpoint}/{bucket}/{object_name}"
             print(f"✅ Fichier uploadé : {url}")
             return url
@@ -88,35 +158,167 @@ class MinIOStorage:
             print(f"❌ Erreur upload : {e}")
             raise
     
-    def upload_bytes(self, data: bytes, object_name: str, content_type: str = None, bucket: str = None) -> str:
+    def upload_fileobj(self, fileobj: BinaryIO, object_name: str, content_type: str = None, bucket: str = None) -> str:
         """
-        Upload des bytes vers MinIO
+        Upload en streaming depuis un fichier ouvert (lu par parts, jamais en entier)
         
         Args:
-            data: Données binaires
+            fileobj: Objet fichier binaire (open(..., 'rb'), UploadedFile, ...)
             object_name: Nom de l'objet dans MinIO
-            content_type: Type MIME (ex: 'video/mp4', 'image/png')
+            content_type: Type MIME (optionnel, déduit de l'extension)
             bucket: Nom du bucket (optionnel)
         
         Returns:
             URL publique du fichier
         """
-        if bucket is None:
-            bucket = self.bucket_videos
-        
-        extra_args = {}
-        if content_type:
-            extra_args['ContentType'] = content_type
+        bucket = self._bucket(bucket)
         
         try:
-            from io import BytesIO
             self.client.upload_fileobj(
-                BytesIO(data),
+                fileobj,
                 bucket,
                 object_name,
-                ExtraArgs=extra_args
+                ExtraArgs=self._extra_args(object_name, content_type),
+                Config=self.transfer_config,
+            )
+            url = f"{self.endpoint}/{bucket}/{object_name}"
+            print(f"✅ Flux uploadé : {url}")
+            return url
+        except Exception as e:
+            print(f"❌ Erreur upload flux : {e}")
+            raise
+    
+    def upload_stream(
+        self,
+        chunks: Iterable[bytes],
+        object_name: str,
+        content_type: str = None,
+        bucket: str = None,
+    ) -> str:
+        """
+        Upload depuis un générateur de chunks (taille totale inconnue).
+        
+        Les chunks sont regroupés en parts de multipart_chunksize, envoyées
+        en parallèle (au plus max_concurrency parts en mémoire). Un contenu
+        plus petit qu'une part est envoyé en un seul PUT.
+        
+        Args:
+            chunks: Itérable de bytes (ex: response.iter_content())
+            object_name: Nom de l'objet dans MinIO
+            content_type: Type MIME (optionnel, déduit de l'extension)
+            bucket: Nom du bucket (optionnel)
+        
+        Returns:
+            URL publique du fichier
+        """
+        bucket = self._bucket(bucket)
+        extra_args = self._extra_args(object_name, content_type)
+        part_size = self.transfer_config.multipart_chunksize
+        max_pending = max(1, self.transfer_config.max_concurrency)
+        
+        buffer = bytearray()
+        iterator = iter(chunks)
+        
+        # Première part : si le flux tient dedans, un simple PUT suffit
+        for chunk in iterator:
+            buffer.extend(chunk)
+            if len(buffer) >= part_size:
+                break
+        else:
+            try:
+                self.client.put_object(Bucket=bucket, Key=object_name, Body=bytes(buffer), **extra_args)
+                url = f"{self.endpoint}/{bucket}/{object_name}"
+                print(f"✅ Flux uploadé : {url}")
+                return url
+            except Exception as e:
+                print(f"❌ Erreur upload flux : {e}")
+                raise
+        
+        upload_id = self.client.create_multipart_upload(
+            Bucket=bucket, Key=object_name, **extra_args
+        )['UploadId']
+        
+        def send(part_number, data):
+            response = self.client.upload_part(
+                Bucket=bucket, Key=object_name, UploadId=upload_id,
+                PartNumber=part_number, Body=data,
+            )
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        
+        parts = []
+        pending = []
+        part_number = 0
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_pending) as pool:
+                def flush(data):
+                    nonlocal part_number
+                    part_number += 1
+                    pending.append(pool.submit(send, part_number, data))
+                    # Borne la mémoire : on attend la plus ancienne part
+                    if len(pending) >= max_pending:
+                        parts.append(pending.pop(0).result())
+                
+                for chunk in iterator:
+                    buffer.extend(chunk)
+                    while len(buffer) >= part_size:
+                        flush(bytes(buffer[:part_size]))
+                        del buffer[:part_size]
+                
+                # Reste du premier bloc ou dernière part (peut être < 5 MB)
+                while len(buffer) >= part_size:
+                    flush(bytes(buffer[:part_size]))
+                    del buffer[:part_size]
+                if buffer:
+                    flush(bytes(buffer))
+                    buffer = bytearray()
+                
+                parts.extend(future.result() for future in pending)
+            
+            self.client.complete_multipart_upload(
+                Bucket=bucket, Key=object_name, UploadId=upload_id,
+                MultipartUpload={'Parts': sorted(parts, key=lambda p: p['PartNumber'])},
             )
             url = f"{self.endpoint}/{bucket}/{object_name}"
+            print(f"✅ Flux uploadé ({part_number} parts) : {url}")
+            return url
+        except Exception as e:
+            try:
+                self.client.abort_multipart_upload(Bucket=bucket, Key=object_name, UploadId=upload_id)
+            except Exception:
+                pass
+            print(f"❌ Erreur upload flux : {e}")
+            raise
+    
+    def upload_bytes(self, data: bytes, object_name: str, content_type: str = None, bucket: str = None) -> str:
+        """
+        Upload des bytes vers MinIO
+        
+        Args:
+            data: Données binaires
+            object_name: Nom de l'objet dans MinIO
+            content_type: Type MIME (ex: 'video/mp4', 'image/png')
+            bucket: Nom du bucket (optionnel)
+        
+        Returns:
+            URL publique du fichier
+        """
+        bucket = self._bucket(bucket)
+        extra_args = self._extra_args(object_name, content_type)
+        
+        try:
+            if len(data) < self.transfer_config.multipart_threshold:
+                # Petit contenu : un seul PUT, sans copie ni pool de threads
+                self.client.put_object(Bucket=bucket, Key=object_name, Body=data, **extra_args)
+            else:
+                self.client.upload_fileobj(
+                    BytesIO(data),
+                    bucket,
+                    object_name,
+                    ExtraArgs=extra_args,
+                    Config=self.transfer_config,
+                )
+            url = f"{self.endpoint}/{bucket}/{object_name}"
             print(f"✅ Bytes uploadés : {url}")
             return url
         except Exception as e:
@@ -125,7 +327,7 @@ class MinIOStorage:
     
     def download_file(self, object_name: str, file_path: str, bucket: str = None):
         """
-        Télécharge un fichier depuis MinIO
+        Télécharge un fichier depuis MinIO (ranges parallèles au-delà du seuil)
         
         Args:
             object_name: Nom de l'objet dans MinIO
@@ -136,12 +338,102 @@ class MinIOStorage:
             bucket = self.bucket_videos
         
         try:
-            self.client.download_file(bucket, object_name, file_path)
+            self.client.download_file(bucket, object_name, file_path, Config=self.transfer_config)
             print(f"✅ Fichier téléchargé : {file_path}")
         except Exception as e:
             print(f"❌ Erreur download : {e}")
             raise
     
+    # ------------------------------------------------------------------
+    # Upload multipart direct (navigateur → bucket, URLs présignées)
+    # ------------------------------------------------------------------
+    
+    @property
+    def presign_client(self):
+        """Client signant pour l'endpoint public (la signature inclut l'hôte)"""
+        if self.public_endpoint == self.endpoint:
+            return self.client
+        if self._presign_client is None:
+            self._presign_client = boto3.client(
+                's3',
+                endpoint_url=self.public_endpoint,
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+                config=Config(signature_version='s3v4'),
+                region_name='us-east-1'
+            )
+        return self._presign_client
+    
+    def create_multipart_upload(self, object_name: str, content_type: str = None, bucket: str = None) -> str:
+        """
+        Démarre un upload multipart
+        
+        Returns:
+            UploadId S3
+        """
+        bucket = self._bucket(bucket)
+        response = self.client.create_multipart_upload(
+            Bucket=bucket, Key=object_name, **self._extra_args(object_name, content_type)
+        )
+        return response['UploadId']
+    
+    def presign_upload_parts(
+        self,
+        object_name: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expires_in: int = 3600,
+        bucket: str = None,
+    ) -> dict:
+        """
+        URLs présignées PUT pour des parts d'un upload multipart
+        
+        Returns:
+            Dict {numéro de part: URL}
+        """
+        if bucket is None:
+            bucket = self.bucket_videos
+        
+        return {
+            number: self.presign_client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': bucket,
+                    'Key': object_name,
+                    'UploadId': upload_id,
+                    'PartNumber': number,
+                },
+                ExpiresIn=expires_in,
+            )
+            for number in part_numbers
+        }
+    
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: list, bucket: str = None) -> int:
+        """
+        Finalise un upload multipart
+        
+        Args:
+            parts: [{'PartNumber': 1, 'ETag': '"..."'}, ...]
+        
+        Returns:
+            Taille de l'objet final (octets)
+        """
+        if bucket is None:
+            bucket = self.bucket_videos
+        
+        self.client.complete_multipart_upload(
+            Bucket=bucket, Key=object_name, UploadId=upload_id,
+            MultipartUpload={'Parts': sorted(parts, key=lambda p: p['PartNumber'])},
+        )
+        return self.client.head_object(Bucket=bucket, Key=object_name)['ContentLength']
+    
+    def abort_multipart_upload(self, object_name: str, upload_id: str, bucket: str = None):
+        """Abandonne un upload multipart (libère les parts déjà envoyées)"""
+        if bucket is None:
+            bucket = self.bucket_videos
+        
+        self.client.abort_multipart_upload(Bucket=bucket, Key=object_name, UploadId=upload_id)
+    
     def delete_file(self, object_name: str, bucket: str = None):
         """
         Supprime un fichier de MinIO
@@ -200,14 +492,17 @@ class MinIOStorage:
         return f"{self.endpoint}/{bucket}/{object_name}"
 
 
-# Instance globale (singleton)
+# Instance globale (singleton, partagée par tous les threads)
 _storage = None
+_storage_lock = threading.Lock()
 
 def get_storage() -> MinIOStorage:
     """Retourne l'instance globale de MinIOStorage"""
     global _storage
     if _storage is None:
-        _storage = MinIOStorage()
+        with _storage_lock:
+            if _storage is None:
+                _storage = MinIOStorage()
     return _storage
 
 
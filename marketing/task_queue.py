@@ -0,0 +1,291 @@
+"""
+File de tâches persistée en base (PostgreSQL), sans broker.
+
+- Réservation concurrente : SELECT … FOR UPDATE SKIP LOCKED
+- Priorités (priority DESC, puis run_at)
+- Retries avec backoff exponentiel + jitter
+- Timeout de visibilité : une tâche dont le worker a disparu redevient
+  disponible à l'expiration de son verrou (prolongé tant qu'elle tourne)
+
+Usage:
+    from marketing.task_queue import enqueue
+    enqueue('generation.start', {'job_id': job.pk}, priority=10)
+
+Les tâches sont déclarées dans marketing/tasks.py et consommées par
+`python manage.py run_workers`.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger('marketing.tasks')
+
+
+class PermanentTaskError(Exception):
+    """Erreur non récupérable : la tâche échoue sans retry"""
+    pass
+
+
+# Registre des tâches : nom -> {'func', 'max_attempts', 'priority'}
+_registry: Dict[str, dict] = {}
+
+
+def task(name: str, max_attempts: int = 5, priority: int = 0):
+    """
+    Décorateur d'enregistrement d'une tâche.
+
+    Usage:
+        @task('hybrid.assemble', max_attempts=3)
+        def assemble(job_id):
+            ...
+    """
+    def decorator(func: Callable):
+        _registry[name] = {
+            'func': func,
+            'max_attempts': max_attempts,
+            'priority': priority,
+        }
+        return func
+    return decorator
+
+
+def get_task(name: str) -> Optional[dict]:
+    return _registry.get(name)
+
+
+# Tâche en cours d'exécution dans ce thread (voir current_task)
+_current = threading.local()
+
+
+def current_task():
+    """
+    BackgroundTask en cours d'exécution dans ce thread, ou None (appel direct).
+
+    Permet à une tâche de savoir si l'essai courant est le dernier
+    (attempts >= max_attempts) pour finaliser l'état de ses objets.
+    """
+    return getattr(_current, 'task', None)
+
+
+def enqueue(
+    name: str,
+    payload: dict = None,
+    priority: int = None,
+    delay: int = 0,
+    unique_key: str = '',
+    max_attempts: int = None,
+):
+    """
+    Ajoute une tâche à la file.
+
+    Args:
+        name: Nom de la tâche (voir marketing/tasks.py)
+        payload: Arguments nommés (JSON)
+        priority: Plus haut = traité en premier
+        delay: Délai avant exécution (secondes)
+        unique_key: Si une tâche active a déjà cette clé, elle est réutilisée
+        max_attempts: Tentatives max (défaut: celui de la tâche)
+
+    Returns:
+        BackgroundTask
+
+    Raises:
+        ValueError: tâche non déclarée
+    """
+    from .models_extended import BackgroundTask
+
+    spec = _registry.get(name)
+    if spec is None:
+        raise ValueError(f"Tâche inconnue: {name}")
+
+    if unique_key:
+        existing = BackgroundTask.objects.filter(
+            unique_key=unique_key,
+            status__in=[BackgroundTask.Status.QUEUED, BackgroundTask.Status.RUNNING],
+        ).first()
+        if existing:
+            return existing
+
+    return BackgroundTask.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority if priority is not None else spec.get('priority', 0),
+        max_attempts=max_attempts or spec.get('max_attempts', 5),
+        run_at=timezone.now() + timedelta(seconds=delay),
+        unique_key=unique_key,
+    )
+
+
+def backoff_delay(attempts: int) -> float:
+    """Délai avant le prochain essai : base * 2^(n-1), plafonné, avec jitter"""
+    base = getattr(settings, 'MARKETING_TASK_BACKOFF_BASE', 30)
+    cap = getattr(settings, 'MARKETING_TASK_BACKOFF_MAX', 3600)
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class Worker:
+    """
+    Consomme la file de tâches.
+
+    Plusieurs workers (threads ou process, sur plusieurs machines) peuvent
+    tourner en parallèle : SKIP LOCKED garantit qu'une tâche n'est
+    réservée que par un seul d'entre eux.
+    """
+
+    def __init__(self, worker_id: str = None, visibility_timeout: int = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.visibility_timeout = visibility_timeout or getattr(
+            settings, 'MARKETING_TASK_VISIBILITY_TIMEOUT', 900
+        )
+
+    def claim(self, batch: int = 1) -> List:
+        """
+        Réserve jusqu'à `batch` tâches disponibles : en file et échues,
+        ou 'running' dont le verrou a expiré (worker disparu) et qui ont
+        encore des essais. Une tâche qui tue son worker (OOM, crash FFmpeg,
+        SIGKILL) passe en échec à l'épuisement de ses essais au lieu d'être
+        relancée indéfiniment.
+        """
+        from .models_extended import BackgroundTask
+
+        now = timezone.now()
+        abandoned = BackgroundTask.objects.filter(
+            status=BackgroundTask.Status.RUNNING,
+            locked_until__lt=now,
+            attempts__gte=F('max_attempts'),
+        ).update(
+            status=BackgroundTask.Status.FAILED,
+            last_error="Worker disparu pendant le dernier essai",
+            locked_until=None,
+            finished_at=now,
+            updated_at=now,
+        )
+        if abandoned:
+            logger.error(f"[{self.worker_id}] ❌ {abandoned} tâche(s) abandonnée(s) : worker disparu au dernier essai")
+
+        available = (
+            Q(status=BackgroundTask.Status.QUEUED, run_at__lte=now)
+            | Q(status=BackgroundTask.Status.RUNNING, locked_until__lt=now, attempts__lt=F('max_attempts'))
+        )
+
+        with transaction.atomic():
+            candidates = list(
+                BackgroundTask.objects
+                .select_for_update(skip_locked=True)
+                .filter(available)
+                .order_by('-priority', 'run_at')[:batch]
+            )
+
+            claimed = []
+            for candidate in candidates:
+                # UPDATE conditionnel : protège aussi les bases sans SKIP LOCKED (SQLite)
+                updated = BackgroundTask.objects.filter(pk=candidate.pk).filter(available).update(
+                    status=BackgroundTask.Status.RUNNING,
+                    attempts=F('attempts') + 1,
+                    locked_by=self.worker_id,
+                    locked_until=now + timedelta(seconds=self.visibility_timeout),
+                    updated_at=now,
+                )
+                if updated:
+                    candidate.refresh_from_db()
+                    claimed.append(candidate)
+
+        return claimed
+
+    def run_once(self) -> bool:
+        """Réserve et exécute une tâche. Retourne False si la file est vide."""
+        tasks = self.claim(batch=1)
+        if not tasks:
+            return False
+        self.execute(tasks[0])
+        return True
+
+    def execute(self, bg_task):
+        """Exécute une tâche réservée et enregistre son issue"""
+        from .models_extended import BackgroundTask
+
+        spec = _registry.get(bg_task.name)
+        if spec is None:
+            self._finish(bg_task, BackgroundTask.Status.FAILED, f"Tâche inconnue: {bg_task.name}")
+            return
+
+        heartbeat = self._start_heartbeat(bg_task)
+        _current.task = bg_task
+        try:
+            logger.info(f"[{self.worker_id}] ▶️ {bg_task} (essai {bg_task.attempts}/{bg_task.max_attempts})")
+            spec['func'](**bg_task.payload)
+
+        except PermanentTaskError as e:
+            logger.error(f"[{self.worker_id}] ❌ {bg_task}: {e}")
+            self._finish(bg_task, BackgroundTask.Status.FAILED, str(e))
+
+        except Exception as e:
+            error = f"{e}\n{traceback.format_exc()}"
+            if bg_task.attempts >= bg_task.max_attempts:
+                logger.error(f"[{self.worker_id}] ❌ {bg_task}: abandon après {bg_task.attempts} essais: {e}")
+                self._finish(bg_task, BackgroundTask.Status.FAILED, error)
+            else:
+                delay = backoff_delay(bg_task.attempts)
+                logger.warning(f"[{self.worker_id}] 🔁 {bg_task}: {e} — retry dans {delay:.0f}s")
+                BackgroundTask.objects.filter(pk=bg_task.pk, locked_by=self.worker_id).update(
+                    status=BackgroundTask.Status.QUEUED,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                    locked_until=None,
+                    locked_by='',
+                    last_error=error,
+                    updated_at=timezone.now(),
+                )
+
+        else:
+            logger.info(f"[{self.worker_id}] ✅ {bg_task}")
+            self._finish(bg_task, BackgroundTask.Status.SUCCEEDED)
+
+        finally:
+            _current.task = None
+            heartbeat.set()
+
+    def _finish(self, bg_task, status, error: str = ''):
+        from .models_extended import BackgroundTask
+
+        BackgroundTask.objects.filter(pk=bg_task.pk, locked_by=self.worker_id).update(
+            status=status,
+            last_error=error,
+            locked_until=None,
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+
+    def _start_heartbeat(self, bg_task) -> threading.Event:
+        """Prolonge le verrou tant que la tâche tourne (tâches longues)"""
+        from .models_extended import BackgroundTask
+
+        stop = threading.Event()
+        interval = max(1, self.visibility_timeout / 3)
+
+        def beat():
+            try:
+                while not stop.wait(interval):
+                    BackgroundTask.objects.filter(
+                        pk=bg_task.pk,
+                        locked_by=self.worker_id,
+                        status=BackgroundTask.Status.RUNNING,
+                    ).update(
+                        locked_until=timezone.now() + timedelta(seconds=self.visibility_timeout)
+                    )
+            finally:
+                connection.close()
+
+        threading.Thread(target=beat, daemon=True).start()
+        return stop
@@ -0,0 +1,108 @@
+"""
+Tâches de fond du pipeline vidéo (exécutées par `run_workers`).
+
+Les views ne font plus que mettre ces tâches en file via `enqueue`.
+"""
+
+from django.utils import timezone
+
+from .models_extended import VideoProductionJob, VideoSegmentGeneration
+from .task_queue import PermanentTaskError, current_task, task
+
+
+@task('generation.start', max_attempts=3, priority=10)
+def start_generation(job_id):
+    """Lance la génération de tous les segments en attente d'un job"""
+    from .ai.generation_orchestrator import GenerationOrchestrator
+
+    job = VideoProductionJob.objects.get(pk=job_id)
+
+    try:
+        orchestrator = GenerationOrchestrator(job)
+        orchestrator.start_generation()
+    except ValueError as e:
+        # Config invalide (provider, clé API, pas de segments) : inutile de réessayer
+        job.status = VideoProductionJob.Status.FAILED
+        job.error_log = str(e)
+        job.save(update_fields=['status', 'error_log', 'updated_at'])
+        raise PermanentTaskError(str(e))
+
+    if not job.started_at:
+        job.started_at = timezone.now()
+        job.save(update_fields=['started_at', 'updated_at'])
+
+
+@task('generation.retry_segment', max_attempts=3, priority=20)
+def retry_segment(generation_id):
+    """Relance la génération d'un segment"""
+    from .ai.generation_orchestrator import GenerationOrchestrator
+
+    segment = VideoSegmentGeneration.objects.select_related('job').get(pk=generation_id)
+
+    try:
+        orchestrator = GenerationOrchestrator(segment.job)
+    except ValueError as e:
+        raise PermanentTaskError(str(e))
+
+    orchestrator._generate_segment(segment)
+
+    job = segment.job
+    if job.status != VideoProductionJob.Status.VIDEO_PENDING:
+        job.status = VideoProductionJob.Status.VIDEO_PENDING
+        job.save(update_fields=['status', 'updated_at'])
+
+
+@task('hybrid.assemble', max_attempts=2, priority=5)
+def assemble_job(job_id, add_subtitles=True):
+    """Assemble tous les segments en vidéo finale"""
+    from .ai.video_assembler import VideoAssembler
+
+    job = VideoProductionJob.objects.get(pk=job_id)
+
+    incomplete = job.generations.exclude(status=VideoSegmentGeneration.Status.COMPLETED).count()
+    if incomplete:
+        raise PermanentTaskError(f"{incomplete} segment(s) non terminé(s)")
+
+    job.status = VideoProductionJob.Status.ASSEMBLY_PENDING
+    job.save(update_fields=['status', 'updated_at'])
+
+    try:
+        assembler = VideoAssembler(job)
+        assembler.assemble(add_subtitles=add_subtitles)
+    except ValueError as e:
+        job.status = VideoProductionJob.Status.FAILED
+        job.error_log = str(e)
+        job.save(update_fields=['status', 'error_log', 'updated_at'])
+        raise PermanentTaskError(str(e))
+    except Exception as e:
+        # Normalisation / concat FFmpeg : retry, mais le dernier essai ne doit
+        # pas laisser le job bloqué en ASSEMBLY_PENDING
+        bg_task = current_task()
+        if bg_task is None or bg_task.attempts >= bg_task.max_attempts:
+            job.status = VideoProductionJob.Status.FAILED
+            job.error_log = f"Erreur assemblage: {e}"
+            job.save(update_fields=['status', 'error_log', 'updated_at'])
+        raise
+
+
+@task('heygen.poll', max_attempts=3, priority=15)
+def poll_heygen(job_id):
+    """Vérifie une vidéo avatar HeyGen ; replanifie le poll suivant si besoin"""
+    from .ai.heygen_tracker import HeyGenTracker
+
+    job = VideoProductionJob.objects.get(pk=job_id)
+    if job.status != VideoProductionJob.Status.VIDEO_PENDING:
+        return
+
+    # Sans force : si un autre poller (cron, webhook) est passé entre-temps,
+    # c'est lui qui a planifié la suite
+    HeyGenTracker(job).poll()
+
+
+@task('heygen.complete', max_attempts=3, priority=15)
+def complete_heygen(job_id, video_url, duration=None):
+    """Télécharge une vidéo avatar signalée terminée par le webhook HeyGen"""
+    from .ai.heygen_tracker import HeyGenTracker
+
+    job = VideoProductionJob.objects.get(pk=job_id)
+    HeyGenTracker(job).complete(video_url, metadata={'data': {'duration': duration}})
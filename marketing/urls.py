@@ -6,6 +6,7 @@ from django.urls import path
 from . import views
 from . import views_scripts
 from . import views_hybrid
+from . import views_uploads, views_webhooks
 
 app_name = 'marketing'
 
@@ -42,6 +43,15 @@ urlpatterns = [
     path('assets/upload/', views.assets_upload_view, name='assets_upload'),
     path('assets/<int:pk>/delete/', views.asset_delete_view, name='asset_delete'),
     
+    # Upload direct vers le bucket (multipart présigné)
+    path('api/uploads/', views_uploads.api_upload_create, name='api_upload_create'),
+    path('api/uploads/<int:pk>/parts/', views_uploads.api_upload_parts, name='api_upload_parts'),
+    path('api/uploads/<int:pk>/complete/', views_uploads.api_upload_complete, name='api_upload_complete'),
+    path('api/uploads/<int:pk>/abort/', views_uploads.api_upload_abort, name='api_upload_abort'),
+    
+    # Webhooks providers
+    path('webhooks/heygen/', views_webhooks.heygen_webhook, name='heygen_webhook'),
+    
     # AI Assistant
     path('assistant/', views.ai_assistant_view, name='ai_assistant'),
     path('api/ai/chat/', views.ai_chat_view, name='ai_chat'),
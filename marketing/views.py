@@ -3,14 +3,20 @@ Views pour l'interface web de production vidéo.
 Dashboard, wizards, monitoring temps réel.
 """
 
+import hashlib
+import json
+import time
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
-from django.http import JsonResponse
-from django.db.models import Q, Count, Sum
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.db.models import Q, Count, Max, Sum
 from django.utils import timezone
 
 from .models_extended import (
@@ -19,6 +25,10 @@ from .models_extended import (
     SegmentAsset,
     VideoSegmentGeneration
 )
+from .segment_writer import write_segments
+from .search import search_jobs
+from .stats import get_dashboard_stats
+from .task_queue import enqueue
 from .forms import (
     VideoProductionJobForm,
     QuickVideoForm,
@@ -41,19 +51,19 @@ class VideoProductionDashboardView(LoginRequiredMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        qs = VideoProductionJob.objects.select_related('template', 'created_by')
+        # Colonnes affichées seulement : config et logs (JSON, texte) restent en base
+        qs = VideoProductionJob.objects.select_related('template').only(
+            'pk', 'title', 'theme', 'status', 'progress_percent',
+            'estimated_cost', 'created_at', 'template__name',
+        )
         
         # Filtres
         status_filter = self.request.GET.get('status')
         if status_filter:
             qs = qs.filter(status=status_filter)
         
-        search = self.request.GET.get('q')
-        if search:
-            qs = qs.filter(
-                Q(title__icontains=search) |
-                Q(theme__icontains=search)
-            )
+        # Recherche indexée (trigram) sous PostgreSQL
+        qs = search_jobs(qs, self.request.GET.get('q'))
         
         # Ordre
         return qs.order_by('-created_at')
@@ -61,23 +71,8 @@ class VideoProductionDashboardView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Stats globales
-        context['stats'] = {
-            'total_jobs': VideoProductionJob.objects.count(),
-            'completed': VideoProductionJob.objects.filter(
-                status=VideoProductionJob.Status.COMPLETED
-            ).count(),
-            'in_progress': VideoProductionJob.objects.filter(
-                status__in=[
-                    VideoProductionJob.Status.SCRIPT_PENDING,
-                    VideoProductionJob.Status.VIDEO_PENDING,
-                    VideoProductionJob.Status.ASSEMBLY_PENDING,
-                ]
-            ).count(),
-            'total_cost': VideoProductionJob.objects.aggregate(
-                total=Sum('actual_cost')
-            )['total'] or 0,
-        }
+        # Stats globales (agrégat unique, en cache)
+        context['stats'] = get_dashboard_stats()
         
         # Templates disponibles
         context['templates'] = VideoProjectTemplate.objects.filter(
@@ -211,41 +206,42 @@ class VideoJobConfigureSegmentsView(LoginRequiredMixin, DetailView):
         form = context['segments_form']
         
         if form.is_valid():
-            # Créer/update assets pour chaque segment
+            # Assets + générations : diff puis écriture groupée (requêtes constantes)
             segments_data = form.get_segments_data()
+            provider = self.object.get_config('provider', 'luma')
+            duration = self.object.get_config('segment_duration', 5)
+            aspect_ratio = self.object.get_config('aspect_ratio', '9:16')
             
-            for seg_data in segments_data:
-                # Si asset fourni, créer SegmentAsset
-                if seg_data['asset']:
-                    asset, created = SegmentAsset.objects.update_or_create(
-                        job=self.object,
-                        segment_index=seg_data['index'],
-                        defaults={
+            with transaction.atomic():
+                write_segments(
+                    self.object,
+                    assets=[
+                        {
+                            'segment_index': seg_data['index'],
                             'asset_type': 'image',
                             'file': seg_data['asset'],
                             'animation_prompt': seg_data['animation_prompt'],
                         }
-                    )
-                
-                # Créer VideoSegmentGeneration
-                generation_mode = 'image_to_video' if seg_data['asset'] else 'text_to_video'
-                
-                VideoSegmentGeneration.objects.update_or_create(
-                    job=self.object,
-                    segment_index=seg_data['index'],
-                    defaults={
-                        'prompt': seg_data['prompt'],
-                        'generation_mode': generation_mode,
-                        'provider': self.object.get_config('provider', 'luma'),
-                        'duration': self.object.get_config('segment_duration', 5),
-                        'aspect_ratio': self.object.get_config('aspect_ratio', '9:16'),
-                        'status': 'pending',
-                    }
+                        for seg_data in segments_data
+                        if seg_data['asset']
+                    ],
+                    generations=[
+                        {
+                            'segment_index': seg_data['index'],
+                            'prompt': seg_data['prompt'],
+                            'generation_mode': 'image_to_video' if seg_data['asset'] else 'text_to_video',
+                            'provider': provider,
+                            'duration': duration,
+                            'aspect_ratio': aspect_ratio,
+                            'status': 'pending',
+                        }
+                        for seg_data in segments_data
+                    ],
                 )
-            
-            # Update job status
-            self.object.status = VideoProductionJob.Status.ASSETS_READY
-            self.object.save()
+                
+                # Update job status
+                self.object.status = VideoProductionJob.Status.ASSETS_READY
+                self.object.save()
             
             messages.success(
                 request,
@@ -309,22 +305,27 @@ class VideoJobConfigureSegmentsView(LoginRequiredMixin, DetailView):
             },
         ]
         
-        # Créer VideoSegmentGeneration pour chaque segment
-        for seg in segments_config:
-            VideoSegmentGeneration.objects.create(
-                job=job,
-                segment_index=seg['index'],
-                prompt=seg['prompt'],
-                generation_mode='text_to_video',
-                provider=job.get_config('provider', 'luma'),
-                duration=seg['duration'],
-                aspect_ratio=job.get_config('aspect_ratio', '9:16'),
-                status='pending',
-            )
-        
-        # Update job status
-        job.status = VideoProductionJob.Status.ASSETS_READY
-        job.save()
+        # Créer (ou mettre à jour) les 6 VideoSegmentGeneration en une écriture groupée
+        provider = job.get_config('provider', 'luma')
+        aspect_ratio = job.get_config('aspect_ratio', '9:16')
+        with transaction.atomic():
+            write_segments(job, generations=[
+                {
+                    'segment_index': seg['index'],
+                    'segment_name': seg['name'],
+                    'prompt': seg['prompt'],
+                    'generation_mode': 'text_to_video',
+                    'provider': provider,
+                    'duration': seg['duration'],
+                    'aspect_ratio': aspect_ratio,
+                    'status': 'pending',
+                }
+                for seg in segments_config
+            ])
+            
+            # Update job status
+            job.status = VideoProductionJob.Status.ASSETS_READY
+            job.save()
         
         # Flag pour éviter double génération
         job._segments_generated = True
@@ -351,7 +352,9 @@ class VideoJobDetailView(LoginRequiredMixin, DetailView):
         job = self.object
         
         # Segments et générations
-        context['generations'] = job.generations.all().order_by('segment_index')
+        context['generations'] = (
+            job.generations.defer('provider_metadata', 'provider_config').order_by('segment_index')
+        )
         context['assets'] = job.assets.all().order_by('segment_index')
         
         # Progression
@@ -365,10 +368,8 @@ class VideoJobDetailView(LoginRequiredMixin, DetailView):
         else:
             context['progress'] = 0
         
-        # Coûts
-        context['segments_cost'] = job.generations.aggregate(
-            total=Sum('cost')
-        )['total'] or 0
+        # Coûts (cumul du registre, dénormalisé sur le job)
+        context['job_cost'] = job.actual_cost
         
         return context
 
@@ -436,8 +437,8 @@ def job_start_generation(request, pk):
         )
         return redirect('marketing:job_configure_segments', pk=job.pk)
     
-    # TODO: Déclencher génération asynchrone (Celery task ou management command)
-    # Pour l'instant, juste update status
+    enqueue('generation.start', {'job_id': job.pk}, unique_key=f'generation.start:{job.pk}')
+    
     job.status = VideoProductionJob.Status.VIDEO_PENDING
     job.started_at = timezone.now()
     job.save()
@@ -473,24 +474,62 @@ def job_cancel(request, pk):
 # API ENDPOINTS (pour polling temps réel)
 # =============================================================================
 
-@login_required
-def api_job_status(request, pk):
+def _job_status_snapshot(pk):
     """
-    API endpoint : récupère status job en JSON (pour polling AJAX).
-    """
-    job = get_object_or_404(VideoProductionJob, pk=pk)
+    Job + compteurs de segments en une seule requête (agrégation conditionnelle).
     
-    generations = job.generations.all()
+    Returns:
+        (job annoté, version) ; la version change dès qu'un statut, une
+        progression ou un horodatage du job ou de ses segments change
+    """
+    statuses = ('pending', 'processing', 'completed', 'failed')
+    job = get_object_or_404(
+        VideoProductionJob.objects.only(
+            'status', 'progress_percent', 'updated_at', 'estimated_cost', 'actual_cost',
+        ).annotate(
+            segments_total=Count('generations'),
+            segments_progress=Sum('generations__progress_percent'),
+            segments_updated=Max('generations__updated_at'),
+            segments_completed_at=Max('generations__completed_at'),
+            **{
+                f'segments_{status}': Count('generations', filter=Q(generations__status=status))
+                for status in statuses
+            },
+        ),
+        pk=pk,
+    )
     
-    data = {
+    fingerprint = '|'.join(str(value) for value in (
+        job.updated_at.isoformat() if job.updated_at else '',
+        job.status,
+        job.progress_percent,
+        job.segments_total,
+        job.segments_progress,
+        job.segments_updated.isoformat() if job.segments_updated else '',
+        job.segments_completed_at.isoformat() if job.segments_completed_at else '',
+        *(getattr(job, f'segments_{status}') for status in statuses),
+    ))
+    version = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:20]
+    return job, version
+
+
+def _job_status_payload(job, version):
+    """Payload complet (une requête de plus pour la liste des segments)"""
+    generations = (
+        job.generations
+        .order_by('segment_index')
+        .values('segment_index', 'status', 'progress_percent', 'provider', 'video_url')
+    )
+    return {
+        'version': version,
         'status': job.status,
         'progress': job.progress_percent,
         'segments': {
-            'total': generations.count(),
-            'pending': generations.filter(status='pending').count(),
-            'processing': generations.filter(status='processing').count(),
-            'completed': generations.filter(status='completed').count(),
-            'failed': generations.filter(status='failed').count(),
+            'total': job.segments_total,
+            'pending': job.segments_pending,
+            'processing': job.segments_processing,
+            'completed': job.segments_completed,
+            'failed': job.segments_failed,
         },
         'cost': {
             'estimated': float(job.estimated_cost),
@@ -498,17 +537,97 @@ def api_job_status(request, pk):
         },
         'generations': [
             {
-                'index': gen.segment_index,
-                'status': gen.status,
-                'progress': gen.progress_percent,
-                'provider': gen.provider,
-                'video_url': gen.video_url,
+                'index': gen['segment_index'],
+                'status': gen['status'],
+                'progress': gen['progress_percent'],
+                'provider': gen['provider'],
+                'video_url': gen['video_url'],
             }
-            for gen in generations.order_by('segment_index')
+            for gen in generations
         ]
     }
+
+
+def _client_version(request):
+    """Version déjà connue du client : If-None-Match, ?since= ou Last-Event-ID (SSE)"""
+    etag = request.headers.get('If-None-Match', '')
+    return (
+        etag.strip().removeprefix('W/').strip('"')
+        or request.GET.get('since', '')
+        or request.headers.get('Last-Event-ID', '')
+    )
+
+
+def _job_status_stream(pk, known_version):
+    """Flux SSE : un événement à chaque changement, heartbeat entre deux"""
+    interval = getattr(settings, 'MARKETING_STATUS_POLL_INTERVAL', 1.0)
+    deadline = time.monotonic() + getattr(settings, 'MARKETING_STATUS_STREAM_MAX', 55)
+    last_sent = time.monotonic()
+    
+    try:
+        while time.monotonic() < deadline:
+            job, version = _job_status_snapshot(pk)
+            if version != known_version:
+                known_version = version
+                last_sent = time.monotonic()
+                payload = json.dumps(_job_status_payload(job, version))
+                yield f"id: {version}\nevent: status\ndata: {payload}\n\n"
+                if job.status in TERMINAL_JOB_STATUSES:
+                    return
+            elif time.monotonic() - last_sent > 15:
+                last_sent = time.monotonic()
+                yield ": heartbeat\n\n"
+            time.sleep(interval)
+    finally:
+        # Flux long : ne pas garder la connexion du thread ouverte
+        connection.close()
+
+
+# Statuts après lesquels plus rien ne bouge (fin du flux SSE)
+TERMINAL_JOB_STATUSES = ('completed', 'failed')
+
+
+@login_required
+def api_job_status(request, pk):
+    """
+    API endpoint : récupère status job en JSON (pour polling AJAX).
+    
+    - ETag = version du job et de ses segments : 304 si rien n'a changé
+    - ?wait=N : long-poll, attend jusqu'à N secondes un changement
+    - ?stream=1 (ou Accept: text/event-stream) : flux SSE
+    """
+    known_version = _client_version(request)
+    
+    if request.GET.get('stream') or 'text/event-stream' in request.headers.get('Accept', ''):
+        get_object_or_404(VideoProductionJob.objects.only('pk'), pk=pk)
+        response = StreamingHttpResponse(
+            _job_status_stream(pk, known_version),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx : pas de mise en tampon
+        return response
     
-    return JsonResponse(data)
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = 0
+    wait = max(0.0, min(wait, getattr(settings, 'MARKETING_STATUS_LONGPOLL_MAX', 5)))
+    interval = getattr(settings, 'MARKETING_STATUS_POLL_INTERVAL', 1.0)
+    deadline = time.monotonic() + wait
+    
+    job, version = _job_status_snapshot(pk)
+    while known_version == version and time.monotonic() < deadline:
+        time.sleep(interval)
+        job, version = _job_status_snapshot(pk)
+    
+    if known_version == version:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(_job_status_payload(job, version))
+    response['ETag'] = f'"{version}"'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @login_required
@@ -528,7 +647,11 @@ def api_segment_retry(request, job_pk, segment_index):
     generation.error_message = ''
     generation.save()
     
-    # TODO: Re-queue pour génération
+    enqueue(
+        'generation.retry_segment',
+        {'generation_id': generation.pk},
+        unique_key=f'generation.retry_segment:{generation.pk}'
+    )
     
     return JsonResponse({
         'success': True,
@@ -551,6 +674,39 @@ def assets_library_view(request):
 @login_required
 def assets_upload_view(request):
     """Upload d'assets"""
+    if request.method == 'POST' and request.POST.get('direct_upload'):
+        # Fichiers déjà envoyés au bucket par le navigateur (upload direct) :
+        # un asset par upload, à partir de segment_index (sinon après le dernier)
+        from django.utils.http import url_has_allowed_host_and_scheme
+        from . import direct_upload
+
+        job = get_object_or_404(VideoProductionJob, pk=request.POST.get('job_id') or 0, created_by=request.user)
+        next_url = request.POST.get('next') or ''
+        if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+            next_url = ''
+        try:
+            if request.POST.get('segment_index', '') != '':
+                first_index = int(request.POST['segment_index'])
+            else:
+                last = job.assets.aggregate(last=Max('segment_index'))['last']
+                first_index = 0 if last is None else last + 1
+            uploads = [
+                direct_upload.get_completed_upload(request.user, upload_pk, kind='asset')
+                for upload_pk in request.POST.getlist('direct_upload')
+            ]
+            for offset, upload in enumerate(uploads):
+                direct_upload.attach_asset(
+                    upload,
+                    job,
+                    segment_index=first_index + offset,
+                    animation_prompt=request.POST.get('animation_prompt', ''),
+                )
+        except ValueError as e:
+            messages.error(request, f"Upload direct invalide : {e}")
+        else:
+            messages.success(request, f"{len(uploads)} asset(s) uploadé(s) avec succès!")
+        return redirect(next_url or 'marketing:assets_library')
+
     if request.method == 'POST':
         form = SegmentAssetUploadForm(request.POST, request.FILES)
         if form.is_valid():
@@ -640,28 +796,21 @@ def job_start_generation(request, pk):
     """Démarrer la génération d'un job"""
     job = get_object_or_404(VideoProductionJob, pk=pk)
     
-    try:
-        from .ai.generation_orchestrator import GenerationOrchestrator
-        
-        orchestrator = GenerationOrchestrator(job)
-        orchestrator.start_generation()
-        
-        messages.success(
-            request, 
-            f"✅ Génération de '{job.title}' lancée ! Les segments sont en cours de génération."
-        )
-        messages.info(
-            request,
-            "⏳ Les vidéos seront disponibles dans quelques minutes. Rechargez la page pour voir la progression."
-        )
-        
-    except ValueError as e:
-        messages.error(request, f"❌ Erreur : {str(e)}")
-    except Exception as e:
-        messages.error(request, f"❌ Erreur inattendue : {str(e)}")
-        job.status = VideoProductionJob.Status.FAILED
-        job.current_step = f"Erreur: {str(e)}"
-        job.save()
+    if not job.generations.filter(status='pending').exists():
+        messages.error(request, "❌ Erreur : aucun segment en attente de génération")
+        return redirect('marketing:job_detail', pk=pk)
+    
+    # Génération exécutée en tâche de fond (run_workers)
+    enqueue('generation.start', {'job_id': job.pk}, unique_key=f'generation.start:{job.pk}')
+    
+    messages.success(
+        request, 
+        f"✅ Génération de '{job.title}' lancée ! Les segments sont en cours de génération."
+    )
+    messages.info(
+        request,
+        "⏳ Les vidéos seront disponibles dans quelques minutes. Rechargez la page pour voir la progression."
+    )
     
     return redirect('marketing:job_detail', pk=pk)
 
@@ -676,23 +825,27 @@ def job_cancel(request, pk):
     return redirect('marketing:dashboard')
 
 
-@login_required
-def api_job_status(request, pk):
-    """API: Status d'un job (polling temps réel)"""
-    job = get_object_or_404(VideoProductionJob, pk=pk)
-    return JsonResponse({
-        'status': job.status,
-        'progress': job.progress_percent,
-        'current_step': job.current_step or '',
-    })
-
-
 @login_required
 def api_segment_retry(request, job_pk, segment_index):
     """API: Retry d'un segment spécifique"""
     job = get_object_or_404(VideoProductionJob, pk=job_pk)
+    generation = get_object_or_404(
+        VideoSegmentGeneration,
+        job=job,
+        segment_index=segment_index
+    )
+    
+    generation.status = VideoSegmentGeneration.Status.PENDING
+    generation.error_message = ''
+    generation.provider_job_id = ''
+    generation.save(update_fields=['status', 'error_message', 'provider_job_id'])
+    
+    enqueue(
+        'generation.retry_segment',
+        {'generation_id': generation.pk},
+        unique_key=f'generation.retry_segment:{generation.pk}'
+    )
     
-    # TODO: Implémenter retry segment
     return JsonResponse({
         'success': True,
         'message': f'Segment {segment_index} en cours de régénération'
@@ -10,9 +10,11 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
 
+from . import direct_upload
 from .models_extended import (
-    VideoProductionJob, VideoScript, VideoSegmentGeneration, SegmentSourceType
+    DirectUpload, VideoProductionJob, VideoScript, VideoSegmentGeneration, SegmentSourceType
 )
+from .task_queue import enqueue
 
 
 @login_required
@@ -72,6 +74,7 @@ def hybrid_setup_view(request, script_pk):
         for seg in segments_config:
             source = request.POST.get(f'source_{seg["index"]}', seg['suggested_source'])
             clip_file = request.FILES.get(f'clip_{seg["index"]}')
+            clip_upload_id = request.POST.get(f'clip_upload_{seg["index"]}')
             scene_prompt = request.POST.get(f'scene_{seg["index"]}', seg['text'])
             
             generation = VideoSegmentGeneration.objects.create(
@@ -87,8 +90,18 @@ def hybrid_setup_view(request, script_pk):
                 status='pending' if source == 'ai_generated' else 'completed',
             )
             
-            # Si clip uploadé, sauvegarder en local (évite S3)
-            if clip_file and source == 'uploaded_clip':
+            # Clip envoyé directement au bucket par le navigateur
+            if clip_upload_id and source == 'uploaded_clip':
+                try:
+                    upload = direct_upload.get_completed_upload(
+                        request.user, clip_upload_id, DirectUpload.Kind.CLIP
+                    )
+                    direct_upload.attach_clip(upload, generation)
+                except ValueError as e:
+                    messages.warning(request, f"⚠️ Clip du segment {seg['index']} : {e}")
+            
+            # Si clip uploadé via le formulaire, sauvegarder en local (évite S3)
+            elif clip_file and source == 'uploaded_clip':
                 import os
                 from django.conf import settings
                 clip_dir = os.path.join(settings.MEDIA_ROOT, 'marketing', 'clips', str(job.pk))
@@ -163,22 +176,16 @@ def hybrid_generate_view(request, pk):
         messages.error(request, "❌ Accès refusé")
         return redirect('marketing:dashboard')
     
-    try:
-        from .ai.generation_orchestrator import GenerationOrchestrator
-        
-        orchestrator = GenerationOrchestrator(job)
-        orchestrator.start_generation()
-        
-        ai_count = job.generations.filter(source_type='ai_generated').count()
-        clip_count = job.generations.filter(source_type='uploaded_clip').count()
-        
-        messages.success(
-            request,
-            f"🎬 Génération lancée ! {ai_count} segments IA en cours, {clip_count} clips déjà prêts."
-        )
-        
-    except Exception as e:
-        messages.error(request, f"❌ Erreur : {str(e)}")
+    # Génération exécutée en tâche de fond (run_workers)
+    enqueue('generation.start', {'job_id': job.pk}, unique_key=f'generation.start:{job.pk}')
+    
+    ai_count = job.generations.filter(source_type='ai_generated').count()
+    clip_count = job.generations.filter(source_type='uploaded_clip').count()
+    
+    messages.success(
+        request,
+        f"🎬 Génération lancée ! {ai_count} segments IA en cours, {clip_count} clips déjà prêts."
+    )
     
     return redirect('marketing:job_detail', pk=pk)
 
@@ -203,18 +210,16 @@ def hybrid_assemble_view(request, pk):
         )
         return redirect('marketing:job_detail', pk=pk)
     
-    try:
-        from .ai.video_assembler import VideoAssembler
-        
-        assembler = VideoAssembler(job)
-        final_path = assembler.assemble(add_subtitles=True)
-        
-        messages.success(
-            request,
-            f"🎉 Vidéo finale assemblée ! {final_path}"
-        )
-        
-    except Exception as e:
-        messages.error(request, f"❌ Erreur assemblage : {str(e)}")
+    # Assemblage (FFmpeg) exécuté en tâche de fond (run_workers)
+    enqueue(
+        'hybrid.assemble',
+        {'job_id': job.pk, 'add_subtitles': True},
+        unique_key=f'hybrid.assemble:{job.pk}'
+    )
+    
+    messages.success(
+        request,
+        "🎞️ Assemblage lancé ! La vidéo finale sera disponible dans quelques minutes."
+    )
     
     return redirect('marketing:job_detail', pk=pk)
@@ -10,6 +10,13 @@ from django.db.models import Q
 from django.http import JsonResponse
 
 from .models_extended import VideoScript, VideoTheme, ClientLevel, Platform
+from .search import (
+    DEFAULT_SCRIPT_SORT,
+    filter_scripts_by_tag,
+    order_scripts,
+    popular_script_tags,
+    search_scripts,
+)
 
 
 class VideoScriptLibraryView(LoginRequiredMixin, ListView):
@@ -24,15 +31,10 @@ class VideoScriptLibraryView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         qs = VideoScript.objects.all()
         
-        # Recherche texte
+        # Recherche plein texte (tsvector GIN / index en mémoire), classée
         query = self.request.GET.get('q')
         if query:
-            qs = qs.filter(
-                Q(title__icontains=query) |
-                Q(code__icontains=query) |
-                Q(hook__icontains=query) |
-                Q(solution__icontains=query)
-            )
+            qs = search_scripts(qs, query)
         
         # Filtre thème
         theme = self.request.GET.get('theme')
@@ -57,13 +59,14 @@ class VideoScriptLibraryView(LoginRequiredMixin, ListView):
         # Filtre tags
         tag = self.request.GET.get('tag')
         if tag:
-            qs = qs.filter(tags__contains=[tag])
+            qs = filter_scripts_by_tag(qs, tag)
         
-        # Tri
-        sort = self.request.GET.get('sort', '-created_at')
-        qs = qs.order_by(sort)
-        
-        return qs
+        # Tri (whitelist) : pertinence par défaut quand on cherche
+        return order_scripts(qs, self._sort())
+    
+    def _sort(self):
+        default = 'rank' if self.request.GET.get('q') else DEFAULT_SCRIPT_SORT
+        return self.request.GET.get('sort') or default
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -79,17 +82,14 @@ class VideoScriptLibraryView(LoginRequiredMixin, ListView):
         context['current_platform'] = self.request.GET.get('platform', '')
         context['current_level'] = self.request.GET.get('level', '')
         context['current_max_duration'] = self.request.GET.get('max_duration', '')
-        context['current_sort'] = self.request.GET.get('sort', '-created_at')
+        context['current_sort'] = self._sort()
         
         # Stats globales
         context['total_scripts'] = VideoScript.objects.count()
         context['themes_count'] = VideoScript.objects.values('theme').distinct().count()
         
         # Tags populaires
-        all_tags = []
-        for script in VideoScript.objects.all():
-            all_tags.extend(script.tags)
-        context['popular_tags'] = list(set(all_tags))[:10]
+        context['popular_tags'] = popular_script_tags(VideoScript.objects.all())
         
         return context
 
@@ -0,0 +1,125 @@
+"""
+API d'upload direct vers le bucket (multipart présigné).
+Voir marketing/direct_upload.py pour le déroulé complet.
+"""
+
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+
+from . import direct_upload
+from .models_extended import DirectUpload, VideoProductionJob
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (TypeError, ValueError):
+        raise ValueError("JSON invalide")
+    if not isinstance(data, dict):
+        raise ValueError("JSON invalide")
+    return data
+
+
+def _upload_payload(upload, urls=None):
+    payload = {
+        'id': upload.pk,
+        'status': upload.status,
+        'part_size': upload.part_size,
+        'part_count': upload.part_count,
+    }
+    if urls is not None:
+        payload['parts'] = [{'part_number': n, 'url': url} for n, url in sorted(urls.items())]
+    if upload.url:
+        payload['url'] = upload.url
+    return payload
+
+
+@login_required
+@require_POST
+def api_upload_create(request):
+    """
+    Démarre un upload direct.
+
+    Body: {kind: 'clip'|'asset', filename, size, content_type, job_id?}
+    Retourne le découpage et les URLs présignées des premières parts.
+    """
+    try:
+        data = _json_body(request)
+
+        job = None
+        if data.get('job_id'):
+            job = get_object_or_404(VideoProductionJob, pk=data['job_id'])
+            if job.created_by != request.user and not request.user.is_staff:
+                return JsonResponse({'error': 'Accès refusé'}, status=403)
+
+        try:
+            size = int(data.get('size') or 0)
+        except (TypeError, ValueError):
+            raise ValueError("Taille invalide")
+        upload = direct_upload.create_upload(
+            request.user,
+            kind=data.get('kind', ''),
+            filename=data.get('filename', ''),
+            size=size,
+            content_type=data.get('content_type', ''),
+            job=job,
+        )
+        # Premières URLs tout de suite (un fichier moyen tient en quelques parts)
+        urls = direct_upload.presign_parts(upload, range(1, min(upload.part_count, 20) + 1))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse(_upload_payload(upload, urls), status=201)
+
+
+@login_required
+@require_POST
+def api_upload_parts(request, pk):
+    """
+    URLs présignées de parts supplémentaires (ou expirées).
+
+    Body: {part_numbers: [21, 22, ...]}
+    """
+    upload = get_object_or_404(DirectUpload, pk=pk, user=request.user)
+    try:
+        data = _json_body(request)
+        try:
+            numbers = [int(n) for n in data.get('part_numbers') or []]
+        except (TypeError, ValueError):
+            raise ValueError("Numéros de part invalides")
+        urls = direct_upload.presign_parts(upload, numbers)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse(_upload_payload(upload, urls))
+
+
+@login_required
+@require_POST
+def api_upload_complete(request, pk):
+    """
+    Finalise l'upload.
+
+    Body: {parts: [{part_number, etag}, ...]}
+    """
+    upload = get_object_or_404(DirectUpload, pk=pk, user=request.user)
+    try:
+        data = _json_body(request)
+        upload = direct_upload.complete_upload(upload, data.get('parts', []))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse(_upload_payload(upload))
+
+
+@login_required
+@require_POST
+def api_upload_abort(request, pk):
+    """Abandonne un upload en cours"""
+    upload = get_object_or_404(DirectUpload, pk=pk, user=request.user)
+    direct_upload.abort_upload(upload)
+    return JsonResponse(_upload_payload(upload))
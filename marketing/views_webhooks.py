@@ -0,0 +1,70 @@
+"""
+Webhooks des providers externes.
+
+HeyGen : événements avatar_video.success / avatar_video.fail, signés en
+HMAC-SHA256 du corps brut (en-tête Signature) avec HEYGEN_WEBHOOK_SECRET.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .models_extended import ProviderPayload
+from .payloads import store_payload
+from .task_queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+def _valid_signature(secret: str, body: bytes, signature: str) -> bool:
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or '')
+
+
+@csrf_exempt
+@require_POST
+def heygen_webhook(request):
+    """Met en file la finalisation d'une vidéo avatar dès que HeyGen la signale terminée"""
+    from .ai.heygen_tracker import HeyGenTracker, find_job
+
+    secret = getattr(settings, 'HEYGEN_WEBHOOK_SECRET', '')
+    if not secret:
+        return HttpResponse(status=404)
+    if not _valid_signature(secret, request.body, request.headers.get('Signature', '')):
+        return HttpResponse(status=403)
+
+    try:
+        event = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'JSON invalide'}, status=400)
+
+    event_type = event.get('event_type', '')
+    data = event.get('event_data') or {}
+    job = find_job(data.get('video_id', ''))
+    if job is None:
+        # Vidéo hors pipeline : rien à faire, mais pas de nouvel envoi
+        return JsonResponse({'status': 'ignored'})
+
+    store_payload(event, 'heygen', ProviderPayload.Kind.WEBHOOK, job=job)
+
+    if event_type == 'avatar_video.success' and data.get('url'):
+        # Téléchargement dans un worker : réponse immédiate à HeyGen
+        enqueue(
+            'heygen.complete',
+            {'job_id': job.pk, 'video_url': data['url'], 'duration': data.get('duration')},
+            unique_key=f"heygen-complete:{data['video_id']}",
+        )
+        status = 'queued'
+    elif event_type == 'avatar_video.fail':
+        status = HeyGenTracker(job).fail(f"HeyGen: {data.get('msg') or 'génération échouée'}")
+    else:
+        return JsonResponse({'status': 'ignored'})
+
+    logger.info(f"Webhook HeyGen {event_type} → job #{job.pk} {status}")
+    return JsonResponse({'status': status})